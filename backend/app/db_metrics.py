@@ -0,0 +1,147 @@
+# app/db_metrics.py
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+# stats of the request being served; copied into the threadpool that runs
+# sync endpoints, so statements issued there are counted too
+_current: ContextVar[QueryStats | None] = ContextVar("db_query_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def _handle_error(context):
+    # after_cursor_execute doesn't fire for a failed statement
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+
+def instrument(engine: Engine) -> None:
+    """Count statements and time spent in the database per request."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+@dataclass
+class RouteTotals:
+    requests: int = 0
+    statements: int = 0
+    max_statements: int = 0
+    db_seconds: float = 0.0
+
+    def dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "statements": self.statements,
+            "avg_statements": round(self.statements / self.requests, 2),
+            "max_statements": self.max_statements,
+            "db_time_ms": round(self.db_seconds * 1000, 3),
+            "avg_db_time_ms": round(self.db_seconds * 1000 / self.requests, 3),
+        }
+
+
+class QueryMetrics:
+    """Per-route totals of the per-request stats, since start or reset()."""
+
+    def __init__(self):
+        self._routes: Dict[str, RouteTotals] = {}
+        self._lock = Lock()
+
+    def record(self, route: str, stats: QueryStats) -> None:
+        with self._lock:
+            totals = self._routes.setdefault(route, RouteTotals())
+            totals.requests += 1
+            totals.statements += stats.statements
+            totals.max_statements = max(totals.max_statements, stats.statements)
+            totals.db_seconds += stats.db_seconds
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {route: t.dict() for route, t in sorted(self._routes.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+query_metrics = QueryMetrics()
+
+
+def route_template(scope) -> str:
+    """
+    The matched route's path as mounted, e.g. GET /underwriting/runs/{match_run_id}
+    rather than /runs/{match_run_id}: routes of an included router keep
+    their path relative to its prefix, so the prefix is taken from the
+    request path, in front of the longest tail the route's pattern matches.
+    """
+    route = scope.get("route")
+    if route is None:
+        return "<unmatched>"
+    path = scope["path"]
+    root_path = scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+
+    i = 0
+    while i != -1:
+        if route.path_regex.match(path[i:]):
+            return path[:i] + route.path
+        i = path.find("/", i + 1)
+    return route.path
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware: adds X-DB-Queries / X-DB-Time-Ms to every response and
+    records the request under its route template (e.g. GET /underwriting/runs/{match_run_id}).
+    Headers cover the statements issued before the response starts; the
+    recorded totals also include those of a streamed body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.statements).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.db_seconds * 1000:.3f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            # templates, not raw paths, so ids don't each get an entry
+            query_metrics.record(f"{scope['method']} {route_template(scope)}", stats)
@@ -2,8 +2,11 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routers import applications, policies, underwriting, matches
-from app.db import Base, engine
+from app.routers import applications, policies, underwriting, matches, metrics, analytics, export
+from app.db import SessionLocal, engine
+from app.migrate import upgrade
+from app.db_metrics import QueryStatsMiddleware
+from app.services.catalog import policy_catalog
 
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
@@ -22,6 +25,13 @@ async def lifespan(app: FastAPI):
     seed_falcon()
     seed_citizens()
     seed_stearns()
+    # seeders write policies directly; make every process reload them
+    db = SessionLocal()
+    try:
+        policy_catalog.changed(db)
+        db.commit()
+    finally:
+        db.close()
     print(" Seeder Complete.")
 
     yield
@@ -30,8 +40,9 @@ async def lifespan(app: FastAPI):
     print("Shutting down...")
 
 
-# Create tables (for demo; in prod use Alembic)
-Base.metadata.create_all(bind=engine)
+# Create missing tables and add columns/indexes newer than the database
+# (see app/migrate.py, also runnable on its own)
+upgrade(engine)
 
 app = FastAPI(
     title="Lender Matching Platform",
@@ -45,9 +56,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "X-DB-Time-Ms", "X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimate", "ETag", "X-Rematch-Id"],
 )
+app.add_middleware(QueryStatsMiddleware)
 
 app.include_router(applications.router, prefix="/applications", tags=["applications"])
 app.include_router(policies.router,     prefix="/policies",     tags=["policies"])
 app.include_router(underwriting.router, prefix="/underwriting", tags=["underwriting"])
 app.include_router(matches.router,      prefix="/matches",      tags=["matches"])
+app.include_router(metrics.router,      prefix="/metrics",      tags=["metrics"])
+app.include_router(analytics.router,    prefix="/analytics",    tags=["analytics"])
+app.include_router(export.router,       prefix="/export",       tags=["export"])
@@ -0,0 +1,117 @@
+# app/migrate.py
+import argparse
+from typing import List
+
+from sqlalchemy import inspect, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db import Base, engine as default_engine
+
+# Schema upgrades without Alembic. create_all only creates missing tables,
+# so columns and indexes added to existing tables since a database was
+# created are added here, and data the new tables depend on is backfilled.
+# Every step checks the live schema first: running it again is a no-op.
+
+
+def _add_column(conn: Connection, table, column) -> List[str]:
+    quote = conn.dialect.identifier_preparer.quote
+    t, c = quote(table.name), quote(column.name)
+    statements = [f"ALTER TABLE {t} ADD COLUMN {c} {column.type.compile(dialect=conn.dialect)}"]
+    conn.execute(text(statements[0]))
+
+    default = column.default
+    if default is None or not (default.is_scalar or default.is_callable):
+        return statements
+    # existing rows get the value a new row would get
+    value = default.arg(None) if default.is_callable else default.arg
+    conn.execute(table.update().values({column.name: value}))
+    statements.append(f"UPDATE {t} SET {c} = {value}")
+    if not column.nullable and conn.dialect.name == "postgresql":
+        # SQLite can't alter a column; the models always supply the value
+        statements.append(f"ALTER TABLE {t} ALTER COLUMN {c} SET NOT NULL")
+        conn.execute(text(statements[-1]))
+    return statements
+
+
+def _backfill_policy_versions(conn: Connection) -> int:
+    """Archive the current version of every policy not archived yet (see LenderPolicyVersion)."""
+    from app.models.lender_policy import LenderPolicy, LenderPolicyVersion
+
+    versions = LenderPolicyVersion.__table__
+    archived = set(conn.execute(select(versions.c.policy_id, versions.c.version)).all())
+    rows = [
+        {"policy_id": p.id, "version": p.version, "policy_json": p.policy_json}
+        for p in conn.execute(select(LenderPolicy.id, LenderPolicy.version, LenderPolicy.policy_json))
+        if (p.id, p.version) not in archived
+    ]
+    if rows:
+        conn.execute(insert(versions), rows)
+    return len(rows)
+
+
+def upgrade(engine: Engine = default_engine) -> List[str]:
+    """
+    Bring the database up to the models: missing tables, then missing
+    columns and indexes of existing tables, then backfills. Returns a log
+    of what was done.
+    """
+    # every model has to be registered on Base.metadata
+    import app.models.analytics, app.models.borrower, app.models.business_credit  # noqa: F401
+    import app.models.guarantor, app.models.lender_policy, app.models.loan_request  # noqa: F401
+    import app.models.match_result  # noqa: F401
+
+    done: List[str] = []
+    altered = set()
+    existing = set(inspect(engine).get_table_names())
+    created = [t.name for t in Base.metadata.sorted_tables if t.name not in existing]
+    Base.metadata.create_all(bind=engine)
+    done.extend(f"CREATE TABLE {name}" for name in created)
+
+    with engine.begin() as conn:
+        insp = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            if table.name in created:
+                continue
+            columns = {c["name"] for c in insp.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    done.extend(_add_column(conn, table, column))
+                    altered.add(table.name)
+            indexes = {ix["name"] for ix in insp.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    done.append(f"CREATE INDEX {index.name}")
+
+        archived = _backfill_policy_versions(conn)
+        if archived:
+            done.append(f"archived {archived} policy version(s)")
+
+    if ("program_daily_stats" in created or "program_daily_stats" in altered) and "match_results" not in created:
+        # aggregates of results written before the tables (or their
+        # current counters) existed
+        from app.db import SessionLocal
+        from app.services.analytics import rebuild
+
+        db = SessionLocal(bind=engine)
+        try:
+            report = rebuild(db)
+        finally:
+            db.close()
+        done.append(f"analytics rebuilt from {report['results']} result(s)")
+    return done
+
+
+def main():
+    argparse.ArgumentParser(description="Upgrade the database schema to the current models").parse_args()
+    done = upgrade()
+    for line in done:
+        print(line)
+    print(f"Schema up to date ({len(done)} change(s))")
+
+
+# ----------------------------------------------------
+# RUN DIRECTLY: python -m app.migrate
+# ----------------------------------------------------
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# app/models/analytics.py
+from sqlalchemy import Column, Integer, Float, String, Date
+from app.db import Base
+
+# Maintained by services.analytics in the transactions that write
+# match_results; rebuilt from them with `python -m app.services.analytics`.
+# Plain ids, no foreign keys: history outlives deleted programs.
+
+
+class ProgramDailyStats(Base):
+    __tablename__ = "program_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    lender_program_id = Column(Integer, primary_key=True)
+    lender_id = Column(Integer, nullable=False, index=True)
+
+    evaluated = Column(Integer, nullable=False, default=0)
+    eligible = Column(Integer, nullable=False, default=0)
+    score_total = Column(Float, nullable=False, default=0.0)
+    scored = Column(Integer, nullable=False, default=0)  # results with a fit score
+    explained = Column(Integer, nullable=False, default=0)  # results whose failures are all counted by rule
+
+
+class RuleDailyFailures(Base):
+    """Failures per rule among a program's `explained` results of the day."""
+    __tablename__ = "rule_daily_failures"
+
+    day = Column(Date, primary_key=True)
+    lender_program_id = Column(Integer, primary_key=True)
+    rule_id = Column(String, primary_key=True)
+    lender_id = Column(Integer, nullable=False)
+
+    failures = Column(Integer, nullable=False, default=0)
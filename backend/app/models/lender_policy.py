@@ -1,5 +1,7 @@
 # app/models/lender_policy.py
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, JSON
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, UniqueConstraint, event, insert, select
 from sqlalchemy.orm import relationship
 from app.db import Base
 
@@ -31,8 +33,11 @@ class LenderProgram(Base):
 class LenderPolicy(Base):
     """
     Versioned policy config per program. Policy JSON holds the rule tree.
+    Ids are never reused (AUTOINCREMENT on SQLite), since archived
+    versions outlive the policy.
     """
     __tablename__ = "lender_policies"
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     lender_program_id = Column(Integer, ForeignKey("lender_programs.id"), nullable=False)
@@ -43,3 +48,74 @@ class LenderPolicy(Base):
     policy_json = Column(JSON, nullable=False)
 
     program = relationship("LenderProgram", backref="policies")
+
+
+class LenderPolicyVersion(Base):
+    """
+    policy_json of every (policy, version) written, kept after the policy
+    moves on or is deleted: compact MatchResults only store the policy
+    id/version and are expanded against it (see services.explain). Rows
+    are written once and never changed; new rules need a new version.
+    """
+    __tablename__ = "lender_policy_versions"
+
+    id = Column(Integer, primary_key=True)
+    policy_id = Column(Integer, nullable=False)  # no FK, outlives the policy
+    version = Column(Integer, nullable=False)
+    policy_json = Column(JSON, nullable=False)
+
+    __table_args__ = (UniqueConstraint("policy_id", "version"),)
+
+
+@event.listens_for(LenderPolicy, "after_insert")
+@event.listens_for(LenderPolicy, "after_update")
+def _archive_version(mapper, connection, policy):
+    # insert-if-absent: results already stored against an archived version
+    # must keep expanding the same way, so other rules under it are refused
+    from app.services.policy_plan import policy_digest
+
+    versions = LenderPolicyVersion.__table__
+    archived = connection.execute(
+        select(versions.c.policy_json).where(versions.c.policy_id == policy.id, versions.c.version == policy.version)
+    ).scalar()
+    if archived is None:
+        connection.execute(
+            insert(versions).values(policy_id=policy.id, version=policy.version, policy_json=policy.policy_json)
+        )
+    elif policy_digest(archived) != policy_digest(policy.policy_json):
+        raise ValueError(f"Policy {policy.id} version {policy.version} is archived with other rules")
+
+
+class PolicyRematch(Base):
+    """
+    A re-match started by a policy update (PUT /policies/{id}?rematch=true)
+    and its outcome; see services.rematch.
+    """
+    __tablename__ = "policy_rematches"
+
+    id = Column(Integer, primary_key=True)
+    policy_id = Column(Integer, nullable=False, index=True)  # no FK, outlives the policy
+    lender_program_id = Column(Integer, nullable=False)
+    from_version = Column(Integer, nullable=False)
+    to_version = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="PENDING")  # PENDING/RUNNING/COMPLETE/FAILED
+
+    examined = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    reevaluated = Column(Integer, nullable=False, default=0)
+    flipped = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+
+class PolicyCatalogState(Base):
+    """
+    Single row (id=1) whose generation is bumped on every change to
+    lenders, programs or policies; see services.catalog.
+    """
+    __tablename__ = "policy_catalog_state"
+
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
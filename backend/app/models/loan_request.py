@@ -18,6 +18,6 @@ class LoanRequest(Base):
     equipment_vendor = Column(String, nullable=True)
     equipment_condition = Column(String, nullable=True)  # new/used
 
-    created_at = Column(Date, nullable=False)
+    created_at = Column(Date, nullable=False, index=True)
 
     borrower = relationship("Borrower", backref="loan_requests")
@@ -1,5 +1,7 @@
 # app/models/match_result.py
-from sqlalchemy import Column, Integer, Float, String, Boolean, ForeignKey, JSON
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, Float, String, Boolean, DateTime, ForeignKey, JSON, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from app.db import Base
 
@@ -10,8 +12,27 @@ class MatchRun(Base):
     loan_request_id = Column(Integer, ForeignKey("loan_requests.id"), nullable=False)
     status = Column(String, nullable=False, default="PENDING")  # PENDING/RUNNING/COMPLETE/FAILED
 
+    # queue bookkeeping, see app/worker.py
+    explain = Column(Boolean, nullable=False, default=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # refreshed while RUNNING
+    error = Column(String, nullable=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
     loan_request = relationship("LoanRequest", backref="match_runs")
 
+    __table_args__ = (
+        # latest run of an application, optionally in a given status
+        Index("ix_match_runs_loan_request_status_completed", "loan_request_id", "status", "completed_at"),
+        # runs in a time window
+        Index("ix_match_runs_completed_at", "completed_at"),
+        # the worker queue: oldest PENDING first
+        Index("ix_match_runs_status_id", "status", "id"),
+    )
+
 
 class MatchResult(Base):
     __tablename__ = "match_results"
@@ -30,3 +51,22 @@ class MatchResult(Base):
     lender = relationship("Lender")
     program = relationship("LenderProgram")
     match_run = relationship("MatchRun", backref="results")
+
+    __table_args__ = (
+        # results of a run, and "did lender X come back in run Y"
+        Index("ix_match_results_run_lender", "match_run_id", "lender_id"),
+        # runs a lender appears in, newest first
+        Index("ix_match_results_lender_run", "lender_id", "match_run_id"),
+    )
+
+
+class MatchRunPayload(Base):
+    """
+    GET /matches/by-run body of a COMPLETE run, serialized once;
+    see services.result_payload.
+    """
+    __tablename__ = "match_run_payloads"
+
+    match_run_id = Column(Integer, ForeignKey("match_runs.id"), primary_key=True)
+    etag = Column(String, nullable=False)
+    body = Column(LargeBinary, nullable=False)
@@ -0,0 +1,130 @@
+# app/routers/analytics.py
+from datetime import date
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import get_async_db
+from app.models.analytics import ProgramDailyStats, RuleDailyFailures
+from app.schemas.analytics import ApprovalStats, RuleFailureStats
+
+router = APIRouter()
+
+# Everything here reads the aggregate tables kept by services.analytics:
+# rows per program and day, never match_results.
+
+S = ProgramDailyStats
+
+
+def _period(stmt: Select, model, date_from: date | None, date_to: date | None) -> Select:
+    if date_from:
+        stmt = stmt.where(model.day >= date_from)
+    if date_to:
+        stmt = stmt.where(model.day <= date_to)
+    return stmt
+
+
+def _approval(row, **extra) -> ApprovalStats:
+    return ApprovalStats(
+        lender_id=row.lender_id,
+        evaluated=row.evaluated,
+        eligible=row.eligible,
+        approval_rate=row.eligible / row.evaluated if row.evaluated else 0.0,
+        avg_fit_score=row.score_total / row.scored if row.scored else None,
+        **extra,
+    )
+
+
+_totals = (
+    func.sum(S.evaluated).label("evaluated"),
+    func.sum(S.eligible).label("eligible"),
+    func.sum(S.score_total).label("score_total"),
+    func.sum(S.scored).label("scored"),
+)
+
+
+@router.get("/programs", response_model=List[ApprovalStats])
+async def program_approvals(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    lender_id: int | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Approval rate and average fit score per program over the period."""
+    stmt = select(S.lender_id, S.lender_program_id, *_totals).group_by(S.lender_id, S.lender_program_id)
+    if lender_id is not None:
+        stmt = stmt.where(S.lender_id == lender_id)
+    rows = (await db.execute(_period(stmt, S, date_from, date_to).order_by(S.lender_program_id))).all()
+    return [_approval(r, lender_program_id=r.lender_program_id) for r in rows]
+
+
+@router.get("/lenders", response_model=List[ApprovalStats])
+async def lender_approvals(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Approval rate and average fit score per lender, all programs together."""
+    stmt = select(S.lender_id, *_totals).group_by(S.lender_id)
+    rows = (await db.execute(_period(stmt, S, date_from, date_to).order_by(S.lender_id))).all()
+    return [_approval(r) for r in rows]
+
+
+@router.get("/daily", response_model=List[ApprovalStats])
+async def daily_approvals(
+    lender_program_id: int,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """One program's approvals day by day."""
+    stmt = select(S).where(S.lender_program_id == lender_program_id)
+    rows = (await db.scalars(_period(stmt, S, date_from, date_to).order_by(S.day))).all()
+    return [_approval(r, lender_program_id=r.lender_program_id, day=r.day) for r in rows]
+
+
+@router.get("/rules", response_model=List[RuleFailureStats])
+async def failing_rules(
+    date_from: date | None = None,
+    date_to: date | None = None,
+    lender_id: int | None = None,
+    lender_program_id: int | None = None,
+    limit: int = Query(20, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Most frequently failing rules over the period, most failures first."""
+    F = RuleDailyFailures
+    failures = func.sum(F.failures).label("failures")
+    stmt = (
+        select(F.lender_id, F.lender_program_id, F.rule_id, failures)
+        .group_by(F.lender_id, F.lender_program_id, F.rule_id)
+        .order_by(failures.desc(), F.lender_program_id, F.rule_id)
+        .limit(limit)
+    )
+    if lender_id is not None:
+        stmt = stmt.where(F.lender_id == lender_id)
+    if lender_program_id is not None:
+        stmt = stmt.where(F.lender_program_id == lender_program_id)
+    rows = (await db.execute(_period(stmt, F, date_from, date_to))).all()
+
+    # denominators: results of the same programs in the same period whose
+    # failures were counted (explain=False summaries aren't, see services.analytics)
+    programs = {r.lender_program_id for r in rows}
+    explained = {}
+    if programs:
+        totals = select(S.lender_program_id, func.sum(S.explained)).where(S.lender_program_id.in_(programs))
+        totals = _period(totals.group_by(S.lender_program_id), S, date_from, date_to)
+        explained = dict((await db.execute(totals)).all())
+
+    return [
+        RuleFailureStats(
+            lender_id=r.lender_id,
+            lender_program_id=r.lender_program_id,
+            rule_id=r.rule_id,
+            failures=r.failures,
+            failure_rate=r.failures / explained[r.lender_program_id] if explained.get(r.lender_program_id) else 0.0,
+        )
+        for r in rows
+    ]
@@ -1,25 +1,30 @@
 # app/routers/applications.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from datetime import date
 
-from app.db import get_db
+from app.db import get_async_db
 from app.models.borrower import Borrower
 from app.models.guarantor import Guarantor
 from app.models.loan_request import LoanRequest
+from app.models.match_result import MatchRun, MatchResult
 from app.schemas.borrower import BorrowerCreate, BorrowerRead
 from app.schemas.guarantor import GuarantorCreate, GuarantorRead
 from app.schemas.loan_request import LoanRequestBase, LoanRequestCreate, LoanRequestRead
+from app.services.pagination import (
+    DEFAULT_LIMIT, MAX_LIMIT, CountMode, count_rows, keyset_page, set_page_headers,
+)
 
 router = APIRouter()
 
 # app/routers/applications.py
 
 @router.post("/", response_model=LoanRequestRead)
-def create_application(
+async def create_application(
     payload: dict,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Extract
     borrower_data = payload["borrower"]
@@ -29,7 +34,7 @@ def create_application(
     # 1. Create borrower
     borrower = Borrower(**borrower_data)
     db.add(borrower)
-    db.flush()  # Get borrower.id
+    await db.flush()  # Get borrower.id
 
     # 2. Create guarantors
     for g in guarantors_data:
@@ -52,19 +57,59 @@ def create_application(
         created_at=date.today()
     )
     db.add(loan)
-    db.commit()
-    db.refresh(loan)
+    await db.commit()
 
     return loan
 
 @router.get("/{loan_request_id}", response_model=LoanRequestRead)
-def get_application(loan_request_id: int, db: Session = Depends(get_db)):
-    lr = db.query(LoanRequest).filter(LoanRequest.id == loan_request_id).first()
+async def get_application(loan_request_id: int, db: AsyncSession = Depends(get_async_db)):
+    lr = await db.get(LoanRequest, loan_request_id)
     if not lr:
         raise HTTPException(status_code=404, detail="Loan request not found")
     return lr
 
 @router.get("/", response_model=List[LoanRequestRead])
-def list_applications(db: Session = Depends(get_db)):
-    apps = db.query(LoanRequest).order_by(LoanRequest.id.desc()).all()
+async def list_applications(
+    response: Response,
+    created_from: date | None = None,
+    created_to: date | None = None,
+    lender_id: int | None = None,
+    status: str | None = None,
+    cursor: int | None = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    count: CountMode = "estimate",
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Newest first, one page at a time: pass the X-Next-Cursor header of a
+    response as `cursor` to get the next page. X-Total-Count carries the
+    number of matching applications, or X-Total-Count-Estimate when the
+    count is a planner estimate.
+    - created_from / created_to: created_at range, inclusive
+    - lender_id: applications that lender came back eligible for
+    - status: applications with a match run in this status
+    """
+    stmt = select(LoanRequest)
+    if created_from:
+        stmt = stmt.where(LoanRequest.created_at >= created_from)
+    if created_to:
+        stmt = stmt.where(LoanRequest.created_at <= created_to)
+    if lender_id is not None:
+        stmt = stmt.where(
+            select(MatchRun.id)
+            .join(MatchResult, MatchResult.match_run_id == MatchRun.id)
+            .where(MatchRun.loan_request_id == LoanRequest.id)
+            .where(MatchResult.lender_id == lender_id, MatchResult.eligible == True)
+            .exists()
+        )
+    if status:
+        stmt = stmt.where(
+            select(MatchRun.id)
+            .where(MatchRun.loan_request_id == LoanRequest.id, MatchRun.status == status)
+            .exists()
+        )
+
+    apps, next_cursor = await keyset_page(db, stmt, LoanRequest.id, cursor, limit, descending=True)
+    total, estimated = await count_rows(db, stmt, count)
+    set_page_headers(response, next_cursor, total, estimated)
     return apps
@@ -0,0 +1,33 @@
+# app/routers/export.py
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from app.services.export import FORMATS, YIELD_PER, stream_export
+
+router = APIRouter()
+
+
+@router.get("/{dataset}")
+def export(
+    dataset: Literal["applications", "results"],
+    format: Literal["csv", "ndjson"] = "ndjson",
+    gzip: bool = False,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    cursor: int | None = None,
+    yield_per: int = Query(YIELD_PER, ge=1, le=100000),
+):
+    """
+    Stream every application (by created_at) or match result of a COMPLETE
+    run (by completion day) in the date range, in id order. If the
+    download breaks, ask again with cursor = the last id received.
+    """
+    filename = f"{dataset}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(dataset, format, gzip, date_from, date_to, cursor, yield_per),
+        media_type="application/gzip" if gzip else FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
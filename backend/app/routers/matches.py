@@ -1,37 +1,53 @@
 # app/routers/matches.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.db import get_db
 from app.models.match_result import MatchRun, MatchResult
-from app.schemas.underwriting import PolicyEvaluation, RuleResult
+from app.schemas.underwriting import PolicyEvaluation
+from app.services.explain import ResultExplainer
+from app.services.result_payload import body_etag, etag_matches, render_evaluations, stored_etag, stored_payload
 
 router = APIRouter()
 
 @router.get("/by-run/{match_run_id}", response_model=List[PolicyEvaluation])
-def get_match_results(match_run_id: int, db: Session = Depends(get_db)):
+def get_match_results(match_run_id: int, request: Request, db: Session = Depends(get_db)):
+    # Completed runs are answered from the body stored when they completed
+    # (ETag'd); a matching If-None-Match costs one primary key lookup of
+    # the etag. A read never writes.
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etag = stored_etag(db, match_run_id)
+        if etag is not None and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    stored = stored_payload(db, match_run_id)
+    if stored is not None:
+        return Response(stored.body, media_type="application/json", headers={"ETag": stored.etag})
+
     mr = db.query(MatchRun).filter(MatchRun.id == match_run_id).first()
     if not mr:
         raise HTTPException(status_code=404, detail="Match run not found")
 
     results: list[MatchResult] = mr.results
 
-    evaluations: List[PolicyEvaluation] = []
-    for r in results:
-        rule_results = r.rule_results or {}
-        hard = [RuleResult(**rr) for rr in rule_results.get("hard", [])]
-        soft = [RuleResult(**rr) for rr in rule_results.get("soft", [])]
-
-        evaluations.append(
-            PolicyEvaluation(
-                lender_id=r.lender_id,
-                lender_program_id=r.lender_program_id,
-                eligible=r.eligible,
-                fit_score=r.fit_score,
-                hard_rule_results=hard,
-                soft_rule_results=soft,
-                reasons=r.reasons or [],
-            )
-        )
-    return evaluations
+    # unfinished runs, and runs completed before payloads existed, are
+    # rendered on every read
+    explainer = ResultExplainer(db)
+    explainer.preload(results)
+    body = render_evaluations([explainer.explain(r) for r in results])
+    if mr.status != "COMPLETE":
+        return Response(body, media_type="application/json")
+    etag = body_etag(body)
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+@router.get("/results/{match_result_id}/explain", response_model=PolicyEvaluation)
+def explain_match_result(match_result_id: int, db: Session = Depends(get_db)):
+    r = db.query(MatchResult).filter(MatchResult.id == match_result_id).first()
+    if not r:
+        raise HTTPException(status_code=404, detail="Match result not found")
+    return ResultExplainer(db).explain(r)
@@ -0,0 +1,19 @@
+# app/routers/metrics.py
+from fastapi import APIRouter
+
+from app.db import engine
+from app.db_metrics import query_metrics
+
+router = APIRouter()
+
+
+@router.get("/db")
+def db_metrics():
+    """Statements and DB time per route in this process, plus pool state."""
+    return {"pool": engine.pool.status(), "routes": query_metrics.snapshot()}
+
+
+@router.post("/db/reset")
+def reset_db_metrics():
+    query_metrics.reset()
+    return {"status": "ok"}
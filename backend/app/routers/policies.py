@@ -1,15 +1,26 @@
 # app/routers/policies.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 
-from app.db import get_db
-from app.models.lender_policy import Lender, LenderProgram, LenderPolicy
+from app.db import get_async_db, get_db
+from app.models.lender_policy import Lender, LenderProgram, LenderPolicy, PolicyRematch
 from app.schemas.lender_policy import (
     LenderCreate, LenderRead,
     LenderProgramCreate, LenderProgramRead,
     LenderPolicyCreate, LenderPolicyRead,
+    PolicyRematchRead,
 )
+from app.schemas.simulation import PolicySimulationRequest, PolicySimulationResult
+from app.services.pagination import (
+    DEFAULT_LIMIT, MAX_LIMIT, CountMode, count_rows, keyset_page, set_page_headers,
+)
+from app.services.policy_plan import plan_cache, policy_digest
+from app.services.catalog import policy_catalog
+from app.services.rematch import run_rematch_job
+from app.services.simulation import simulate_policy
 
 router = APIRouter()
 
@@ -17,28 +28,57 @@ router = APIRouter()
 def create_lender(lender: LenderCreate, db: Session = Depends(get_db)):
     obj = Lender(**lender.dict())
     db.add(obj)
+    policy_catalog.changed(db)
     db.commit()
     db.refresh(obj)
     return obj
 
 
 @router.get("/lenders", response_model=List[LenderRead])
-def list_lenders(db: Session = Depends(get_db)):
-    return db.query(Lender).all()
+async def list_lenders(
+    response: Response,
+    active: bool | None = None,
+    cursor: int | None = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    count: CountMode = "estimate",
+    db: AsyncSession = Depends(get_async_db),
+):
+    # paged by id like every list endpoint; see list_applications
+    stmt = select(Lender)
+    if active is not None:
+        stmt = stmt.where(Lender.active == active)
+    lenders, next_cursor = await keyset_page(db, stmt, Lender.id, cursor, limit)
+    total, estimated = await count_rows(db, stmt, count)
+    set_page_headers(response, next_cursor, total, estimated)
+    return lenders
 
 
 @router.post("/programs", response_model=LenderProgramRead)
 def create_program(program: LenderProgramCreate, db: Session = Depends(get_db)):
     obj = LenderProgram(**program.dict())
     db.add(obj)
+    policy_catalog.changed(db)
     db.commit()
     db.refresh(obj)
     return obj
 
 
 @router.get("/programs", response_model=List[LenderProgramRead])
-def list_programs(db: Session = Depends(get_db)):
-    return db.query(LenderProgram).all()
+async def list_programs(
+    response: Response,
+    lender_id: int | None = None,
+    cursor: int | None = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    count: CountMode = "estimate",
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(LenderProgram)
+    if lender_id is not None:
+        stmt = stmt.where(LenderProgram.lender_id == lender_id)
+    programs, next_cursor = await keyset_page(db, stmt, LenderProgram.id, cursor, limit)
+    total, estimated = await count_rows(db, stmt, count)
+    set_page_headers(response, next_cursor, total, estimated)
+    return programs
 
 
 @router.post("/", response_model=LenderPolicyRead)
@@ -50,14 +90,34 @@ def create_policy(policy: LenderPolicyCreate, db: Session = Depends(get_db)):
         policy_json=policy.policy_json.dict(),
     )
     db.add(obj)
+    policy_catalog.changed(db)
     db.commit()
     db.refresh(obj)
+    plan_cache.invalidate(obj.id)
     return obj
 
 
 @router.get("/", response_model=List[LenderPolicyRead])
-def list_policies(db: Session = Depends(get_db)):
-    objs = db.query(LenderPolicy).all()
+async def list_policies(
+    response: Response,
+    lender_id: int | None = None,
+    lender_program_id: int | None = None,
+    is_active: bool | None = None,
+    cursor: int | None = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    count: CountMode = "estimate",
+    db: AsyncSession = Depends(get_async_db),
+):
+    stmt = select(LenderPolicy)
+    if lender_id is not None:
+        stmt = stmt.join(LenderPolicy.program).where(LenderProgram.lender_id == lender_id)
+    if lender_program_id is not None:
+        stmt = stmt.where(LenderPolicy.lender_program_id == lender_program_id)
+    if is_active is not None:
+        stmt = stmt.where(LenderPolicy.is_active == is_active)
+    objs, next_cursor = await keyset_page(db, stmt, LenderPolicy.id, cursor, limit)
+    total, estimated = await count_rows(db, stmt, count)
+    set_page_headers(response, next_cursor, total, estimated)
     return [
         LenderPolicyRead(
             id=o.id,
@@ -70,21 +130,83 @@ def list_policies(db: Session = Depends(get_db)):
     ]
 
 
+@router.post("/simulate", response_model=PolicySimulationResult)
+def simulate(req: PolicySimulationRequest, db: Session = Depends(get_db)):
+    program = db.query(LenderProgram).filter(LenderProgram.id == req.lender_program_id).first()
+    if not program:
+        raise HTTPException(status_code=404, detail="Program not found")
+    return simulate_policy(
+        db,
+        req.lender_program_id,
+        req.policy_json.dict(),
+        since=req.since,
+        chunk_size=req.chunk_size,
+        workers=req.workers,
+    )
+
+
 @router.put("/{policy_id}", response_model=LenderPolicyRead)
-def update_policy(policy_id: int, policy: LenderPolicyCreate, db: Session = Depends(get_db)):
+def update_policy(
+    policy_id: int,
+    policy: LenderPolicyCreate,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    rematch: bool = False,
+    db: Session = Depends(get_db),
+):
     obj = db.query(LenderPolicy).filter(LenderPolicy.id == policy_id).first()
     if not obj:
         raise HTTPException(status_code=404, detail="Policy not found")
+    previous_policy_json = obj.policy_json
+    previous_version = obj.version
+    same_program = obj.lender_program_id == policy.lender_program_id
+    policy_json = policy.policy_json.dict()
+    # versions only move forward and new rules always get a new one, so
+    # an archived version (LenderPolicyVersion) keeps meaning the same rules
+    changed = policy_digest(policy_json) != policy_digest(previous_policy_json)
     obj.lender_program_id = policy.lender_program_id
-    obj.version = policy.version
+    obj.version = max(policy.version, previous_version + 1 if changed else previous_version)
     obj.is_active = policy.is_active
-    obj.policy_json = policy.policy_json.dict()
+    obj.policy_json = policy_json
+    job = None
+    if rematch and same_program:
+        # re-score stored applications whose outcome the change can flip;
+        # progress and report under GET /policies/rematches/{id}
+        job = PolicyRematch(
+            policy_id=policy_id,
+            lender_program_id=obj.lender_program_id,
+            from_version=previous_version,
+            to_version=obj.version,
+        )
+        db.add(job)
+    policy_catalog.changed(db)
     db.commit()
     db.refresh(obj)
+    plan_cache.invalidate(policy_id)
+    if job is not None:
+        response.headers["X-Rematch-Id"] = str(job.id)
+        background_tasks.add_task(run_rematch_job, job.id, policy_id)
     return obj
 
+
+@router.get("/{policy_id}/rematches", response_model=List[PolicyRematchRead])
+async def list_rematches(policy_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Re-matches of a policy, newest first."""
+    stmt = select(PolicyRematch).where(PolicyRematch.policy_id == policy_id).order_by(PolicyRematch.id.desc())
+    return (await db.scalars(stmt)).all()
+
+
+@router.get("/rematches/{rematch_id}", response_model=PolicyRematchRead)
+async def get_rematch(rematch_id: int, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(PolicyRematch, rematch_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Rematch not found")
+    return job
+
 @router.delete("/all")
 def delete_all_policies(db: Session = Depends(get_db)):
     db.query(LenderPolicy).delete()
+    policy_catalog.changed(db)
     db.commit()
+    plan_cache.invalidate()
     return {"status": "ok", "message": "All policies deleted"}
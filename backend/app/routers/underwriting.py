@@ -1,24 +1,175 @@
 # app/routers/underwriting.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List
 
-from app.db import get_db
-from app.services.underwriting import run_underwriting
-from app.models.match_result import MatchRun
-from app.schemas.underwriting import MatchRunRead
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.db import SessionLocal, get_async_db
+from app.services.batch_underwriting import stream_batch
+from app.services.result_cache import result_cache
+from app.models.loan_request import LoanRequest
+from app.models.match_result import MatchRun, MatchResult
+from app.schemas.match_result import MatchResultRead
+from app.schemas.underwriting import MatchRunRead, MatchRunSummary, BatchUnderwritingRequest
+from app.services.explain import ResultExplainer
+from app.services.pagination import (
+    DEFAULT_LIMIT, MAX_LIMIT, CountMode, count_rows, keyset_page, set_page_headers,
+)
 
 router = APIRouter()
 
+
+def _expand_results(results: List[MatchResult]) -> List[MatchResultRead]:
+    """
+    Compact and summary rule_results expanded to the verbose shape. Loading
+    the policy versions compiles them and expansion is pure CPU, so this
+    runs in the threadpool on a sync session of its own, off the event loop.
+    """
+    db = SessionLocal()
+    try:
+        explainer = ResultExplainer(db)
+        explainer.preload(results)
+        return [
+            MatchResultRead(
+                id=r.id,
+                match_run_id=r.match_run_id,
+                lender_id=r.lender_id,
+                lender_program_id=r.lender_program_id,
+                eligible=r.eligible,
+                fit_score=r.fit_score,
+                reasons=r.reasons,
+                rule_results=explainer.stored_detail(r),
+            )
+            for r in results
+        ]
+    finally:
+        db.close()
+
+
+async def _run_read(mr: MatchRun) -> MatchRunRead:
+    """MatchRunRead of a run whose results are loaded."""
+    results = await run_in_threadpool(_expand_results, list(mr.results))
+    return MatchRunRead(
+        id=mr.id,
+        loan_request_id=mr.loan_request_id,
+        status=mr.status,
+        error=mr.error,
+        created_at=mr.created_at,
+        completed_at=mr.completed_at,
+        results=results,
+    )
+
+
 @router.post("/run/{loan_request_id}", response_model=MatchRunRead)
-def initiate_underwriting(loan_request_id: int, db: Session = Depends(get_db)):
-    # In a Hatchet world, this would enqueue a workflow and return run id
-    match_run = run_underwriting(db, loan_request_id)
-    return match_run
+async def initiate_underwriting(loan_request_id: int, explain: bool = True, db: AsyncSession = Depends(get_async_db)):
+    # Returns the PENDING run at once; a worker process (python -m app.worker)
+    # executes it. Poll GET /runs/{id} until COMPLETE or FAILED.
+    if await db.scalar(select(LoanRequest.id).where(LoanRequest.id == loan_request_id)) is None:
+        raise HTTPException(status_code=404, detail="Loan request not found")
+    match_run = MatchRun(loan_request_id=loan_request_id, status="PENDING", explain=explain)
+    db.add(match_run)
+    await db.commit()
+    # no results yet; answered without touching the lazy relationship
+    return MatchRunRead(
+        id=match_run.id, loan_request_id=loan_request_id, status=match_run.status, created_at=match_run.created_at
+    )
 
 
 @router.get("/runs/{match_run_id}", response_model=MatchRunRead)
-def get_run(match_run_id: int, db: Session = Depends(get_db)):
-    mr = db.query(MatchRun).filter(MatchRun.id == match_run_id).first()
+async def get_run(match_run_id: int, db: AsyncSession = Depends(get_async_db)):
+    mr = await db.scalar(
+        select(MatchRun).where(MatchRun.id == match_run_id).options(selectinload(MatchRun.results))
+    )
     if not mr:
         raise HTTPException(status_code=404, detail="Match run not found")
-    return mr
+    return await _run_read(mr)
+
+
+@router.get("/applications/{loan_request_id}/latest-run", response_model=MatchRunRead)
+async def get_latest_run(loan_request_id: int, status: str = "COMPLETE", db: AsyncSession = Depends(get_async_db)):
+    """
+    Most recent run of an application in `status` (COMPLETE by default,
+    most recently completed first). One seek on
+    ix_match_runs_loan_request_status_completed, then its results.
+    """
+    stmt = select(MatchRun).where(MatchRun.loan_request_id == loan_request_id, MatchRun.status == status)
+    if status == "COMPLETE":
+        stmt = stmt.order_by(MatchRun.completed_at.desc(), MatchRun.id.desc())
+    else:
+        stmt = stmt.order_by(MatchRun.id.desc())
+    mr = await db.scalar(stmt.limit(1).options(selectinload(MatchRun.results)))
+    if not mr:
+        raise HTTPException(status_code=404, detail="No match run found")
+    return await _run_read(mr)
+
+
+@router.get("/runs", response_model=List[MatchRunSummary])
+async def list_runs(
+    response: Response,
+    lender_id: int | None = None,
+    eligible: bool | None = None,
+    completed_from: datetime | None = None,
+    completed_to: datetime | None = None,
+    status: str | None = None,
+    cursor: int | None = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    count: CountMode = "none",
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Run history, newest first and paged like the list endpoints
+    (X-Next-Cursor / X-Total-Count).
+    - lender_id: runs with a result for that lender (eligible narrows it
+      to runs the lender came back eligible / ineligible in)
+    - completed_from / completed_to: completed_at window, inclusive
+    The window is read off ix_match_runs_completed_at and each run is
+    checked against ix_match_results_run_lender, so the result table is
+    never scanned.
+    """
+    stmt = select(MatchRun)
+    if completed_from:
+        stmt = stmt.where(MatchRun.completed_at >= completed_from)
+    if completed_to:
+        stmt = stmt.where(MatchRun.completed_at <= completed_to)
+    if status:
+        stmt = stmt.where(MatchRun.status == status)
+    if lender_id is not None:
+        lender_results = select(MatchResult.id).where(
+            MatchResult.match_run_id == MatchRun.id, MatchResult.lender_id == lender_id
+        )
+        if eligible is not None:
+            lender_results = lender_results.where(MatchResult.eligible == eligible)
+        stmt = stmt.where(lender_results.exists())
+
+    runs, next_cursor = await keyset_page(db, stmt, MatchRun.id, cursor, limit, descending=True)
+    total, estimated = await count_rows(db, stmt, count)
+    set_page_headers(response, next_cursor, total, estimated)
+    return runs
+
+
+@router.post("/batch")
+def batch_underwriting(request: BatchUnderwritingRequest):
+    """
+    Underwrite many applications in this request, streamed as NDJSON: one
+    line per loan_request_id with its match_run_id, status and per-program
+    eligibility / fit score, in request order.
+
+    Evaluation is CPU-bound, so this stays sync on the sync engine: the
+    body is produced in the threadpool, off the event loop.
+    """
+    if request.loan_request_ids is None and not (request.created_from or request.created_to):
+        raise HTTPException(status_code=400, detail="Provide loan_request_ids or a created_from/created_to range")
+    if request.chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+    return StreamingResponse(stream_batch(request), media_type="application/x-ndjson")
+
+
+@router.get("/cache")
+def result_cache_stats():
+    # this process only; queued runs are cached in each worker process
+    return result_cache.stats()
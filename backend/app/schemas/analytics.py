@@ -0,0 +1,21 @@
+# app/schemas/analytics.py
+from pydantic import BaseModel
+from datetime import date
+
+
+class ApprovalStats(BaseModel):
+    lender_id: int
+    lender_program_id: int | None = None  # None when grouped per lender
+    day: date | None = None               # set by the daily series only
+    evaluated: int
+    eligible: int
+    approval_rate: float
+    avg_fit_score: float | None = None
+
+
+class RuleFailureStats(BaseModel):
+    lender_id: int
+    lender_program_id: int
+    rule_id: str
+    failures: int
+    failure_rate: float  # of the program's explained results in the period
@@ -1,5 +1,6 @@
 # app/schemas/lender_policy.py
 from pydantic import BaseModel
+from datetime import datetime
 from typing import Any, Literal, List, Optional
 
 RuleSeverity = Literal["HARD", "SOFT"]
@@ -86,3 +87,22 @@ class LenderPolicyRead(LenderPolicyBase):
 
     class Config:
         orm_mode = True
+
+
+class PolicyRematchRead(BaseModel):
+    id: int
+    policy_id: int
+    lender_program_id: int
+    from_version: int
+    to_version: int
+    status: str
+    examined: int
+    skipped: int
+    reevaluated: int
+    flipped: int
+    error: str | None = None
+    created_at: datetime
+    completed_at: datetime | None = None
+
+    class Config:
+        orm_mode = True
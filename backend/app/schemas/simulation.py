@@ -0,0 +1,33 @@
+# app/schemas/simulation.py
+from pydantic import BaseModel, Field
+from typing import Dict, List
+from datetime import date
+
+from app.schemas.lender_policy import PolicyJson
+
+
+class PolicySimulationRequest(BaseModel):
+    lender_program_id: int
+    policy_json: PolicyJson
+    since: date | None = None  # defaults to one year back
+    chunk_size: int = Field(1000, ge=1, le=10_000)
+    workers: int | None = Field(None, ge=1, le=32)  # defaults to the CPU count
+
+
+class RuleChangeCount(BaseModel):
+    rule_id: str
+    count: int
+
+
+class PolicySimulationResult(BaseModel):
+    lender_program_id: int
+    baseline_policy_id: int | None
+    since: date
+    examined: int
+    baseline_approved: int
+    candidate_approved: int
+    newly_approved: int
+    newly_declined: int
+    baseline_score_histogram: Dict[str, int]
+    candidate_score_histogram: Dict[str, int]
+    top_changed_rules: List[RuleChangeCount]
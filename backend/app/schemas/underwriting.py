@@ -1,6 +1,7 @@
 # app/schemas/underwriting.py
 from pydantic import BaseModel
 from typing import List, Any
+from datetime import date, datetime
 
 from app.schemas.match_result import MatchResultRead
 
@@ -24,10 +25,25 @@ class PolicyEvaluation(BaseModel):
     reasons: List[str]
 
 
-class MatchRunRead(BaseModel):
+class MatchRunSummary(BaseModel):
     id: int
     loan_request_id: int
     status: str
-    results: List[MatchResultRead] = []
+    error: str | None = None
+    created_at: datetime | None = None
+    completed_at: datetime | None = None
     class Config:
         orm_mode = True
+
+
+class MatchRunRead(MatchRunSummary):
+    results: List[MatchResultRead] = []
+
+
+class BatchUnderwritingRequest(BaseModel):
+    # either explicit ids, or every loan request created in [created_from, created_to]
+    loan_request_ids: List[int] | None = None
+    created_from: date | None = None
+    created_to: date | None = None
+    explain: bool = True
+    chunk_size: int = 200
@@ -0,0 +1,182 @@
+# app/services/analytics.py
+import argparse
+import json
+from datetime import date, datetime
+from itertools import chain
+from typing import Any, Dict, List, Mapping, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models.analytics import ProgramDailyStats, RuleDailyFailures
+from app.models.match_result import MatchResult, MatchRun
+from app.services.explain import all_plans, is_compact, is_summary, plan_matches, policy_version
+from app.services.policy_plan import CompiledPolicy
+
+# Approval and rule-failure counts per program and day, kept current by the
+# code that writes match_results (same transaction) so /analytics reads a
+# few small rows instead of every result. A result counts on the day its
+# run completed. Rule failures are counted only from results that record
+# every failure (not explain=False summaries, which stop at the deciding
+# ones), and `explained` counts those results, so failure rates don't
+# depend on the mix of explain modes.
+
+PROGRAM_COUNTERS = ("evaluated", "eligible", "score_total", "scored", "explained")
+RULE_COUNTERS = ("failures",)
+
+
+def failed_rule_ids(rule_results: Dict[str, Any] | None, plan: CompiledPolicy | None) -> List[str]:
+    """
+    Ids of the failed rules of a stored result. Summary rows (explain=False)
+    only record the failures that decided the outcome.
+    """
+    if is_compact(rule_results):
+        if not plan_matches(plan, rule_results):
+            return []
+        bits = int(rule_results["bitmap"], 16)
+        return [r.id for r in plan.rules if (bits >> r.slot) & 1]
+    if is_summary(rule_results):
+        if not plan_matches(plan, rule_results):
+            return []
+        return [plan.rules[slot].id for slot in rule_results["failed"] if slot < len(plan.rules)]
+    rule_results = rule_results or {}
+    return [
+        r["rule_id"]
+        for r in chain(rule_results.get("hard", []), rule_results.get("soft", []))
+        if not r["passed"]
+    ]
+
+
+class AggregateDeltas:
+    """
+    Changes to the aggregate tables, summed in memory so that a run (or a
+    batch chunk) costs one upsert per table. flush() writes them in the
+    caller's transaction.
+    """
+
+    def __init__(self):
+        self.programs: Dict[Tuple[date, int], List] = {}
+        self.rules: Dict[Tuple[date, int, str], List] = {}
+
+    def add(self, day: date, row: Mapping[str, Any], plan: CompiledPolicy | None) -> None:
+        """Count a MatchResult row (column values) on `day`."""
+        lender_id, program_id = row["lender_id"], row["lender_program_id"]
+        p = self.programs.setdefault((day, program_id), [lender_id, 0, 0, 0.0, 0, 0])
+        p[1] += 1
+        if row["eligible"]:
+            p[2] += 1
+        if row["fit_score"] is not None:
+            p[3] += row["fit_score"]
+            p[4] += 1
+        if is_summary(row["rule_results"]):
+            return
+        p[5] += 1
+        for rule_id in failed_rule_ids(row["rule_results"], plan):
+            r = self.rules.setdefault((day, program_id, rule_id), [lender_id, 0])
+            r[1] += 1
+
+    def flush(self, db: Session) -> None:
+        _upsert(db, ProgramDailyStats, [
+            dict(day=day, lender_program_id=program_id, lender_id=v[0],
+                 evaluated=v[1], eligible=v[2], score_total=v[3], scored=v[4], explained=v[5])
+            for (day, program_id), v in self.programs.items()
+            if any(v[1:])
+        ], PROGRAM_COUNTERS)
+        _upsert(db, RuleDailyFailures, [
+            dict(day=day, lender_program_id=program_id, rule_id=rule_id, lender_id=v[0], failures=v[1])
+            for (day, program_id, rule_id), v in self.rules.items()
+            if v[1]
+        ], RULE_COUNTERS)
+        self.programs.clear()
+        self.rules.clear()
+
+
+def _upsert(db: Session, model, rows: List[Dict[str, Any]], counters: Tuple[str, ...]) -> None:
+    """INSERT ... ON CONFLICT DO UPDATE adding to the counters: safe between concurrent writers."""
+    if not rows:
+        return
+    table = model.__table__
+    insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[c.name for c in table.primary_key],
+        set_={c: table.c[c] + stmt.excluded[c] for c in counters},
+    )
+    db.execute(stmt, rows)
+
+
+def record_results(db: Session, rows: List[Dict[str, Any]], plans: List[CompiledPolicy], day: date | None = None) -> None:
+    """Count freshly evaluated rows, one per plan of their policy set (see evaluate_policies)."""
+    day = day or datetime.utcnow().date()
+    deltas = AggregateDeltas()
+    for row, plan in zip(rows, plans):
+        deltas.add(day, row, plan)
+    deltas.flush(db)
+
+
+def rebuild(db: Session, yield_per: int = 5000) -> Dict[str, int]:
+    """
+    Recompute both tables from match_results of COMPLETE runs in one
+    transaction. Stop the underwriting workers first: results committed
+    while this runs may be counted twice or not at all.
+    """
+    plans = all_plans(db)
+
+    db.execute(delete(ProgramDailyStats))
+    db.execute(delete(RuleDailyFailures))
+
+    finished = func.coalesce(MatchRun.completed_at, MatchRun.created_at)
+    stmt = (
+        select(
+            MatchResult.lender_id,
+            MatchResult.lender_program_id,
+            MatchResult.eligible,
+            MatchResult.fit_score,
+            MatchResult.rule_results,
+            finished.label("finished"),
+        )
+        .join(MatchRun, MatchRun.id == MatchResult.match_run_id)
+        .where(MatchRun.status == "COMPLETE")
+        .execution_options(yield_per=yield_per)
+    )
+
+    deltas = AggregateDeltas()
+    counted = skipped = 0
+    for row in db.execute(stmt):
+        m = row._mapping
+        if m["finished"] is None:
+            skipped += 1
+            continue
+        deltas.add(m["finished"].date(), m, plans.get(policy_version(m["rule_results"])))
+        counted += 1
+
+    report = {"results": counted, "skipped": skipped, "program_days": len(deltas.programs), "rule_days": len(deltas.rules)}
+    deltas.flush(db)
+    db.commit()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the analytics aggregates from match_results")
+    parser.add_argument("--yield-per", type=int, default=5000, help="result rows fetched per round trip")
+    args = parser.parse_args()
+
+    # run standalone: every mapper the relationships name must be loaded
+    import app.models.borrower, app.models.guarantor, app.models.business_credit, app.models.loan_request  # noqa: F401
+
+    db = SessionLocal()
+    try:
+        report = rebuild(db, args.yield_per)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+
+
+# ----------------------------------------------------
+# RUN DIRECTLY: python -m app.services.analytics
+# ----------------------------------------------------
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# app/services/batch_engine.py
+from dataclasses import dataclass
+from numbers import Number
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from app.services.policy_engine import ApplicationProfile
+from app.services.field_paths import compile_field
+from app.services.policy_plan import CompiledGroup, CompiledPolicy, CompiledRule
+
+
+@dataclass
+class Column:
+    """
+    One field across a block of applications.
+    Numeric fields are float64 with `present` marking non-None entries
+    (NaN is a value, as in the scalar comparators, not a missing entry);
+    anything else is kept as an object array and evaluated per element.
+    """
+    values: np.ndarray
+    present: np.ndarray
+    numeric: bool
+
+
+class ApplicationBlock:
+    """
+    Columnar view of many applications, keyed by rule field path
+    (e.g. 'guarantors[0].fico_score', 'borrower.years_in_business').
+    """
+
+    def __init__(self, size: int, columns: Dict[str, Column]):
+        self.size = size
+        self.columns = columns
+
+    @classmethod
+    def from_columns(cls, data: Dict[str, Sequence[Any]]) -> "ApplicationBlock":
+        """
+        Build from raw arrays/lists. None marks a missing value; NaN is
+        compared like any float, as evaluate_plan does (it passes MIN_VALUE
+        and MAX_VALUE, fails RANGE).
+        """
+        sizes = {len(v) for v in data.values()}
+        if len(sizes) > 1:
+            raise ValueError("All columns in a block must have the same length")
+        size = sizes.pop() if sizes else 0
+        return cls(size, {f: _to_column(v) for f, v in data.items()})
+
+    @classmethod
+    def from_profiles(
+        cls,
+        profiles: Sequence[ApplicationProfile],
+        fields: Iterable[str | None],
+    ) -> "ApplicationBlock":
+        columns: Dict[str, Column] = {}
+        for f in set(fields):
+            if f is None:
+                continue
+            get = compile_field(f)
+            columns[f] = _to_column([get(a) for a in profiles])
+        return cls(len(profiles), columns)
+
+    def column(self, field: str | None) -> Column:
+        col = self.columns.get(field) if field is not None else None
+        if col is None:
+            # field not supplied -> every application resolves to None
+            return Column(
+                values=np.full(self.size, np.nan),
+                present=np.zeros(self.size, dtype=bool),
+                numeric=True,
+            )
+        return col
+
+
+@dataclass
+class BatchEvaluation:
+    """
+    `passed[i, j]` is the outcome of plan.rules[i] for application j.
+    Soft rule rows are only meaningful where `hard_fail` is False, since
+    the scalar engine doesn't evaluate soft rules after a hard failure.
+    `fit_score` is NaN where the scalar engine returns None.
+    """
+    passed: np.ndarray
+    hard_fail: np.ndarray
+    fit_score: np.ndarray
+    eligible: np.ndarray
+
+    def scores(self) -> List[float | None]:
+        return [None if np.isnan(s) else float(s) for s in self.fit_score]
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, Number) and not isinstance(v, complex)
+
+
+def _to_column(values: Sequence[Any]) -> Column:
+    if isinstance(values, np.ndarray) and values.dtype.kind in "biuf":
+        arr = values.astype(np.float64)
+        return Column(values=arr, present=np.ones(len(arr), dtype=bool), numeric=True)
+
+    values = list(values)
+    present = np.array([v is not None for v in values], dtype=bool)
+    if all(v is None or _is_number(v) for v in values):
+        # None becomes NaN in `values` but stays absent in `present`
+        arr = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+        return Column(values=arr, present=present, numeric=True)
+
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return Column(values=arr, present=present, numeric=False)
+
+
+def _eval_rule(rule: CompiledRule, block: ApplicationBlock) -> np.ndarray:
+    if not rule.known:
+        return np.zeros(block.size, dtype=bool)
+
+    col = block.column(rule.field)
+    if not col.numeric:
+        # mixed / string data: fall back to the compiled scalar comparator
+        return np.fromiter((rule.check(v) for v in col.values), dtype=bool, count=block.size)
+
+    v, present = col.values, col.present
+    p = rule.params
+
+    if rule.type == "MIN_VALUE":
+        return present & ~(v < p["min"])
+    if rule.type == "MAX_VALUE":
+        return present & ~(v > p["max"])
+    if rule.type == "RANGE":
+        return present & (v >= p["min"]) & (v <= p["max"])
+    if rule.type == "BOOLEAN_IS_TRUE":
+        return present & (v != 0)
+    if rule.type in ("IN_SET", "NOT_IN_SET"):
+        members = p["allowed"] if rule.type == "IN_SET" else p["blocked"]
+        # non-numeric members can never equal a numeric value
+        nums = [float(m) for m in members if m is not None and _is_number(m)]
+        hit = present & np.isin(v, nums)
+        if any(m is None for m in members):
+            hit |= ~present
+        return hit if rule.type == "IN_SET" else ~hit
+
+    return np.fromiter((rule.check(x if ok else None) for x, ok in zip(v, present)), dtype=bool, count=block.size)
+
+
+def _group_mask(group: CompiledGroup, passed: np.ndarray) -> np.ndarray:
+    """Per application, whether `group` holds: policy_plan.group_holds over the block."""
+    outcomes = [passed[r.slot] for r in group.rules if r.severity == "HARD"]
+    outcomes += [_group_mask(g, passed) for g in group.groups if g.has_hard]
+    if not outcomes:
+        return np.ones(passed.shape[1], dtype=bool)
+    stacked = np.vstack(outcomes)
+    return stacked.any(axis=0) if group.logic == "ANY" else stacked.all(axis=0)
+
+
+def evaluate_policy_batch(plan: CompiledPolicy, block: ApplicationBlock) -> BatchEvaluation:
+    """
+    Array counterpart of evaluate_plan: one pass per rule over the whole
+    block instead of one call per rule per application.
+    """
+    n = block.size
+    passed = np.empty((len(plan.rules), n), dtype=bool)
+    for rule in plan.rules:
+        passed[rule.slot] = _eval_rule(rule, block)
+
+    hard_fail = ~_group_mask(plan.hard_rules, passed)
+
+    if plan.soft_rules:
+        # _compute_score looks rules up by id, last one wins
+        last_slot = {r.id: r.slot for r in plan.soft_rules.all_rules()}
+        score = np.full(n, plan.base_score, dtype=np.float64)
+        for rid, pts in plan.deductions:
+            slot = last_slot.get(rid)
+            if slot is not None:
+                score = np.where(passed[slot], score, score - pts)
+        score = np.maximum(score, 0.0)
+    else:
+        # no soft rules, treat as full score
+        score = np.full(n, 100.0)
+
+    score = np.where(hard_fail, np.nan, score)
+    eligible = ~hard_fail & (score >= plan.min_accept_score)
+
+    return BatchEvaluation(passed=passed, hard_fail=hard_fail, fit_score=score, eligible=eligible)
+
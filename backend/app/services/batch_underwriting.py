@@ -0,0 +1,134 @@
+# app/services/batch_underwriting.py
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models.loan_request import LoanRequest
+from app.models.match_result import MatchRun
+from app.schemas.underwriting import BatchUnderwritingRequest
+from app.services.catalog import policy_catalog
+from app.services.underwriting import evaluate_application, load_application_batch, save_results
+from app.services.result_payload import payload_row, render_rows, save_payloads
+from app.services.analytics import AggregateDeltas
+
+ERROR_MAX_LENGTH = 500
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_loan_request_ids(db: Session, request: BatchUnderwritingRequest) -> List[int]:
+    """The explicit ids in request order (deduplicated), else the ids matching the date range."""
+    if request.loan_request_ids is not None:
+        return list(dict.fromkeys(request.loan_request_ids))
+
+    q = db.query(LoanRequest.id)
+    if request.created_from:
+        q = q.filter(LoanRequest.created_at >= request.created_from)
+    if request.created_to:
+        q = q.filter(LoanRequest.created_at <= request.created_to)
+    return [row.id for row in q.order_by(LoanRequest.id)]
+
+
+def run_batch(
+    db: Session,
+    loan_request_ids: List[int],
+    explain: bool = True,
+    chunk_size: int = 200,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Underwrite many applications against one load of the active policies,
+    yielding a line per application. Each chunk of applications is loaded
+    together and its MatchRuns and MatchResults are committed in one
+    transaction; the chunk's lines are yielded only once that commit has
+    succeeded, so every run id a client receives exists. If the commit
+    fails, the chunk's applications are reported FAILED without a run.
+
+    Runs are inserted as COMPLETE since no one sees them before the chunk
+    commits; only the rare failure costs an UPDATE.
+    """
+    policy_set = policy_catalog.get(db)
+
+    for start in range(0, len(loan_request_ids), chunk_size):
+        chunk = loan_request_ids[start:start + chunk_size]
+        models = load_application_batch(db, chunk)
+
+        # a chunk takes seconds; its runs share one start/completion time
+        now = datetime.utcnow()
+        runs = {
+            lr_id: MatchRun(
+                loan_request_id=lr_id, status="COMPLETE", explain=explain, attempts=1,
+                created_at=now, started_at=now, completed_at=now,
+            )
+            for lr_id in models
+        }
+        db.add_all(runs.values())
+        db.flush()  # run ids, one batched INSERT
+
+        rows: List[Dict[str, Any]] = []
+        payloads: List[Dict[str, Any]] = []
+        deltas = AggregateDeltas()
+        lines: List[Dict[str, Any]] = []
+
+        for lr_id in chunk:
+            run = runs.get(lr_id)
+            if run is None:
+                lines.append({"loan_request_id": lr_id, "match_run_id": None, "status": "FAILED", "error": "Loan request not found"})
+                continue
+            try:
+                results = evaluate_application(policy_set, run.id, *models[lr_id], explain=explain)
+            except Exception as e:
+                run.status = "FAILED"
+                run.completed_at = None
+                run.error = f"{type(e).__name__}: {e}"[:ERROR_MAX_LENGTH]
+                lines.append({"loan_request_id": lr_id, "match_run_id": run.id, "status": "FAILED", "error": run.error})
+                continue
+
+            rows.extend(results)
+            for row, plan in zip(results, policy_set.plans):
+                deltas.add(now.date(), row, plan)
+            payloads.append(payload_row(run.id, render_rows(results, policy_set.plans)))
+            lines.append({
+                "loan_request_id": lr_id,
+                "match_run_id": run.id,
+                "status": "COMPLETE",
+                "results": [
+                    {
+                        "lender_id": r["lender_id"],
+                        "lender_program_id": r["lender_program_id"],
+                        "eligible": r["eligible"],
+                        "fit_score": r["fit_score"],
+                    }
+                    for r in results
+                ],
+            })
+
+        try:
+            save_results(db, rows)
+            save_payloads(db, payloads)
+            deltas.flush(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception("Batch chunk of %d application(s) failed to commit", len(chunk))
+            error = f"{type(e).__name__}: {e}"[:ERROR_MAX_LENGTH]
+            lines = [
+                {"loan_request_id": line["loan_request_id"], "match_run_id": None, "status": "FAILED", "error": error}
+                for line in lines
+            ]
+        db.expunge_all()
+        yield from lines
+
+
+def stream_batch(request: BatchUnderwritingRequest) -> Iterator[str]:
+    """NDJSON lines for a StreamingResponse; owns its session, like background jobs."""
+    db = SessionLocal()
+    try:
+        ids = resolve_loan_request_ids(db, request)
+        for line in run_batch(db, ids, explain=request.explain, chunk_size=request.chunk_size):
+            yield json.dumps(line) + "\n"
+    finally:
+        db.close()
@@ -0,0 +1,114 @@
+# app/services/catalog.py
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, List
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session, contains_eager
+
+from app.models.lender_policy import Lender, LenderPolicy, LenderProgram, PolicyCatalogState
+from app.services.field_paths import ProfileLayout
+from app.services.policy_plan import CompiledPolicy, plan_cache, shared_layout
+from app.services.program_index import ProgramIndex
+from app.services.threshold_index import ThresholdIndex, shared_index
+
+
+@dataclass(frozen=True)
+class ActivePolicy:
+    """The columns of an active LenderPolicy a run needs, detached from the session."""
+    id: int
+    version: int
+    lender_id: int
+    lender_program_id: int
+
+
+@dataclass
+class ActivePolicySet:
+    """
+    The active policies of active lenders, compiled and indexed for
+    evaluation, as of one catalog generation. Never modified once built.
+    """
+    generation: int
+    policies: List[ActivePolicy]     # in program order
+    plans: List[CompiledPolicy]      # bound to layout
+    sources: List[Dict[str, Any]]    # policy_json, to rebuild plans elsewhere
+    layout: ProfileLayout
+    thresholds: ThresholdIndex
+    programs: ProgramIndex           # ranges of the programs above
+
+
+def load_active_policies(db: Session, generation: int) -> ActivePolicySet:
+    """Policies, their programs and lenders in one query."""
+    rows: List[LenderPolicy] = (
+        db.query(LenderPolicy)
+        .join(LenderPolicy.program)
+        .join(LenderProgram.lender)
+        .filter(Lender.active == True)
+        .filter(LenderPolicy.is_active == True)
+        .options(contains_eager(LenderPolicy.program))
+        .order_by(LenderPolicy.lender_program_id, LenderPolicy.id)
+        .all()
+    )
+
+    plans = [(p.id, plan_cache.get(p)) for p in rows]
+    # applications are packed down to the fields these policies reference
+    layout, bound = shared_layout([plan for _, plan in plans])
+    return ActivePolicySet(
+        generation=generation,
+        policies=[
+            ActivePolicy(p.id, p.version, p.program.lender_id, p.lender_program_id)
+            for p in rows
+        ],
+        plans=bound,
+        sources=[p.policy_json for p in rows],
+        layout=layout,
+        # one bisect per field finds the programs a MIN/MAX threshold rejects
+        thresholds=shared_index(plans),
+        programs=ProgramIndex({p.program.id: p.program for p in rows}.values()),
+    )
+
+
+class PolicyCatalog:
+    """
+    Process-wide ActivePolicySet. Every write to lenders, programs or
+    policies calls changed(), which bumps the generation stored in
+    policy_catalog_state. get() reads only that row and reloads the
+    catalog (one query) when its generation differs from the one in memory,
+    so API processes and underwriting workers alike pick up a change on
+    their next run. The new set is built aside and swapped in whole.
+    """
+
+    def __init__(self):
+        self._current: ActivePolicySet | None = None
+        self._lock = Lock()
+
+    def get(self, db: Session) -> ActivePolicySet:
+        generation = _stored_generation(db)
+        current = self._current
+        if current is None or current.generation != generation:
+            with self._lock:
+                current = self._current
+                if current is None or current.generation != generation:
+                    current = load_active_policies(db, generation)
+                    self._current = current
+        return current
+
+    def changed(self, db: Session) -> None:
+        """
+        Bump the generation in the caller's transaction, so it commits
+        together with the change; every process reloads on its next get().
+        """
+        bumped = db.execute(
+            update(PolicyCatalogState)
+            .where(PolicyCatalogState.id == 1)
+            .values(generation=PolicyCatalogState.generation + 1)
+        ).rowcount
+        if not bumped:
+            db.add(PolicyCatalogState(id=1, generation=1))
+
+
+def _stored_generation(db: Session) -> int:
+    return db.query(PolicyCatalogState.generation).filter(PolicyCatalogState.id == 1).scalar() or 0
+
+
+policy_catalog = PolicyCatalog()
@@ -0,0 +1,160 @@
+# app/services/derived_features.py
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+# Features read their inputs by item access, so the same function works on
+# ORM rows (wrapped in _Row) and on the dicts of an ApplicationProfile.
+Inputs = Mapping[str, Any]
+
+
+@dataclass(frozen=True)
+class DerivedFeature:
+    name: str
+    depends: Tuple[str, ...]
+    fn: Callable[["FeatureInputs", "DerivedFeatures"], Any]
+
+
+FEATURES: Dict[str, DerivedFeature] = {}
+
+
+def derived_feature(name: str, depends: Tuple[str, ...] = ()):
+    """
+    Register a `derived.<name>` feature. `fn(inputs, derived)` may read the
+    features listed in `depends` from `derived`; they have to be registered
+    first, which also rules out cycles.
+    """
+    def register(fn):
+        missing = [d for d in depends if d not in FEATURES]
+        if missing:
+            raise ValueError(f"Derived feature {name} depends on unregistered {missing}")
+        FEATURES[name] = DerivedFeature(name, tuple(depends), fn)
+        return fn
+    return register
+
+
+@dataclass(frozen=True)
+class FeatureInputs:
+    loan_request: Inputs
+    borrower: Inputs
+    guarantors: List[Inputs]
+    business_credit: Inputs | None
+
+
+class _Row:
+    """Item access over an ORM row."""
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __getitem__(self, name: str) -> Any:
+        return getattr(self.obj, name)
+
+
+class DerivedFeatures(dict):
+    """
+    The `derived` namespace of one application. A registered feature is
+    computed the first time it is read, after its dependencies, and kept in
+    the dict; features no policy reads are never computed. Unregistered
+    names read as None, like any missing field.
+    """
+
+    def __init__(self, inputs: FeatureInputs):
+        super().__init__()
+        self.inputs = inputs
+
+    @classmethod
+    def from_models(cls, lr, borrower, guarantors, bc) -> "DerivedFeatures":
+        return cls(FeatureInputs(
+            loan_request=_Row(lr),
+            borrower=_Row(borrower),
+            guarantors=[_Row(g) for g in guarantors],
+            business_credit=_Row(bc) if bc is not None else None,
+        ))
+
+    def __missing__(self, name: str) -> Any:
+        feature = FEATURES.get(name)
+        if feature is None:
+            raise KeyError(name)
+        for dep in feature.depends:
+            self[dep]
+        value = feature.fn(self.inputs, self)
+        self[name] = value
+        return value
+
+    def get(self, name: str, default: Any = None) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def __reduce__(self):
+        # profiles are shipped to worker processes; computed values go along
+        return (DerivedFeatures, (self.inputs,), None, None, iter(self.items()))
+
+
+def _ratio(num, den):
+    if num is None or not den:
+        return None
+    return num / den
+
+
+def _ficos(inputs: FeatureInputs) -> List[int]:
+    return [g["fico_score"] for g in inputs.guarantors if g["fico_score"] is not None]
+
+
+# ---------------------------------------------------------------------------
+# Registered features
+# ---------------------------------------------------------------------------
+
+@derived_feature("equipment_age")
+def equipment_age(inputs, derived):
+    year = inputs.loan_request["equipment_year"]
+    return date.today().year - year if year else None
+
+
+@derived_feature("equipment_age_at_maturity", depends=("equipment_age",))
+def equipment_age_at_maturity(inputs, derived):
+    age = derived["equipment_age"]
+    if age is None:
+        return None
+    return age + inputs.loan_request["term_months"] / 12
+
+
+@derived_feature("primary_fico")
+def primary_fico(inputs, derived):
+    gs = inputs.guarantors
+    return gs[0]["fico_score"] if gs and gs[0]["fico_score"] else None
+
+
+@derived_feature("max_guarantor_fico")
+def max_guarantor_fico(inputs, derived):
+    return max(_ficos(inputs), default=None)
+
+
+@derived_feature("min_guarantor_fico")
+def min_guarantor_fico(inputs, derived):
+    return min(_ficos(inputs), default=None)
+
+
+@derived_feature("guarantor_count")
+def guarantor_count(inputs, derived):
+    return len(inputs.guarantors)
+
+
+@derived_feature("ltv")
+def ltv(inputs, derived):
+    """Loan amount over equipment cost."""
+    return _ratio(inputs.loan_request["amount"], inputs.loan_request["equipment_cost"])
+
+
+@derived_feature("revenue_to_loan")
+def revenue_to_loan(inputs, derived):
+    return _ratio(inputs.borrower["annual_revenue"], inputs.loan_request["amount"])
+
+
+@derived_feature("foir")
+def foir(inputs, derived):
+    # no obligations data captured yet
+    return None
@@ -0,0 +1,177 @@
+# app/services/explain.py
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.lender_policy import LenderPolicy, LenderPolicyVersion
+from app.models.match_result import MatchResult
+from app.schemas.underwriting import RuleResult, PolicyEvaluation
+from app.services.policy_plan import (
+    CompiledPolicy,
+    PlanSummary,
+    compact_results,
+    expand_results,
+    expand_summary,
+    plan_cache,
+)
+
+# Stored forms of MatchResult.rule_results:
+# - compact (explain=True): policy id/version, bitmap of failed rules and
+#   the actual values; expanded against the archived policy version
+# - summary (explain=False): policy id/version, the failed rules' slots
+#   and actual values; expanded to just those failures
+# - verbose {"hard": [...], "soft": [...]}: out-of-range programs, whose
+#   failures don't come from the policy, and rows written before compaction
+# Compact and summary rows also carry the plan's digest (policy_digest) and
+# are only expanded against a plan with the same one.
+
+
+def summary_rule_results(policy, plan: CompiledPolicy, summary: PlanSummary) -> Dict[str, Any]:
+    """
+    Stored form of a summary-mode result: the policy version it was
+    evaluated against and the slots and actual values of its failed rules.
+    """
+    return {
+        "policy_id": policy.id,
+        "version": policy.version,
+        "digest": plan.digest,
+        "failed": list(summary.failed),
+        "actual": list(summary.actual),
+    }
+
+
+def compact_rule_results(policy, plan: CompiledPolicy, evaluation: PolicyEvaluation) -> Dict[str, Any]:
+    """Stored form of a full evaluation of `policy` (see compact_results)."""
+    bitmap, actual = compact_results(evaluation.hard_rule_results, evaluation.soft_rule_results)
+    return {
+        "policy_id": policy.id,
+        "version": policy.version,
+        "digest": plan.digest,
+        "bitmap": bitmap,
+        "actual": actual,
+    }
+
+
+def verbose_rule_results(hard: List[RuleResult], soft: List[RuleResult]) -> Dict[str, Any]:
+    return {"hard": [r.dict() for r in hard], "soft": [r.dict() for r in soft]}
+
+
+def is_summary(rule_results: Dict[str, Any] | None) -> bool:
+    return bool(rule_results) and "failed" in rule_results
+
+
+def is_compact(rule_results: Dict[str, Any] | None) -> bool:
+    return bool(rule_results) and "bitmap" in rule_results
+
+
+PolicyVersionKey = Tuple[int, int]  # (policy id, version)
+
+
+def load_plans(db: Session, keys: Set[PolicyVersionKey]) -> Dict[PolicyVersionKey, CompiledPolicy | None]:
+    """Compiled plans of archived policy versions; None for versions that are gone."""
+    ids = {policy_id for policy_id, _ in keys}
+    found = {
+        (v.policy_id, v.version): v.policy_json
+        for v in db.query(LenderPolicyVersion).filter(LenderPolicyVersion.policy_id.in_(ids))
+    }
+    if keys - found.keys():
+        # versions written before the archive existed: only the current one is known
+        for p in db.query(LenderPolicy).filter(LenderPolicy.id.in_(ids)):
+            found.setdefault((p.id, p.version), p.policy_json)
+    return {
+        key: plan_cache.compiled(*key, found[key]) if key in found else None
+        for key in keys
+    }
+
+
+def all_plans(db: Session) -> Dict[PolicyVersionKey, CompiledPolicy | None]:
+    """Every archived and current policy version, compiled; for jobs that read many results."""
+    keys = {(v.policy_id, v.version) for v in db.query(LenderPolicyVersion.policy_id, LenderPolicyVersion.version)}
+    keys |= {(p.id, p.version) for p in db.query(LenderPolicy.id, LenderPolicy.version)}
+    return load_plans(db, keys) if keys else {}
+
+
+def policy_version(rule_results: Dict[str, Any] | None) -> PolicyVersionKey | None:
+    """The policy version a compact or summary row was evaluated against."""
+    if is_compact(rule_results) or is_summary(rule_results):
+        return rule_results["policy_id"], rule_results["version"]
+    return None
+
+
+def plan_matches(plan: CompiledPolicy | None, rule_results: Dict[str, Any]) -> bool:
+    """
+    Whether `plan` has the rules a compact or summary row was evaluated
+    against. Rows written before digests were stored are taken on trust.
+    """
+    return plan is not None and rule_results.get("digest", plan.digest) == plan.digest
+
+
+def expand_row(
+    plan: CompiledPolicy | None, rule_results: Dict[str, Any]
+) -> Tuple[List[RuleResult], List[RuleResult]] | None:
+    """
+    Hard and soft RuleResults of a compact or summary row, rebuilt against
+    `plan`; None when `plan` is missing or isn't the one the row was
+    evaluated against.
+    """
+    if not plan_matches(plan, rule_results):
+        return None
+    if is_compact(rule_results):
+        return expand_results(plan, rule_results["bitmap"], rule_results["actual"])
+    return expand_summary(plan, rule_results["failed"], rule_results.get("actual"))
+
+
+class ResultExplainer:
+    """
+    Turns stored MatchResults back into PolicyEvaluations. Verbose rows are
+    read as-is; compact and summary rows are expanded against the policy
+    version they were produced with, from what was recorded at write time,
+    so the detail always agrees with the row's eligible / fit_score /
+    reasons. Nothing is re-evaluated.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._plans: Dict[PolicyVersionKey, CompiledPolicy | None] = {}
+
+    def preload(self, results: Iterable[MatchResult]) -> None:
+        """Fetch the policy versions `results` reference up front."""
+        self._load({policy_version(r.rule_results) for r in results} - {None})
+
+    def _load(self, keys: Set[PolicyVersionKey]) -> None:
+        keys = keys - self._plans.keys()
+        if keys:
+            self._plans.update(load_plans(self.db, keys))
+
+    def _plan(self, rule_results: Dict[str, Any]) -> CompiledPolicy | None:
+        key = policy_version(rule_results)
+        self._load({key})
+        return self._plans[key]
+
+    def rule_results(self, r: MatchResult) -> Tuple[List[RuleResult], List[RuleResult]]:
+        rule_results = r.rule_results or {}
+        if policy_version(rule_results) is not None:
+            # policy version gone or not the one evaluated: only the stored reasons remain
+            return expand_row(self._plan(rule_results), rule_results) or ([], [])
+
+        hard = [RuleResult(**rr) for rr in rule_results.get("hard", [])]
+        soft = [RuleResult(**rr) for rr in rule_results.get("soft", [])]
+        return hard, soft
+
+    def stored_detail(self, r: MatchResult) -> Dict[str, Any]:
+        """rule_results in the verbose shape, whatever the stored form."""
+        if policy_version(r.rule_results) is None:
+            return r.rule_results
+        return verbose_rule_results(*self.rule_results(r))
+
+    def explain(self, r: MatchResult) -> PolicyEvaluation:
+        hard, soft = self.rule_results(r)
+        return PolicyEvaluation(
+            lender_id=r.lender_id,
+            lender_program_id=r.lender_program_id,
+            eligible=r.eligible,
+            fit_score=r.fit_score,
+            hard_rule_results=hard,
+            soft_rule_results=soft,
+            reasons=r.reasons or [],
+        )
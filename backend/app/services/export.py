@@ -0,0 +1,190 @@
+# app/services/export.py
+import argparse
+import csv
+import io
+import sys
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterator
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models.loan_request import LoanRequest
+from app.models.match_result import MatchResult, MatchRun
+from app.services.analytics import failed_rule_ids
+from app.services.explain import all_plans, policy_version
+
+# Warehouse extracts. Rows are streamed off a server-side cursor
+# (yield_per) in id order and encoded as they arrive, so memory stays flat
+# however many rows match. Every row carries its id: pass the last one
+# received as `cursor` to resume an interrupted export.
+
+DATASETS = {
+    "applications": [c.name for c in LoanRequest.__table__.columns],
+    "results": [
+        "id", "match_run_id", "loan_request_id", "lender_id", "lender_program_id",
+        "eligible", "fit_score", "reasons", "failed_rules", "completed_at",
+    ],
+}
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+YIELD_PER = 5000
+CHUNK_BYTES = 64 * 1024
+
+
+def _application_rows(db: Session, date_from, date_to, cursor, yield_per) -> Iterator[Dict[str, Any]]:
+    stmt = select(*LoanRequest.__table__.columns).order_by(LoanRequest.id)
+    if cursor is not None:
+        stmt = stmt.where(LoanRequest.id > cursor)
+    if date_from:
+        stmt = stmt.where(LoanRequest.created_at >= date_from)
+    if date_to:
+        stmt = stmt.where(LoanRequest.created_at <= date_to)
+    for row in db.execute(stmt.execution_options(yield_per=yield_per)):
+        yield dict(row._mapping)
+
+
+def _result_rows(db: Session, date_from, date_to, cursor, yield_per) -> Iterator[Dict[str, Any]]:
+    # every policy version once, to name the failed rules of compact rows
+    plans = all_plans(db)
+
+    stmt = (
+        select(
+            MatchResult.id,
+            MatchResult.match_run_id,
+            MatchRun.loan_request_id,
+            MatchResult.lender_id,
+            MatchResult.lender_program_id,
+            MatchResult.eligible,
+            MatchResult.fit_score,
+            MatchResult.reasons,
+            MatchResult.rule_results,
+            MatchRun.completed_at,
+        )
+        .join(MatchRun, MatchRun.id == MatchResult.match_run_id)
+        .where(MatchRun.status == "COMPLETE")
+        .order_by(MatchResult.id)
+    )
+    if cursor is not None:
+        stmt = stmt.where(MatchResult.id > cursor)
+    # a date range covers whole days of run completion
+    if date_from:
+        stmt = stmt.where(MatchRun.completed_at >= datetime.combine(date_from, time.min))
+    if date_to:
+        stmt = stmt.where(MatchRun.completed_at < datetime.combine(date_to + timedelta(days=1), time.min))
+
+    for row in db.execute(stmt.execution_options(yield_per=yield_per)):
+        out = dict(row._mapping)
+        rule_results = out.pop("rule_results")
+        out["failed_rules"] = failed_rule_ids(rule_results, plans.get(policy_version(rule_results)))
+        yield out
+
+
+def export_rows(
+    db: Session,
+    dataset: str,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    cursor: int | None = None,
+    yield_per: int = YIELD_PER,
+) -> Iterator[Dict[str, Any]]:
+    rows = _application_rows if dataset == "applications" else _result_rows
+    return rows(db, date_from, date_to, cursor, yield_per)
+
+
+def _csv_value(v: Any) -> Any:
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if isinstance(v, (list, dict)):
+        return orjson.dumps(v).decode()
+    return v
+
+
+def encode(rows: Iterator[Dict[str, Any]], dataset: str, fmt: str) -> Iterator[bytes]:
+    """Rows as CSV (with a header) or NDJSON, in chunks of about CHUNK_BYTES."""
+    buf = io.StringIO()
+    if fmt == "csv":
+        fields = DATASETS[dataset]
+        writer = csv.writer(buf)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([_csv_value(row[f]) for f in fields])
+            if buf.tell() >= CHUNK_BYTES:
+                yield buf.getvalue().encode()
+                buf.seek(0)
+                buf.truncate()
+        yield buf.getvalue().encode()
+        return
+
+    out = bytearray()
+    for row in rows:
+        out += orjson.dumps(row)
+        out += b"\n"
+        if len(out) >= CHUNK_BYTES:
+            yield bytes(out)
+            out.clear()
+    yield bytes(out)
+
+
+def gzipped(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """A single gzip stream over `chunks`, compressed as they come."""
+    z = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = z.compress(chunk)
+        if data:
+            yield data
+    yield z.flush()
+
+
+def stream_export(
+    dataset: str,
+    fmt: str,
+    gzip: bool = False,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    cursor: int | None = None,
+    yield_per: int = YIELD_PER,
+) -> Iterator[bytes]:
+    """Encoded export for a StreamingResponse or a file; owns its session, like background jobs."""
+    db = SessionLocal()
+    try:
+        chunks = encode(export_rows(db, dataset, date_from, date_to, cursor, yield_per), dataset, fmt)
+        yield from gzipped(chunks) if gzip else chunks
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream applications or match results to a file")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None)
+    parser.add_argument("--cursor", type=int, default=None, help="resume after this id")
+    parser.add_argument("--yield-per", type=int, default=YIELD_PER)
+    parser.add_argument("--out", default="-", help="output file, - for stdout")
+    args = parser.parse_args()
+
+    # run standalone: every mapper the relationships name must be loaded
+    import app.models.borrower, app.models.guarantor, app.models.business_credit  # noqa: F401
+
+    out = sys.stdout.buffer if args.out == "-" else open(args.out, "wb")
+    try:
+        for chunk in stream_export(
+            args.dataset, args.format, args.gzip, args.date_from, args.date_to, args.cursor, args.yield_per
+        ):
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+
+# ----------------------------------------------------
+# RUN DIRECTLY: python -m app.services.export results --format csv --gzip --from 2025-01-01 --out results.csv.gz
+# ----------------------------------------------------
+if __name__ == "__main__":
+    main()
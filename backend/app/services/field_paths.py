@@ -0,0 +1,219 @@
+# app/services/field_paths.py
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+Accessor = Callable[[Any], Any]
+
+# What an ApplicationProfile exposes per namespace (see
+# underwriting.profile_from_models); packing straight from ORM rows
+# reads exactly these attributes.
+PROFILE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "borrower": (
+        "business_name", "industry", "state", "years_in_business",
+        "annual_revenue", "paynet_score", "medical_license_flag",
+    ),
+    "guarantors": (
+        "name", "fico_score", "bankruptcy_flag", "delinquency_flag", "homeowner_flag",
+    ),
+    "business_credit": (
+        "paynet_score", "tradelines_count", "serious_delinquency_count",
+    ),
+    "loan_request": (
+        "amount", "term_months", "equipment_type", "equipment_cost",
+        "equipment_year", "equipment_condition", "created_at",
+    ),
+}
+
+# rule field prefix -> ApplicationProfile attribute
+_NAMESPACES = (
+    ("borrower.", "borrower"),
+    ("loan_request.", "loan_request"),
+    ("loan.", "loan_request"),
+    ("derived.", "derived"),
+    ("guarantor.primary.", "guarantors"),
+    ("business_credit.", "business_credit"),
+)
+
+
+@dataclass(frozen=True)
+class FieldPath:
+    """
+    A parsed rule field:
+    - 'borrower.state'                  -> borrower, ['state']
+    - 'loan.amount' / 'loan_request.amount' -> loan_request, ['amount']
+    - 'guarantor.primary.fico_score'    -> guarantors[0], ['fico_score']
+    - 'guarantors[1].fico_score'        -> guarantors[1], ['fico_score']
+    - 'business_credit.paynet_score'    -> business_credit, ['paynet_score']
+    - 'derived.foir' (or unprefixed)    -> derived, ['foir']
+    """
+    namespace: str
+    parts: Tuple[str, ...]
+    index: int | None = None  # guarantor position
+
+
+def parse_field(field: str) -> FieldPath:
+    if field.startswith("guarantors["):
+        close = field.find("]")
+        idx, rest = field[len("guarantors["):close], field[close + 1:]
+        if close > 0 and idx.isdigit() and rest.startswith("."):
+            return FieldPath("guarantors", tuple(rest[1:].split(".")), int(idx))
+
+    for prefix, namespace in _NAMESPACES:
+        if field.startswith(prefix):
+            index = 0 if namespace == "guarantors" else None
+            return FieldPath(namespace, tuple(field[len(prefix):].split(".")), index)
+
+    # fallback, treat as derived
+    return FieldPath("derived", tuple(field.split(".")))
+
+
+def get_path(obj: Any, parts: Iterable[str]) -> Any:
+    cur: Any = obj
+    for p in parts:
+        if cur is None:
+            return None
+        if isinstance(cur, dict):
+            cur = cur.get(p)
+        else:
+            return None
+    return cur
+
+
+def compile_field(field: str | None) -> Accessor:
+    """
+    Accessor for a field on an ApplicationProfile, resolved once: the
+    namespace, guarantor index and path are fixed at compile time and
+    single-key paths become a plain dict lookup.
+    """
+    if field is None:
+        return lambda app: None
+
+    fp = parse_field(field)
+    parts = fp.parts
+
+    if fp.namespace == "guarantors":
+        i = fp.index
+        if len(parts) == 1:
+            key = parts[0]
+            return lambda app: app.guarantors[i].get(key) if len(app.guarantors) > i else None
+        return lambda app: get_path(app.guarantors[i], parts) if len(app.guarantors) > i else None
+
+    if fp.namespace == "business_credit":
+        return lambda app: get_path(app.business_credit, parts)
+
+    attr = fp.namespace
+    if len(parts) == 1:
+        key = parts[0]
+        return lambda app: getattr(app, attr).get(key)
+    return lambda app: get_path(getattr(app, attr), parts)
+
+
+# ---------------------------------------------------------------------------
+# Compact profiles
+# ---------------------------------------------------------------------------
+
+class PackedProfile:
+    """
+    An application reduced to the values of the fields a ProfileLayout
+    references, in slot order. Much smaller to build, keep and ship to
+    worker processes than an ApplicationProfile.
+    """
+    __slots__ = ("values",)
+
+    def __init__(self, values: Tuple[Any, ...]):
+        self.values = values
+
+    def __getstate__(self):
+        return self.values
+
+    def __setstate__(self, state):
+        self.values = state
+
+    def __eq__(self, other):
+        return isinstance(other, PackedProfile) and self.values == other.values
+
+    def __hash__(self):
+        return hash(self.values)
+
+    def __repr__(self):
+        return f"PackedProfile{self.values!r}"
+
+
+class ProfileLayout:
+    """
+    Slot assignment for a fixed set of field paths, typically every field
+    referenced by the active policies. Rules bound to a layout (see
+    policy_plan.bind_plan) read PackedProfile.values[slot] directly.
+    """
+
+    def __init__(self, fields: Iterable[str | None]):
+        self.fields: Tuple[str, ...] = tuple(sorted({f for f in fields if f}))
+        self.slots: Dict[str, int] = {f: i for i, f in enumerate(self.fields)}
+        self.paths: List[FieldPath] = [parse_field(f) for f in self.fields]
+        self._getters = [compile_field(f) for f in self.fields]
+        self._model_getters: List[Accessor] | None = None
+        self._uses_derived = any(fp.namespace == "derived" for fp in self.paths)
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def pack(self, app) -> PackedProfile:
+        """Pack an ApplicationProfile."""
+        return PackedProfile(tuple(get(app) for get in self._getters))
+
+    def pack_models(self, lr, borrower, guarantors, bc, derive: Callable[[], Dict[str, Any]]) -> PackedProfile:
+        """
+        Pack straight from ORM rows without building the profile dicts.
+        `derive` returns the derived namespace (see derived_features) and
+        is only called if the layout references derived fields.
+        """
+        if self._model_getters is None:
+            self._model_getters = [_model_getter(fp) for fp in self.paths]
+        sources = {
+            "borrower": borrower,
+            "loan_request": lr,
+            "guarantors": guarantors,
+            "business_credit": bc,
+            "derived": derive() if self._uses_derived else None,
+        }
+        return PackedProfile(tuple(get(sources) for get in self._model_getters))
+
+    def accessor(self, field: str | None) -> Accessor:
+        slot = self.slots.get(field) if field else None
+        if slot is None:
+            return lambda packed: None
+        return lambda packed: packed.values[slot]
+
+    def get(self, packed: PackedProfile, field: str) -> Any:
+        slot = self.slots.get(field)
+        return None if slot is None else packed.values[slot]
+
+
+def _model_value(obj: Any, name: str) -> Any:
+    v = getattr(obj, name)
+    if name == "created_at" and v is not None:
+        v = v.isoformat()
+    return v
+
+
+def _model_getter(fp: FieldPath) -> Accessor:
+    """Getter over {namespace: ORM row(s)} matching compile_field on the profile."""
+    ns, head, rest = fp.namespace, fp.parts[0], fp.parts[1:]
+
+    if ns == "derived":
+        return lambda src: get_path(src["derived"], fp.parts)
+    if head not in PROFILE_FIELDS[ns]:
+        return lambda src: None
+
+    if ns == "guarantors":
+        i = fp.index
+
+        def read(src):
+            gs = src["guarantors"]
+            return get_path(_model_value(gs[i], head), rest) if len(gs) > i else None
+        return read
+
+    def read(src):
+        obj = src[ns]
+        return None if obj is None else get_path(_model_value(obj, head), rest)
+    return read
@@ -0,0 +1,66 @@
+# app/services/pagination.py
+import json
+from typing import Any, List, Literal, Tuple
+
+from fastapi import Response
+from sqlalchemy import Select, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+CountMode = Literal["estimate", "exact", "none"]
+
+
+async def keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    key,
+    cursor: int | None,
+    limit: int,
+    descending: bool = False,
+) -> Tuple[List[Any], int | None]:
+    """
+    One page of `stmt` ordered by the unique `key` column, starting after
+    `cursor` (the key of the last row of the previous page). Seeks through
+    the key's index instead of OFFSET, so every page costs the same. Returns
+    the rows and the cursor of the next page, or None on the last one.
+    """
+    if cursor is not None:
+        stmt = stmt.where(key < cursor if descending else key > cursor)
+    stmt = stmt.order_by(key.desc() if descending else key).limit(limit + 1)
+    rows = (await db.scalars(stmt)).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, getattr(rows[-1], key.key)
+
+
+async def count_rows(db: AsyncSession, stmt: Select, mode: CountMode) -> Tuple[int | None, bool]:
+    """
+    Rows matched by `stmt` and whether that is an estimate. "estimate" asks
+    the Postgres planner (EXPLAIN, nothing is scanned) and counts exactly
+    elsewhere; "exact" runs COUNT(*); "none" skips counting.
+    """
+    if mode == "none":
+        return None, False
+    if mode == "estimate" and db.bind.dialect.name == "postgresql":
+        return await _planner_estimate(db, stmt), True
+    return await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery())), False
+
+
+async def _planner_estimate(db: AsyncSession, stmt: Select) -> int:
+    sql = stmt.order_by(None).compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    plan = await db.scalar(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def set_page_headers(response: Response, next_cursor: int | None, total: int | None, estimated: bool = False) -> None:
+    # list bodies stay plain arrays; paging travels in headers. X-Total-Count
+    # is always exact, a planner estimate goes out as X-Total-Count-Estimate
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    if total is not None:
+        response.headers["X-Total-Count-Estimate" if estimated else "X-Total-Count"] = str(total)
@@ -0,0 +1,111 @@
+# app/services/parallel_eval.py
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Any, Dict, List, Tuple
+
+from app.schemas.underwriting import RuleResult
+from app.services.field_paths import PackedProfile
+from app.services.policy_plan import CompiledPolicy, compile_policy, shared_layout
+from app.services.threshold_index import ThresholdIndex
+from app.services.catalog import ActivePolicy, ActivePolicySet
+from app.services.underwriting import evaluate_policies
+
+# 0 or 1 keeps evaluation in the calling process
+EVAL_WORKERS = int(os.getenv("UNDERWRITING_EVAL_WORKERS", "0"))
+# below this many active policies the pool round trip costs more than it saves
+MIN_POLICIES = int(os.getenv("UNDERWRITING_PARALLEL_MIN_POLICIES", "200"))
+
+
+# ---------------------------------------------------------------------------
+# Worker side: the whole active policy set is compiled once per process
+# ---------------------------------------------------------------------------
+
+_policies: List[ActivePolicy] = []
+_plans: List[CompiledPolicy] = []
+_layout = None
+_thresholds: ThresholdIndex | None = None
+
+
+def _init_worker(policies: List[ActivePolicy], sources: List[Dict[str, Any]], fields: Tuple[str, ...]) -> None:
+    global _policies, _plans, _layout, _thresholds
+    compiled = [compile_policy(src) for src in sources]
+    layout, bound = shared_layout(compiled)
+    # the parent packs profiles; slots have to line up
+    if layout.fields != fields:
+        raise RuntimeError("Worker profile layout differs from the parent's")
+    _policies, _plans, _layout = policies, bound, layout
+    _thresholds = ThresholdIndex([(p.id, plan) for p, plan in zip(policies, compiled)])
+
+
+def _evaluate_slice(
+    start: int,
+    stop: int,
+    match_run_id: int,
+    app_profile: PackedProfile,
+    excluded: Dict[int, List[RuleResult]],
+    explain: bool,
+) -> List[Dict[str, Any]]:
+    probe = _thresholds.probe(app_profile, _layout)
+    return evaluate_policies(
+        _policies[start:stop], _plans[start:stop], match_run_id, app_profile, probe, excluded, explain
+    )
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+_pool: ProcessPoolExecutor | None = None
+_pool_generation: int | None = None
+_lock = Lock()
+
+
+def use_pool(policy_set: ActivePolicySet) -> bool:
+    return EVAL_WORKERS > 1 and len(policy_set.policies) >= MIN_POLICIES
+
+
+def _get_pool(policy_set: ActivePolicySet) -> ProcessPoolExecutor:
+    """
+    Pool whose workers hold `policy_set`, replaced when the catalog
+    generation changes; tasks already submitted to the old one still finish.
+    """
+    global _pool, _pool_generation
+    with _lock:
+        if _pool is None or _pool_generation != policy_set.generation:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=EVAL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(policy_set.policies, policy_set.sources, policy_set.layout.fields),
+            )
+            _pool_generation = policy_set.generation
+        return _pool
+
+
+def evaluate_parallel(
+    policy_set: ActivePolicySet,
+    match_run_id: int,
+    app_profile: PackedProfile,
+    excluded: Dict[int, List[RuleResult]],
+    explain: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Same rows as evaluate_policies over the whole set: the policies are cut
+    into one contiguous slice per worker, only the packed profile is
+    shipped, and slices are concatenated in order.
+    """
+    pool = _get_pool(policy_set)
+    n = len(policy_set.policies)
+    step = -(-n // EVAL_WORKERS)
+    futures = [
+        pool.submit(_evaluate_slice, start, min(start + step, n), match_run_id, app_profile, excluded, explain)
+        for start in range(0, n, step)
+    ]
+    results: List[Dict[str, Any]] = []
+    for f in futures:
+        results.extend(f.result())
+    return results
@@ -1,6 +1,7 @@
 # app/services/policy_engine.py
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
 from dataclasses import dataclass
+from functools import lru_cache
 
 from app.schemas.lender_policy import (
     PolicyJson,
@@ -9,6 +10,7 @@ from app.schemas.lender_policy import (
     ScoringConfig,
 )
 from app.schemas.underwriting import RuleResult, PolicyEvaluation
+from app.services.field_paths import compile_field
 
 
 @dataclass
@@ -20,46 +22,19 @@ class ApplicationProfile:
     derived: Dict[str, Any]
 
 
-def _get_field(obj: Dict[str, Any], path: str | None) -> Any:
-    if not path:
-        return None
-    parts = path.split(".")
-    cur: Any = obj
-    for p in parts:
-        if cur is None:
-            return None
-        if isinstance(cur, dict):
-            cur = cur.get(p)
-        else:
-            return None
-    return cur
+_compiled_field = lru_cache(maxsize=1024)(compile_field)
 
 
 def _resolve_field(app: ApplicationProfile, field: str | None) -> Any:
     """
     Field names are namespaced:
     - 'borrower.state'
-    - 'loan.amount'
-    - 'guarantor.primary.fico_score'
+    - 'loan.amount' / 'loan_request.amount'
+    - 'guarantor.primary.fico_score' / 'guarantors[0].fico_score'
     - 'derived.foir'
+    Paths are parsed once per distinct field (see field_paths.compile_field).
     """
-    if field is None:
-        return None
-
-    if field.startswith("borrower."):
-        return _get_field(app.borrower, field[len("borrower."):])
-    if field.startswith("loan."):
-        return _get_field(app.loan_request, field[len("loan."):])
-    if field.startswith("derived."):
-        return _get_field(app.derived, field[len("derived."):])
-    if field.startswith("guarantor.primary."):
-        primary = app.guarantors[0] if app.guarantors else {}
-        return _get_field(primary, field[len("guarantor.primary."):])
-    if field.startswith("business_credit."):
-        bc = app.business_credit or {}
-        return _get_field(bc, field[len("business_credit."):])
-    # fallback, treat as derived
-    return _get_field(app.derived, field)
+    return _compiled_field(field)(app)
 
 
 def eval_rule(rule: RuleConfig, app: ApplicationProfile) -> RuleResult:
@@ -148,6 +123,34 @@ def eval_group(group: RuleGroupConfig, app: ApplicationProfile) -> List[RuleResu
     return results
 
 
+def group_holds(group: RuleGroupConfig, results: Iterator[RuleResult], failed: List[RuleResult]) -> Tuple[bool, bool]:
+    """
+    Walks `group`, consuming its results in eval_group order, and returns
+    (holds, counts). ALL needs every HARD rule and counting subgroup to
+    hold, ANY one of them; rules of other severities don't count, and a
+    group with nothing that counts holds. Failed results behind the answer
+    go to `failed`; failures inside an ANY group that held are dropped.
+    """
+    fails: List[RuleResult] = []
+    outcomes: List[bool] = []
+    for _ in group.rules or []:
+        r = next(results)
+        if not r.passed:
+            fails.append(r)
+        if r.severity == "HARD":
+            outcomes.append(r.passed)
+    for g in group.groups or []:
+        held, counts = group_holds(g, results, fails)
+        if counts:
+            outcomes.append(held)
+
+    any_mode = group.logic == "ANY"
+    holds = (any(outcomes) if any_mode else all(outcomes)) if outcomes else True
+    if not (holds and any_mode and outcomes):
+        failed.extend(fails)
+    return holds, bool(outcomes)
+
+
 def evaluate_policy(
     policy_json: PolicyJson,
     lender_id: int,
@@ -156,7 +159,9 @@ def evaluate_policy(
 ) -> PolicyEvaluation:
 
     hard_results = eval_group(policy_json.hard_rules, app)
-    hard_fail = any((not r.passed) and r.severity == "HARD" for r in hard_results)
+    hard_failed: List[RuleResult] = []
+    holds, _ = group_holds(policy_json.hard_rules, iter(hard_results), hard_failed)
+    hard_fail = not holds
 
     soft_results: List[RuleResult] = []
     score: float | None = None
@@ -172,7 +177,7 @@ def evaluate_policy(
 
     reasons: List[str] = []
     if hard_fail:
-        reasons.extend([r.message for r in hard_results if not r.passed and r.message])
+        reasons.extend([r.message for r in hard_failed if r.message])
     if not hard_fail and soft_results:
         reasons.extend([r.message for r in soft_results if not r.passed and r.message])
 
@@ -0,0 +1,689 @@
+# app/services/policy_plan.py
+import hashlib
+from dataclasses import dataclass, field, replace
+from itertools import chain
+from threading import Lock
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import orjson
+
+from app.schemas.lender_policy import PolicyJson, RuleConfig, RuleGroupConfig
+from app.schemas.underwriting import RuleResult, PolicyEvaluation
+from app.services.policy_engine import ApplicationProfile
+from app.services.field_paths import ProfileLayout, compile_field
+
+
+Accessor = Callable[[ApplicationProfile], Any]
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """
+    A rule with its field path, params and comparator resolved up front.
+    `check` returns True when the value passes; `expected` is what gets
+    reported on failure (same shape as eval_rule).
+    """
+    slot: int
+    id: str
+    type: str
+    field: str | None
+    severity: str
+    message: str
+    params: Dict[str, Any]
+    accessor: Accessor
+    check: Callable[[Any], bool]
+    expected: Any
+    known: bool = True
+
+
+@dataclass(frozen=True)
+class CompiledGroup:
+    logic: str
+    rules: Tuple[CompiledRule, ...]
+    groups: Tuple["CompiledGroup", ...]
+    # whether a HARD rule sits anywhere below: a group without one can't
+    # fail, so it doesn't count toward its parent's ALL/ANY
+    has_hard: bool = field(init=False, compare=False, repr=False)
+    # [RuleStats epoch, rules in short-circuit order], see RuleStats.ordered;
+    # held by the group itself so a rebound copy never sees another's order
+    order: List[Any] = field(init=False, compare=False, repr=False, default_factory=lambda: [-1, ()])
+
+    def __post_init__(self):
+        object.__setattr__(
+            self,
+            "has_hard",
+            any(r.severity == "HARD" for r in self.rules) or any(g.has_hard for g in self.groups),
+        )
+
+    def all_rules(self) -> List[CompiledRule]:
+        """Rules of this group and its subgroups, in evaluation order."""
+        out = list(self.rules)
+        for g in self.groups:
+            out.extend(g.all_rules())
+        return out
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    """
+    Executable form of a PolicyJson. `rules` is every rule in evaluation
+    order (hard tree first, then soft tree); CompiledRule.slot indexes it.
+    `digest` identifies the rules it was compiled from (policy_digest).
+    """
+    hard_rules: CompiledGroup
+    soft_rules: CompiledGroup | None
+    base_score: float
+    min_accept_score: float
+    deductions: Tuple[Tuple[str, float], ...]
+    rules: Tuple[CompiledRule, ...]
+    stats: "RuleStats" = field(default=None, compare=False, repr=False)
+    digest: str = field(default="", compare=False, repr=False)
+
+
+# ---------------------------------------------------------------------------
+# Compilation
+# ---------------------------------------------------------------------------
+
+def _comparator(rule_type: str, p: Dict[str, Any]) -> Tuple[Callable[[Any], bool], Any] | None:
+    if rule_type == "MIN_VALUE":
+        mn = p["min"]
+        return (lambda v: v is not None and not v < mn), {">=": mn}
+
+    if rule_type == "MAX_VALUE":
+        mx = p["max"]
+        return (lambda v: v is not None and not v > mx), {"<=": mx}
+
+    if rule_type == "IN_SET":
+        allowed = frozenset(p["allowed"])
+        return (lambda v: v in allowed), {"in": list(allowed)}
+
+    if rule_type == "NOT_IN_SET":
+        blocked = frozenset(p["blocked"])
+        return (lambda v: v not in blocked), {"not_in": list(blocked)}
+
+    if rule_type == "BOOLEAN_IS_TRUE":
+        return bool, True
+
+    if rule_type == "RANGE":
+        mn, mx = p["min"], p["max"]
+        return (lambda v: v is not None and mn <= v <= mx), {"between": [mn, mx]}
+
+    return None
+
+
+def compile_rule(rule: RuleConfig, slot: int) -> CompiledRule:
+    rule_type = rule.type.upper()
+    comparator = _comparator(rule_type, rule.params)
+    message = rule.message
+    if comparator is None:
+        # Unknown rule type always fails, as in eval_rule
+        check, expected, known = (lambda v: False), None, False
+        message = f"Unknown rule type {rule.type}"
+    else:
+        (check, expected), known = comparator, True
+
+    return CompiledRule(
+        slot=slot,
+        id=rule.id,
+        type=rule_type,
+        field=rule.field,
+        severity=rule.severity,
+        message=message,
+        params=dict(rule.params),
+        accessor=compile_field(rule.field),
+        check=check,
+        expected=expected,
+        known=known,
+    )
+
+
+def _compile_group(group: RuleGroupConfig, out: List[CompiledRule]) -> CompiledGroup:
+    rules = []
+    for r in group.rules or []:
+        cr = compile_rule(r, len(out))
+        out.append(cr)
+        rules.append(cr)
+    groups = tuple(_compile_group(g, out) for g in group.groups or [])
+    return CompiledGroup(logic=group.logic, rules=tuple(rules), groups=groups)
+
+
+def policy_digest(policy_json: PolicyJson | Dict[str, Any]) -> str:
+    """
+    Content hash of a policy's rules, the same for any two policy_jsons
+    that parse to the same PolicyJson. Stored results carry it so they are
+    never expanded against other rules under the same (id, version).
+    """
+    pj = policy_json if isinstance(policy_json, PolicyJson) else PolicyJson(**policy_json)
+    return hashlib.blake2b(orjson.dumps(pj.dict(), option=orjson.OPT_SORT_KEYS), digest_size=8).hexdigest()
+
+
+def compile_policy(policy_json: PolicyJson | Dict[str, Any]) -> CompiledPolicy:
+    pj = policy_json if isinstance(policy_json, PolicyJson) else PolicyJson(**policy_json)
+
+    flat: List[CompiledRule] = []
+    hard = _compile_group(pj.hard_rules, flat)
+    soft = _compile_group(pj.soft_rules, flat) if pj.soft_rules else None
+    sc = pj.scoring_config
+
+    return CompiledPolicy(
+        hard_rules=hard,
+        soft_rules=soft,
+        base_score=sc.base_score,
+        min_accept_score=sc.min_accept_score,
+        deductions=tuple((d["ruleId"], d["points"]) for d in sc.deductions),
+        rules=tuple(flat),
+        stats=RuleStats(len(flat)),
+        digest=policy_digest(pj),
+    )
+
+
+def bind_plan(plan: CompiledPolicy, layout: ProfileLayout) -> CompiledPolicy:
+    """
+    Copy of `plan` whose rules read PackedProfiles of `layout` by slot.
+    Rule slots and the RuleStats counters are shared with the original;
+    each new group orders its own rules (CompiledGroup.order).
+    """
+    rules = tuple(replace(r, accessor=layout.accessor(r.field)) for r in plan.rules)
+
+    def rebind(group: CompiledGroup) -> CompiledGroup:
+        return CompiledGroup(
+            logic=group.logic,
+            rules=tuple(rules[r.slot] for r in group.rules),
+            groups=tuple(rebind(g) for g in group.groups),
+        )
+
+    return replace(
+        plan,
+        hard_rules=rebind(plan.hard_rules),
+        soft_rules=rebind(plan.soft_rules) if plan.soft_rules else None,
+        rules=rules,
+    )
+
+
+_bound: Tuple[Tuple[CompiledPolicy, ...], ProfileLayout, List[CompiledPolicy]] | None = None
+
+
+def shared_layout(plans: List[CompiledPolicy]) -> Tuple[ProfileLayout, List[CompiledPolicy]]:
+    """
+    Layout over every field the given plans reference, with the plans bound
+    to it. Rebuilt only when the set of plans (by identity) changes.
+    """
+    global _bound
+    cached = _bound
+    if cached is not None and len(cached[0]) == len(plans) and all(a is b for a, b in zip(cached[0], plans)):
+        return cached[1], cached[2]
+    layout = ProfileLayout(r.field for p in plans for r in p.rules)
+    bound = [bind_plan(p, layout) for p in plans]
+    _bound = (tuple(plans), layout, bound)
+    return layout, bound
+
+
+# ---------------------------------------------------------------------------
+# Plan cache
+# ---------------------------------------------------------------------------
+
+class PolicyPlanCache:
+    """
+    Compiled plans keyed by (LenderPolicy.id, version). The policy routers
+    call invalidate() whenever they write lender_policies, so an in-place
+    update that keeps the same version number is still picked up. Other
+    processes (underwriting workers) don't see those calls, so a hit is
+    also checked against the policy_json it was compiled from.
+    """
+
+    def __init__(self):
+        self._plans: Dict[Tuple[int, int], Tuple[CompiledPolicy, Dict[str, Any]]] = {}
+        self._lock = Lock()
+
+    def get(self, policy) -> CompiledPolicy:
+        return self.compiled(policy.id, policy.version, policy.policy_json)
+
+    def compiled(self, policy_id: int, version: int, policy_json: Dict[str, Any]) -> CompiledPolicy:
+        key = (policy_id, version)
+        entry = self._plans.get(key)
+        if entry is None or entry[1] != policy_json:
+            plan = compile_policy(policy_json)
+            with self._lock:
+                self._plans[key] = (plan, policy_json)
+            return plan
+        return entry[0]
+
+    def invalidate(self, policy_id: int | None = None) -> None:
+        with self._lock:
+            if policy_id is None:
+                self._plans.clear()
+            else:
+                for key in [k for k in self._plans if k[0] == policy_id]:
+                    del self._plans[key]
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+
+plan_cache = PolicyPlanCache()
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+def run_rule(rule: CompiledRule, app: ApplicationProfile) -> RuleResult:
+    v = rule.accessor(app)
+    passed = rule.check(v)
+    return RuleResult.model_construct(
+        rule_id=rule.id,
+        passed=passed,
+        severity=rule.severity,
+        message="" if passed else rule.message,
+        field=rule.field,
+        expected=None if passed else rule.expected,
+        actual=v,
+    )
+
+
+def run_group(group: CompiledGroup, app: ApplicationProfile) -> List[RuleResult]:
+    results = [run_rule(r, app) for r in group.rules]
+    for g in group.groups:
+        results.extend(run_group(g, app))
+    return results
+
+
+def group_holds(group: CompiledGroup, passed: Sequence[bool], failed: List[int]) -> bool:
+    """
+    Whether `group` is satisfied given every rule's outcome by slot, with
+    the ALL/ANY logic screening applies (see _holds): HARD rules and
+    subgroups containing one count, other rules don't. Slots of the failed
+    rules behind the answer go to `failed`, in slot order; failures inside
+    an ANY group that held are dropped.
+    """
+    fails = [r.slot for r in group.rules if not passed[r.slot]]
+    outcomes = [passed[r.slot] for r in group.rules if r.severity == "HARD"]
+    for g in group.groups:
+        held = group_holds(g, passed, fails)
+        if g.has_hard:
+            outcomes.append(held)
+
+    any_mode = group.logic == "ANY"
+    holds = (any(outcomes) if any_mode else all(outcomes)) if outcomes else True
+    if not (holds and any_mode and outcomes):
+        failed.extend(fails)
+    return holds
+
+
+def decisive_rules(plan: CompiledPolicy) -> List[CompiledRule]:
+    """
+    HARD rules whose failure alone fails the hard tree: those reached from
+    its root through ALL groups only.
+    """
+    out: List[CompiledRule] = []
+
+    def walk(group: CompiledGroup) -> None:
+        if group.logic != "ALL":
+            return
+        out.extend(r for r in group.rules if r.severity == "HARD")
+        for g in group.groups:
+            walk(g)
+
+    walk(plan.hard_rules)
+    return out
+
+
+def evaluate_plan(
+    plan: CompiledPolicy,
+    lender_id: int,
+    lender_program_id: int,
+    app: ApplicationProfile,
+) -> PolicyEvaluation:
+    """
+    Compiled counterpart of policy_engine.evaluate_policy; produces the
+    same PolicyEvaluation for the same policy and application. Every rule
+    is evaluated; the hard tree fails by its ALL/ANY logic (group_holds),
+    so eligibility agrees with screen_plan.
+    `app` is a PackedProfile when the plan is bound to a layout (bind_plan).
+    """
+    hard_results = run_group(plan.hard_rules, app)
+    hard_failed: List[int] = []
+    hard_fail = not group_holds(plan.hard_rules, [r.passed for r in hard_results], hard_failed)
+
+    soft_results: List[RuleResult] = []
+    score: float | None = None
+
+    if not hard_fail and plan.soft_rules:
+        soft_results = run_group(plan.soft_rules, app)
+        score = _score(plan, {r.rule_id: r.passed for r in soft_results})
+    elif not hard_fail:
+        # no soft rules, treat as full score
+        score = 100.0
+
+    eligible = (not hard_fail) and (score is None or score >= plan.min_accept_score)
+
+    reasons: List[str] = []
+    if hard_fail:
+        # hard rule slots index hard_results
+        reasons.extend([hard_results[slot].message for slot in hard_failed if hard_results[slot].message])
+    if not hard_fail and soft_results:
+        reasons.extend([r.message for r in soft_results if not r.passed and r.message])
+
+    return PolicyEvaluation.model_construct(
+        lender_id=lender_id,
+        lender_program_id=lender_program_id,
+        eligible=eligible,
+        fit_score=score,
+        hard_rule_results=hard_results,
+        soft_rule_results=soft_results,
+        reasons=reasons,
+    )
+
+
+def compact_results(
+    hard_results: List[RuleResult],
+    soft_results: List[RuleResult],
+) -> Tuple[str, List[Any]]:
+    """
+    An evaluate_plan outcome reduced to what the plan can't restore: a
+    bitmap of failed rules (hex, bit n = slot n) and the actual values, in
+    slot order. Soft rules are present only if they were evaluated.
+    """
+    bits = 0
+    actual: List[Any] = []
+    for slot, r in enumerate(chain(hard_results, soft_results)):
+        if not r.passed:
+            bits |= 1 << slot
+        actual.append(r.actual)
+    return format(bits, "x"), actual
+
+
+def expand_results(
+    plan: CompiledPolicy,
+    bitmap: str,
+    actual: List[Any],
+) -> Tuple[List[RuleResult], List[RuleResult]] | None:
+    """
+    Inverse of compact_results: the hard and soft RuleResults evaluate_plan
+    produced, as run_rule builds them. None if the plan doesn't have the
+    shape the values were recorded against.
+    """
+    n_hard = len(plan.hard_rules.all_rules())
+    if len(actual) not in (n_hard, len(plan.rules)):
+        return None
+    bits = int(bitmap, 16)
+    results = []
+    for rule, v in zip(plan.rules, actual):
+        passed = not (bits >> rule.slot) & 1
+        results.append(RuleResult.model_construct(
+            rule_id=rule.id,
+            passed=passed,
+            severity=rule.severity,
+            message="" if passed else rule.message,
+            field=rule.field,
+            expected=None if passed else rule.expected,
+            actual=v,
+        ))
+    return results[:n_hard], results[n_hard:]
+
+
+def _score(plan: CompiledPolicy, soft_passed: Dict[str, bool]) -> float:
+    score = plan.base_score
+    for rid, pts in plan.deductions:
+        if soft_passed.get(rid) is False:
+            score -= pts
+    return max(score, 0.0)
+
+
+# ---------------------------------------------------------------------------
+# Short-circuit evaluation
+# ---------------------------------------------------------------------------
+
+class RuleStats:
+    """
+    Running counters per rule slot used to order short-circuit evaluation.
+    Timing is sampled (one evaluation in SAMPLE_EVERY) so measuring doesn't
+    cost more than the rules themselves; orderings are recomputed every
+    REORDER_EVERY evaluations (a new epoch). Updates are unsynchronised,
+    the numbers only need to be roughly right.
+    """
+    SAMPLE_EVERY = 16
+    REORDER_EVERY = 256
+    DEFAULT_COST_NS = 1000
+
+    def __init__(self, n_rules: int):
+        self.calls = [0] * n_rules
+        self.failures = [0] * n_rules
+        self.nanos = [0] * n_rules
+        self.timed = [0] * n_rules
+        self.evaluations = 0
+        self.epoch = 0
+
+    def tick(self) -> bool:
+        """Count one evaluation; returns True if this one should be timed."""
+        self.evaluations += 1
+        if self.evaluations % self.REORDER_EVERY == 0:
+            self.epoch += 1
+        return self.evaluations % self.SAMPLE_EVERY == 1
+
+    def cost(self, slot: int) -> float:
+        if not self.timed[slot]:
+            return self.DEFAULT_COST_NS
+        return self.nanos[slot] / self.timed[slot]
+
+    def fail_rate(self, slot: int) -> float:
+        # Laplace-smoothed so untried rules sit in the middle
+        return (self.failures[slot] + 1) / (self.calls[slot] + 2)
+
+    def ordered(self, group: CompiledGroup) -> Tuple[CompiledRule, ...]:
+        """
+        Rules of `group` cheapest-per-decision first: for ALL that is cost
+        per expected failure, for ANY cost per expected pass.
+        """
+        epoch, order = group.order
+        if epoch != self.epoch:
+            if group.logic == "ANY":
+                key = lambda r: self.cost(r.slot) / (1.0 - self.fail_rate(r.slot))
+            else:
+                key = lambda r: self.cost(r.slot) / self.fail_rate(r.slot)
+            order = tuple(sorted(group.rules, key=key))
+            group.order[:] = [self.epoch, order]
+        return order
+
+
+def _check(
+    rule: CompiledRule,
+    app: ApplicationProfile,
+    stats: RuleStats,
+    timed: bool,
+) -> Tuple[bool, Any]:
+    t0 = perf_counter_ns() if timed else 0
+    v = rule.accessor(app)
+    passed = rule.check(v)
+    if timed:
+        stats.nanos[rule.slot] += perf_counter_ns() - t0
+        stats.timed[rule.slot] += 1
+    stats.calls[rule.slot] += 1
+    if not passed:
+        stats.failures[rule.slot] += 1
+    return passed, v
+
+
+def _failed(rule: CompiledRule, v: Any) -> RuleResult:
+    return RuleResult.model_construct(
+        rule_id=rule.id,
+        passed=False,
+        severity=rule.severity,
+        message=rule.message,
+        field=rule.field,
+        expected=rule.expected,
+        actual=v,
+    )
+
+
+Failure = Tuple[CompiledRule, Any]
+
+
+def _holds(
+    group: CompiledGroup,
+    app: ApplicationProfile,
+    stats: RuleStats,
+    timed: bool,
+    failed: List[Failure],
+) -> bool:
+    """
+    Whether `group` is satisfied, honouring its ALL/ANY logic and stopping
+    as soon as the answer is known. Only HARD rules and subgroups that
+    contain one count: other rules neither fail nor satisfy a group, and a
+    group with nothing that counts holds. Failures that explain a False
+    answer go to `failed` as (rule, actual value).
+    """
+    if not group.has_hard:
+        return True
+
+    any_mode = group.logic == "ANY"
+    fails: List[Failure] = []
+
+    for r in stats.ordered(group):
+        if r.severity != "HARD":
+            continue
+        passed, v = _check(r, app, stats, timed)
+        if passed and any_mode:
+            return True
+        if not passed:
+            fails.append((r, v))
+            if not any_mode:
+                failed.extend(fails)
+                return False
+
+    for g in group.groups:
+        if not g.has_hard:
+            continue
+        held = _holds(g, app, stats, timed, fails)
+        if held and any_mode:
+            return True
+        if not held and not any_mode:
+            failed.extend(fails)
+            return False
+
+    if any_mode:
+        failed.extend(fails)
+        return False
+    return True
+
+
+def _screen(
+    plan: CompiledPolicy,
+    app: ApplicationProfile,
+) -> Tuple[bool, bool, float | None, List[Failure]]:
+    """(hard_fail, eligible, fit_score, failures) without building any RuleResult."""
+    stats = plan.stats
+    timed = stats.tick()
+
+    hard_failed: List[Failure] = []
+    if not _holds(plan.hard_rules, app, stats, timed, hard_failed):
+        return True, False, None, hard_failed
+
+    if not plan.soft_rules:
+        # no soft rules, treat as full score
+        return False, 100.0 >= plan.min_accept_score, 100.0, []
+
+    # every soft rule can feed the score or the reasons, so no early exit
+    soft_failed: List[Failure] = []
+    soft_passed: Dict[str, bool] = {}
+    for r in plan.soft_rules.all_rules():
+        v = r.accessor(app)
+        passed = r.check(v)
+        soft_passed[r.id] = passed
+        if not passed:
+            soft_failed.append((r, v))
+    score = _score(plan, soft_passed)
+    return False, score >= plan.min_accept_score, score, soft_failed
+
+
+@dataclass(frozen=True)
+class PlanSummary:
+    """
+    Compact outcome of a policy for one application: what most callers
+    need, plus the slots (CompiledRule.slot) of the failed rules and their
+    actual values, so the failures can be rebuilt later against the same
+    plan (expand_summary).
+    """
+    eligible: bool
+    fit_score: float | None
+    reasons: Tuple[str, ...]
+    failed: Tuple[int, ...]
+    actual: Tuple[Any, ...]
+
+
+def summarize_plan(
+    plan: CompiledPolicy,
+    app: ApplicationProfile,
+) -> PlanSummary:
+    """Short-circuit evaluation (see screen_plan) reduced to a PlanSummary."""
+    _, eligible, score, failed = _screen(plan, app)
+    return PlanSummary(
+        eligible=eligible,
+        fit_score=score,
+        reasons=tuple(r.message for r, _ in failed if r.message),
+        failed=tuple(r.slot for r, _ in failed),
+        actual=tuple(v for _, v in failed),
+    )
+
+
+def rejected_summary(plan: CompiledPolicy, slot: int, value: Any) -> PlanSummary:
+    """
+    PlanSummary of an application whose `value` fails decisive rule `slot`
+    (see threshold_index), without evaluating anything else.
+    """
+    rule = plan.rules[slot]
+    return PlanSummary(
+        eligible=False,
+        fit_score=None,
+        reasons=(rule.message,) if rule.message else (),
+        failed=(slot,),
+        actual=(value,),
+    )
+
+
+def expand_summary(
+    plan: CompiledPolicy,
+    failed: List[int],
+    actual: List[Any] | None,
+) -> Tuple[List[RuleResult], List[RuleResult]] | None:
+    """
+    Inverse of a PlanSummary's failed / actual: the hard and soft
+    RuleResults screen_plan reports for it. Rows stored before actual
+    values were recorded come back with actual=None. None if a slot isn't
+    in the plan.
+    """
+    if any(slot >= len(plan.rules) for slot in failed):
+        return None
+    actual = actual if actual is not None and len(actual) == len(failed) else [None] * len(failed)
+    n_hard = len(plan.hard_rules.all_rules())
+    results = [(slot, _failed(plan.rules[slot], v)) for slot, v in zip(failed, actual)]
+    return [r for slot, r in results if slot < n_hard], [r for slot, r in results if slot >= n_hard]
+
+
+def screen_plan(
+    plan: CompiledPolicy,
+    lender_id: int,
+    lender_program_id: int,
+    app: ApplicationProfile,
+) -> PolicyEvaluation:
+    """
+    Short-circuit counterpart of evaluate_plan for callers that don't need
+    an explanation. Hard rules are evaluated in cost/selectivity order and
+    evaluation stops at the first failure of an ALL group or first success
+    of an ANY group. Only failed rules are reported.
+
+    eligible and fit_score are those of evaluate_plan; on a hard failure
+    reasons list only the failures met before stopping.
+    """
+    hard_fail, eligible, score, failed = _screen(plan, app)
+    results = [_failed(r, v) for r, v in failed]
+    return PolicyEvaluation.model_construct(
+        lender_id=lender_id,
+        lender_program_id=lender_program_id,
+        eligible=eligible,
+        fit_score=score,
+        hard_rule_results=results if hard_fail else [],
+        soft_rule_results=[] if hard_fail else results,
+        reasons=[r.message for r in results if r.message],
+    )
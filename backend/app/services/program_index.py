@@ -0,0 +1,91 @@
+# app/services/program_index.py
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from app.models.lender_policy import LenderProgram
+from app.schemas.underwriting import RuleResult, PolicyEvaluation
+
+
+@dataclass(frozen=True)
+class _Bound:
+    """Sorted interval endpoints of one dimension (amount or term)."""
+    mins: List[float]
+    by_min: List[Tuple[int, float, float]]
+    maxs: List[float]
+    by_max: List[Tuple[int, float, float]]
+
+    @classmethod
+    def build(cls, ranges: Iterable[Tuple[int, float, float]]) -> "_Bound":
+        ranges = list(ranges)
+        by_min = sorted(ranges, key=lambda t: t[1])
+        by_max = sorted(ranges, key=lambda t: t[2])
+        return cls(
+            mins=[t[1] for t in by_min],
+            by_min=by_min,
+            maxs=[t[2] for t in by_max],
+            by_max=by_max,
+        )
+
+    def outside(self, x: float) -> List[Tuple[int, float, float]]:
+        """Programs whose [min, max] does not contain x."""
+        below = self.by_min[bisect_right(self.mins, x):]   # min > x
+        above = self.by_max[:bisect_left(self.maxs, x)]    # max < x
+        return below + above
+
+
+class ProgramIndex:
+    """
+    Interval index over LenderProgram amount and term ranges, used to drop
+    programs that can't take a request before any policy rule runs. Built
+    with each catalog generation (services.catalog), so every process sees
+    program changes on its next run.
+    """
+
+    def __init__(self, programs: Iterable[LenderProgram]):
+        programs = list(programs)
+        self.amount = _Bound.build((p.id, p.min_amount, p.max_amount) for p in programs)
+        self.term = _Bound.build((p.id, p.min_term_months, p.max_term_months) for p in programs)
+
+    def excluded(self, amount: float | None, term_months: int | None) -> Dict[int, List[RuleResult]]:
+        """program id -> failed range checks, for programs that exclude the request."""
+        out: Dict[int, List[RuleResult]] = {}
+        if amount is not None:
+            for pid, lo, hi in self.amount.outside(amount):
+                out.setdefault(pid, []).append(RuleResult(
+                    rule_id="program_amount_range",
+                    passed=False,
+                    severity="HARD",
+                    message=f"Loan amount {amount:,.0f} outside program range {lo:,}-{hi:,}",
+                    field="loan.amount",
+                    expected={"between": [lo, hi]},
+                    actual=amount,
+                ))
+        if term_months is not None:
+            for pid, lo, hi in self.term.outside(term_months):
+                out.setdefault(pid, []).append(RuleResult(
+                    rule_id="program_term_range",
+                    passed=False,
+                    severity="HARD",
+                    message=f"Term of {term_months} months outside program range {lo}-{hi} months",
+                    field="loan.term_months",
+                    expected={"between": [lo, hi]},
+                    actual=term_months,
+                ))
+        return out
+
+
+def out_of_range_evaluation(
+    lender_id: int,
+    lender_program_id: int,
+    failures: List[RuleResult],
+) -> PolicyEvaluation:
+    return PolicyEvaluation(
+        lender_id=lender_id,
+        lender_program_id=lender_program_id,
+        eligible=False,
+        fit_score=None,
+        hard_rule_results=failures,
+        soft_rule_results=[],
+        reasons=[r.message for r in failures],
+    )
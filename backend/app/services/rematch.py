@@ -0,0 +1,305 @@
+# app/services/rematch.py
+import logging
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models.lender_policy import LenderPolicy, PolicyRematch
+from app.models.match_result import MatchRun, MatchResult
+from app.services.policy_engine import ApplicationProfile
+from app.services.policy_plan import (
+    CompiledGroup,
+    CompiledPolicy,
+    CompiledRule,
+    evaluate_plan,
+    plan_cache,
+)
+from app.services.catalog import policy_catalog
+from app.services.program_index import out_of_range_evaluation
+from app.services.analytics import AggregateDeltas
+from app.services.explain import (
+    PolicyVersionKey,
+    compact_rule_results,
+    load_plans,
+    plan_matches,
+    policy_version,
+    verbose_rule_results,
+)
+from app.services.result_payload import payload_row, render_rows, save_payloads
+from app.services.underwriting import ApplicationModels, load_application_batch, profile_from_models, save_results
+
+CHUNK_SIZE = 500
+ERROR_MAX_LENGTH = 500
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RematchReport:
+    policy_id: int
+    lender_program_id: int
+    examined: int = 0      # applications with a stored result for the program
+    skipped: int = 0       # changed rules give the same outcome, not re-evaluated
+    reevaluated: int = 0
+    flipped: int = 0       # eligibility or fit score differs, new run written
+
+    def dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+RulePair = Tuple[str, CompiledRule | None, CompiledRule | None]
+
+
+def _signature(rule: CompiledRule) -> Tuple:
+    # message is left out: it changes reasons, not outcomes
+    return (rule.type, rule.field, rule.severity, repr(sorted(rule.params.items())))
+
+
+def _shape(group: CompiledGroup) -> Tuple:
+    return group.logic, tuple(r.id for r in group.rules), tuple(_shape(g) for g in group.groups)
+
+
+def diff_plans(old: CompiledPolicy, new: CompiledPolicy) -> List[RulePair] | None:
+    """
+    Rules whose definition changed between two compiled versions of a policy,
+    as (tree, old rule, new rule) paired by rule id within the hard / soft
+    tree. Returns None when the change isn't confined to individual rules
+    (scoring config, hard tree grouping or ALL/ANY logic, soft tree
+    added/removed, ambiguous duplicate ids), in which case every
+    application has to be re-evaluated.
+    """
+    scoring = lambda p: (p.base_score, p.min_accept_score, p.deductions, p.soft_rules is None)
+    if scoring(old) != scoring(new) or _shape(old.hard_rules) != _shape(new.hard_rules):
+        return None
+
+    pairs: List[RulePair] = []
+    for tree in ("hard", "soft"):
+        old_group = old.hard_rules if tree == "hard" else old.soft_rules
+        new_group = new.hard_rules if tree == "hard" else new.soft_rules
+        old_rules = old_group.all_rules() if old_group else []
+        new_rules = new_group.all_rules() if new_group else []
+        old_by_id = {r.id: r for r in old_rules}
+        new_by_id = {r.id: r for r in new_rules}
+        if len(old_by_id) != len(old_rules) or len(new_by_id) != len(new_rules):
+            return None
+        for rid in old_by_id.keys() | new_by_id.keys():
+            o, n = old_by_id.get(rid), new_by_id.get(rid)
+            if o is None or n is None or _signature(o) != _signature(n):
+                pairs.append((tree, o, n))
+    return pairs
+
+
+def _effect(tree: str, rule: CompiledRule | None, app: ApplicationProfile) -> bool:
+    """Whether the rule counts against `app`: a HARD failure in the hard tree, any failure in the soft tree."""
+    if rule is None or rule.check(rule.accessor(app)):
+        return False
+    return tree == "soft" or rule.severity == "HARD"
+
+
+def is_affected(pairs: List[RulePair] | None, app: ApplicationProfile) -> bool:
+    if pairs is None:
+        return True
+    return any(_effect(tree, o, app) != _effect(tree, n, app) for tree, o, n in pairs)
+
+
+def rematch_policy(db: Session, policy_id: int) -> RematchReport:
+    """
+    Re-match only the applications whose outcome can change after a policy
+    update. For every loan request whose latest result for the policy's
+    program was stored, the rules that differ between the policy version
+    that result was evaluated with (from the archive, see
+    LenderPolicyVersion) and the current one are evaluated under both
+    definitions; only where they differ is the program re-evaluated. Rows
+    whose version can't be matched (verbose rows, missing archive) are
+    always re-evaluated. Where eligibility or fit score changes the
+    application gets a new COMPLETE run (see _write_runs); stored runs are
+    never modified.
+    """
+    policy: LenderPolicy = db.query(LenderPolicy).filter(LenderPolicy.id == policy_id).one()
+    report = RematchReport(policy_id=policy_id, lender_program_id=policy.lender_program_id)
+    if not policy.is_active or not policy.program.lender.active:
+        # not in the catalog, underwriting doesn't evaluate it
+        return report
+
+    new_plan = plan_cache.get(policy)
+
+    latest_ids = (
+        db.query(func.max(MatchResult.id))
+        .join(MatchRun, MatchRun.id == MatchResult.match_run_id)
+        .filter(MatchResult.lender_program_id == policy.lender_program_id, MatchRun.status == "COMPLETE")
+        .group_by(MatchRun.loan_request_id)
+        .scalar_subquery()
+    )
+    rows = (
+        db.query(
+            MatchResult.id,
+            MatchResult.match_run_id,
+            MatchResult.lender_id,
+            MatchResult.lender_program_id,
+            MatchResult.eligible,
+            MatchResult.fit_score,
+            MatchResult.rule_results,
+            MatchRun.loan_request_id,
+            MatchRun.explain,
+        )
+        .join(MatchRun, MatchRun.id == MatchResult.match_run_id)
+        .filter(MatchResult.id.in_(latest_ids))
+        .order_by(MatchResult.id)
+        .all()
+    )
+
+    index = policy_catalog.get(db).programs
+    models: Dict[int, ApplicationModels] = {}
+    # stored result id -> (its row, the result replacing it)
+    flipped: Dict[int, Tuple[Any, Dict[str, Any]]] = {}
+    plans: Dict[PolicyVersionKey, CompiledPolicy | None] = {}
+    # stored version -> rules changed since (None: re-evaluate everything)
+    diffs: Dict[PolicyVersionKey, List[RulePair] | None] = {}
+    for i, old in enumerate(rows, start=1):
+        if old.loan_request_id not in models:
+            # profiles and stored versions for the next chunk of rows, loaded together
+            chunk = rows[i - 1:i - 1 + CHUNK_SIZE]
+            models = load_application_batch(db, (r.loan_request_id for r in chunk))
+            keys = {policy_version(r.rule_results) for r in chunk} - {None} - plans.keys()
+            if keys:
+                plans.update(load_plans(db, keys))
+        report.examined += 1
+        app = profile_from_models(*models[old.loan_request_id])
+
+        key = policy_version(old.rule_results)
+        pairs = None
+        if key is not None and plan_matches(plans[key], old.rule_results):
+            if key not in diffs:
+                diffs[key] = diff_plans(plans[key], new_plan)
+            pairs = diffs[key]
+        if not is_affected(pairs, app):
+            report.skipped += 1
+            continue
+
+        report.reevaluated += 1
+        excluded = index.excluded(app.loan_request.get("amount"), app.loan_request.get("term_months"))
+        if old.lender_program_id in excluded:
+            result = out_of_range_evaluation(old.lender_id, old.lender_program_id, excluded[old.lender_program_id])
+        else:
+            result = evaluate_plan(new_plan, old.lender_id, old.lender_program_id, app)
+
+        if (result.eligible, result.fit_score) != (old.eligible, old.fit_score):
+            report.flipped += 1
+            flipped[old.id] = (old, dict(
+                lender_id=old.lender_id,
+                lender_program_id=old.lender_program_id,
+                eligible=result.eligible,
+                fit_score=result.fit_score,
+                reasons=list(result.reasons),
+                rule_results=(
+                    verbose_rule_results(result.hard_rule_results, result.soft_rule_results)
+                    if old.lender_program_id in excluded
+                    else compact_rule_results(policy, new_plan, result)
+                ),
+            ))
+
+        if i % CHUNK_SIZE == 0:
+            _write_runs(db, flipped, plans)
+            flipped = {}
+            db.commit()
+
+    _write_runs(db, flipped, plans)
+    db.commit()
+    return report
+
+
+def _write_runs(
+    db: Session,
+    flipped: Dict[int, Tuple[Any, Dict[str, Any]]],
+    plans: Dict[PolicyVersionKey, CompiledPolicy | None],
+) -> None:
+    """
+    A new COMPLETE run per flipped application holding the results of the
+    run the stored result came from, with that one replaced. Results,
+    payloads and aggregates are written in the caller's transaction; the
+    new runs count on today's aggregates like any run completing today.
+    """
+    if not flipped:
+        return
+    now = datetime.utcnow()
+    replaced = {old.match_run_id: (result_id, row) for result_id, (old, row) in flipped.items()}
+    runs = {
+        old.match_run_id: MatchRun(
+            loan_request_id=old.loan_request_id, status="COMPLETE", explain=old.explain, attempts=1,
+            created_at=now, started_at=now, completed_at=now,
+        )
+        for old, _ in flipped.values()
+    }
+    db.add_all(runs.values())
+    db.flush()  # run ids
+
+    results = MatchResult.__table__
+    copied: Dict[int, List[Dict[str, Any]]] = {}
+    for r in db.execute(select(results).where(results.c.match_run_id.in_(runs)).order_by(results.c.id)):
+        row = dict(r._mapping)
+        result_id, old_run_id = row.pop("id"), row["match_run_id"]
+        replaced_id, replacement = replaced[old_run_id]
+        if result_id == replaced_id:
+            row = dict(replacement)
+        row["match_run_id"] = runs[old_run_id].id
+        copied.setdefault(old_run_id, []).append(row)
+
+    keys = {policy_version(row["rule_results"]) for rows in copied.values() for row in rows} - {None}
+    if keys - plans.keys():
+        plans.update(load_plans(db, keys - plans.keys()))
+
+    deltas = AggregateDeltas()
+    payloads: List[Dict[str, Any]] = []
+    for old_run_id, rows in copied.items():
+        row_plans = [plans.get(policy_version(row["rule_results"])) for row in rows]
+        for row, plan in zip(rows, row_plans):
+            deltas.add(now.date(), row, plan)
+        if all(
+            plan_matches(plan, row["rule_results"]) or not policy_version(row["rule_results"])
+            for row, plan in zip(rows, row_plans)
+        ):
+            payloads.append(payload_row(runs[old_run_id].id, render_rows(rows, row_plans)))
+
+    save_results(db, [row for rows in copied.values() for row in rows])
+    save_payloads(db, payloads)
+    deltas.flush(db)
+
+
+def run_rematch_job(rematch_id: int, policy_id: int) -> RematchReport | None:
+    """
+    Background-task entry point: own session; progress and the final
+    report are stored on the PolicyRematch row `rematch_id`.
+    """
+    db = SessionLocal()
+    try:
+        db.execute(update(PolicyRematch).where(PolicyRematch.id == rematch_id).values(status="RUNNING"))
+        db.commit()
+        try:
+            report = rematch_policy(db, policy_id)
+        except Exception as e:
+            db.rollback()
+            logger.exception("Rematch %s for policy %s failed", rematch_id, policy_id)
+            error = f"{type(e).__name__}: {e}"[:ERROR_MAX_LENGTH]
+            db.execute(
+                update(PolicyRematch)
+                .where(PolicyRematch.id == rematch_id)
+                .values(status="FAILED", error=error, completed_at=datetime.utcnow())
+            )
+            db.commit()
+            return None
+
+        counts = {k: v for k, v in report.dict().items() if k in ("examined", "skipped", "reevaluated", "flipped")}
+        db.execute(
+            update(PolicyRematch)
+            .where(PolicyRematch.id == rematch_id)
+            .values(status="COMPLETE", completed_at=datetime.utcnow(), **counts)
+        )
+        db.commit()
+        logger.info("Rematch %s for policy %s: %s", rematch_id, policy_id, report.dict())
+        return report
+    finally:
+        db.close()
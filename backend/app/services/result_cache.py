@@ -0,0 +1,82 @@
+# app/services/result_cache.py
+import copy
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, List, Tuple
+
+from app.services.field_paths import PackedProfile
+
+DEFAULT_SIZE = int(os.getenv("UNDERWRITING_RESULT_CACHE_SIZE", "1024"))
+
+Rows = List[Dict[str, Any]]
+
+
+class ResultCache:
+    """
+    LRU of evaluated MatchResult rows keyed by application fingerprint and
+    policy-set generation. The fingerprint is the packed profile (every
+    field an active policy reads) plus amount and term for the program
+    range check, so two applications that no policy can tell apart share
+    an entry. A new generation makes older entries unreachable; they age
+    out of the LRU.
+
+    Rows hold nested reasons and rule_results, so they are deep-copied on
+    the way in and out: no caller shares a mutable object with the cache.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._rows: "OrderedDict[Hashable, Rows]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key(generation: int, explain: bool, amount, term_months, profile: PackedProfile) -> Tuple | None:
+        key = (generation, explain, amount, term_months, profile.values)
+        try:
+            hash(key)
+        except TypeError:
+            # a field resolved to a dict or list, don't cache
+            return None
+        return key
+
+    def get(self, key: Tuple | None, match_run_id: int) -> Rows | None:
+        """Deep copies of the cached rows for `match_run_id`, or None on a miss."""
+        if key is None or self.maxsize <= 0:
+            return None
+        with self._lock:
+            rows = self._rows.get(key)
+            if rows is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(key)
+            self.hits += 1
+        rows = copy.deepcopy(rows)
+        for r in rows:
+            r["match_run_id"] = match_run_id
+        return rows
+
+    def put(self, key: Tuple | None, rows: Rows) -> None:
+        if key is None or self.maxsize <= 0:
+            return
+        rows = copy.deepcopy(rows)
+        with self._lock:
+            self._rows[key] = rows
+            self._rows.move_to_end(key)
+            while len(self._rows) > self.maxsize:
+                self._rows.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._rows), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+result_cache = ResultCache()
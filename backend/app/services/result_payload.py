@@ -0,0 +1,92 @@
+# app/services/result_payload.py
+import hashlib
+from typing import Any, Dict, Iterable, List
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.match_result import MatchRunPayload
+from app.schemas.underwriting import PolicyEvaluation
+from app.services.explain import expand_row, policy_version, verbose_rule_results
+from app.services.policy_plan import CompiledPolicy
+
+# Completed runs don't change (a rematch writes new runs), so the
+# /matches/by-run body is rendered once and served as stored bytes with an
+# ETag.
+
+payloads = MatchRunPayload.__table__
+
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header names `etag`: the header is a
+    comma-separated list of entity tags (or "*"), compared whole and
+    weakly, i.e. ignoring a W/ prefix.
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def render(evaluations: Iterable[Dict[str, Any]]) -> bytes:
+    return orjson.dumps(list(evaluations))
+
+
+def _detail(row: Dict[str, Any], plan: CompiledPolicy | None) -> Dict[str, Any]:
+    rule_results = row["rule_results"]
+    if policy_version(rule_results) is None:
+        return rule_results
+    # as ResultExplainer: rows that don't match their plan keep only reasons
+    return verbose_rule_results(*(expand_row(plan, rule_results) or ([], [])))
+
+
+def render_rows(rows: List[Dict[str, Any]], plans: List[CompiledPolicy]) -> bytes:
+    """
+    Body for MatchResult rows (see evaluate_policies), one per plan they
+    were evaluated with (None for verbose rows).
+    """
+    details = [_detail(r, plan) for r, plan in zip(rows, plans)]
+    return render(
+        {
+            "lender_id": r["lender_id"],
+            "lender_program_id": r["lender_program_id"],
+            "eligible": r["eligible"],
+            "fit_score": r["fit_score"],
+            "hard_rule_results": d["hard"],
+            "soft_rule_results": d["soft"],
+            "reasons": r["reasons"],
+        }
+        for r, d in zip(rows, details)
+    )
+
+
+def render_evaluations(evaluations: List[PolicyEvaluation]) -> bytes:
+    return render(e.dict() for e in evaluations)
+
+
+def payload_row(match_run_id: int, body: bytes) -> Dict[str, Any]:
+    return {"match_run_id": match_run_id, "etag": body_etag(body), "body": body}
+
+
+def save_payloads(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """Insert payload_row()s in the caller's transaction, one executemany."""
+    if rows:
+        db.execute(payloads.insert(), rows)
+
+
+def stored_etag(db: Session, match_run_id: int) -> str | None:
+    return db.execute(select(payloads.c.etag).where(payloads.c.match_run_id == match_run_id)).scalar()
+
+
+def stored_payload(db: Session, match_run_id: int):
+    """(etag, body) row or None; Core only, no ORM objects are built."""
+    return db.execute(
+        select(payloads.c.etag, payloads.c.body).where(payloads.c.match_run_id == match_run_id)
+    ).first()
@@ -0,0 +1,257 @@
+# app/services/simulation.py
+import argparse
+import json
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import SessionLocal
+from app.models.lender_policy import LenderPolicy, LenderProgram
+from app.models.loan_request import LoanRequest
+from app.services.batch_engine import ApplicationBlock, BatchEvaluation, evaluate_policy_batch
+from app.services.policy_engine import ApplicationProfile
+from app.services.policy_plan import CompiledPolicy, compile_policy, group_holds
+from app.services.underwriting import application_models, profile_from_models
+
+DEFAULT_CHUNK_SIZE = 1000
+HISTOGRAM_BIN = 10
+
+
+@dataclass
+class SimulationTotals:
+    """Mergeable counters produced per chunk by the workers."""
+    examined: int = 0
+    baseline_approved: int = 0
+    candidate_approved: int = 0
+    newly_approved: int = 0
+    newly_declined: int = 0
+    baseline_scores: Counter = field(default_factory=Counter)
+    candidate_scores: Counter = field(default_factory=Counter)
+    rule_changes: Counter = field(default_factory=Counter)
+
+    def merge(self, other: "SimulationTotals") -> None:
+        self.examined += other.examined
+        self.baseline_approved += other.baseline_approved
+        self.candidate_approved += other.candidate_approved
+        self.newly_approved += other.newly_approved
+        self.newly_declined += other.newly_declined
+        self.baseline_scores.update(other.baseline_scores)
+        self.candidate_scores.update(other.candidate_scores)
+        self.rule_changes.update(other.rule_changes)
+
+    def dict(self, top_rules: int = 10) -> Dict[str, Any]:
+        return {
+            "examined": self.examined,
+            "baseline_approved": self.baseline_approved,
+            "candidate_approved": self.candidate_approved,
+            "newly_approved": self.newly_approved,
+            "newly_declined": self.newly_declined,
+            "baseline_score_histogram": dict(sorted(self.baseline_scores.items())),
+            "candidate_score_histogram": dict(sorted(self.candidate_scores.items())),
+            # ties by rule id: chunks are merged in completion order
+            "top_changed_rules": [
+                {"rule_id": rid, "count": n}
+                for rid, n in sorted(self.rule_changes.items(), key=lambda kv: (-kv[1], kv[0]))[:top_rules]
+            ],
+        }
+
+
+def _bucket(score: float | None) -> str:
+    if score is None:
+        return "hard_fail"
+    lo = int(score // HISTOGRAM_BIN) * HISTOGRAM_BIN
+    return f"{lo:03d}-{lo + HISTOGRAM_BIN:03d}"
+
+
+def _counted_rules(plan: CompiledPolicy, ev: BatchEvaluation, j: int) -> Set[str]:
+    """
+    Rule ids that count against application `j` of a batch evaluation: the
+    HARD rules behind a hard failure, by the tree's ALL/ANY logic (a failed
+    rule inside an ANY group that held doesn't count), else the failed
+    soft rules.
+    """
+    passed = ev.passed[:, j]
+    if ev.hard_fail[j]:
+        failed: List[int] = []
+        group_holds(plan.hard_rules, passed, failed)
+        return {plan.rules[slot].id for slot in failed if plan.rules[slot].severity == "HARD"}
+    if not plan.soft_rules:
+        return set()
+    return {r.id for r in plan.soft_rules.all_rules() if not passed[r.slot]}
+
+
+# ---------------------------------------------------------------------------
+# Worker side: plans are compiled once per process in the initializer. A
+# chunk is scored with the array engine (batch_engine); the rules behind a
+# changed outcome are read from the same rule outcomes.
+# ---------------------------------------------------------------------------
+
+_baseline: CompiledPolicy | None = None
+_candidate: CompiledPolicy | None = None
+_bounds: Tuple[float, float, int, int] | None = None
+_fields: Set[str | None] = set()
+
+
+def _init_worker(
+    baseline_json: Dict[str, Any] | None,
+    candidate_json: Dict[str, Any],
+    bounds: Tuple[float, float, int, int],
+) -> None:
+    global _baseline, _candidate, _bounds, _fields
+    _baseline = compile_policy(baseline_json) if baseline_json else None
+    _candidate = compile_policy(candidate_json)
+    _bounds = bounds
+    _fields = {r.field for plan in (_baseline, _candidate) if plan for r in plan.rules}
+
+
+def _in_range(app: ApplicationProfile) -> bool:
+    min_amt, max_amt, min_term, max_term = _bounds
+    amount, term = app.loan_request.get("amount"), app.loan_request.get("term_months")
+    return min_amt <= amount <= max_amt and min_term <= term <= max_term
+
+
+def _simulate_chunk(profiles: List[ApplicationProfile]) -> SimulationTotals:
+    totals = SimulationTotals(examined=len(profiles))
+    apps = [app for app in profiles if _in_range(app)]
+    # out of the program's range under either policy
+    totals.baseline_scores["out_of_range"] += len(profiles) - len(apps)
+    totals.candidate_scores["out_of_range"] += len(profiles) - len(apps)
+    if not apps:
+        return totals
+
+    block = ApplicationBlock.from_profiles(apps, _fields)
+    cand = evaluate_policy_batch(_candidate, block)
+    base = evaluate_policy_batch(_baseline, block) if _baseline else None
+    base_ok = base.eligible if base else np.zeros(len(apps), dtype=bool)
+
+    totals.baseline_scores.update(map(_bucket, base.scores() if base else [None] * len(apps)))
+    totals.candidate_scores.update(map(_bucket, cand.scores()))
+    totals.baseline_approved += int(base_ok.sum())
+    totals.candidate_approved += int(cand.eligible.sum())
+
+    for j in np.flatnonzero(cand.eligible & ~base_ok):
+        totals.newly_approved += 1
+        if _baseline:
+            totals.rule_changes.update(_counted_rules(_baseline, base, j) - _counted_rules(_candidate, cand, j))
+    for j in np.flatnonzero(base_ok & ~cand.eligible):
+        totals.newly_declined += 1
+        totals.rule_changes.update(_counted_rules(_candidate, cand, j) - _counted_rules(_baseline, base, j))
+    return totals
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+def iter_profile_chunks(
+    db: Session,
+    since: date,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[List[ApplicationProfile]]:
+    """
+    Historical application profiles in id order, one chunk at a time
+    (keyset paging, three queries per chunk), so memory stays bounded.
+    """
+    last_id = 0
+    while True:
+        lrs: List[LoanRequest] = (
+            db.query(LoanRequest)
+            .options(joinedload(LoanRequest.borrower))
+            .filter(LoanRequest.created_at >= since, LoanRequest.id > last_id)
+            .order_by(LoanRequest.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not lrs:
+            return
+        yield [profile_from_models(*models) for models in application_models(db, lrs)]
+        last_id = lrs[-1].id
+        db.expunge_all()
+
+
+def simulate_policy(
+    db: Session,
+    lender_program_id: int,
+    candidate_policy_json: Dict[str, Any],
+    since: date | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+) -> Dict[str, Any]:
+    """
+    What-if run of a candidate policy for a program against historical
+    loan requests, compared with the program's currently active policy.
+    Read-only: no MatchRun / MatchResult rows are written. At most
+    2 x workers chunks are in flight, whatever the history size.
+    """
+    program: LenderProgram = db.query(LenderProgram).filter(LenderProgram.id == lender_program_id).one()
+    active: LenderPolicy | None = (
+        db.query(LenderPolicy)
+        .filter(LenderPolicy.lender_program_id == lender_program_id, LenderPolicy.is_active == True)
+        .order_by(LenderPolicy.version.desc())
+        .first()
+    )
+    # validate up front so a bad candidate fails before the pool starts
+    compile_policy(candidate_policy_json)
+
+    since = since or date.today() - timedelta(days=365)
+    workers = workers or os.cpu_count() or 1
+    bounds = (program.min_amount, program.max_amount, program.min_term_months, program.max_term_months)
+
+    totals = SimulationTotals()
+    pending: Set[Future] = set()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(active.policy_json if active else None, candidate_policy_json, bounds),
+    ) as pool:
+        for chunk in iter_profile_chunks(db, since, chunk_size):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    totals.merge(f.result())
+            pending.add(pool.submit(_simulate_chunk, chunk))
+        for f in pending:
+            totals.merge(f.result())
+
+    result = totals.dict()
+    result.update(
+        lender_program_id=lender_program_id,
+        baseline_policy_id=active.id if active else None,
+        since=since,
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a candidate policy against historical applications")
+    parser.add_argument("--program", type=int, required=True, help="lender_program_id")
+    parser.add_argument("--policy", required=True, help="path to candidate policy_json file")
+    parser.add_argument("--since", type=date.fromisoformat, default=None)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.policy) as f:
+        candidate = json.load(f)
+
+    db = SessionLocal()
+    try:
+        result = simulate_policy(db, args.program, candidate, args.since, args.chunk_size, args.workers)
+    finally:
+        db.close()
+    print(json.dumps(result, indent=2, default=str))
+
+
+# ----------------------------------------------------
+# RUN DIRECTLY: python -m app.services.simulation --program 1 --policy candidate.json
+# ----------------------------------------------------
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# app/services/threshold_index.py
+from bisect import bisect_left, bisect_right
+from numbers import Number
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.services.policy_engine import ApplicationProfile
+from app.services.field_paths import PackedProfile, ProfileLayout, compile_field
+from app.services.policy_plan import CompiledPolicy, decisive_rules
+
+# (rule slot, applicant's value) of the indexed rule that rejects a policy
+Rejection = Tuple[int, Any]
+
+
+def _is_number(v: Any) -> bool:
+    return isinstance(v, Number) and not isinstance(v, complex)
+
+
+class ThresholdIndex:
+    """
+    Cross-policy index of the MIN_VALUE / MAX_VALUE rules that decide a
+    policy on their own: HARD rules reached from the root of the hard tree
+    through ALL groups only (see decisive_rules).
+
+    Thresholds are sorted per (field, kind), so the rules an applicant's
+    value fails form one contiguous run of each sorted list:
+    - MIN_VALUE: from bisect_right(mins, v) to the end
+    - MAX_VALUE: from the start up to bisect_left(maxs, v)
+    A probe bisects once per field and walks only those runs, so a policy
+    rejected by a threshold is settled without visiting any of its rules.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[int, CompiledPolicy]]):
+        self.entries = list(entries)
+
+        buckets: Dict[Tuple[str, str], List[Tuple[Any, int, int]]] = {}
+        for key, plan in self.entries:
+            for r in decisive_rules(plan):
+                if r.type not in ("MIN_VALUE", "MAX_VALUE") or r.field is None:
+                    continue
+                threshold = r.params["min"] if r.type == "MIN_VALUE" else r.params["max"]
+                if not _is_number(threshold):
+                    continue
+                buckets.setdefault((r.field, r.type), []).append((threshold, key, r.slot))
+
+        self.thresholds: Dict[Tuple[str, str], List[Any]] = {}
+        # (field, kind) -> (policy key, slot) in threshold order
+        self.rules: Dict[Tuple[str, str], List[Tuple[int, int]]] = {}
+        for fk, items in buckets.items():
+            items.sort(key=lambda t: t[0])
+            self.thresholds[fk] = [t[0] for t in items]
+            self.rules[fk] = [(key, slot) for _, key, slot in items]
+
+        self.accessors = {f: compile_field(f) for f in {fk[0] for fk in self.thresholds}}
+
+    def probe(self, app: ApplicationProfile | PackedProfile, layout: ProfileLayout | None = None) -> "ThresholdProbe":
+        """Probe a profile, or a PackedProfile of `layout`."""
+        if layout is None:
+            values = {f: get(app) for f, get in self.accessors.items()}
+        else:
+            values = {f: layout.get(app, f) for f in self.accessors}
+
+        rejected: Dict[int, Rejection] = {}
+        for (field, kind), ts in self.thresholds.items():
+            v = values[field]
+            rules = self.rules[(field, kind)]
+            if v is None:
+                # a missing value fails every threshold
+                failing = rules
+            elif not _is_number(v) or v != v:
+                # left to the rule's own comparator; NaN passes both kinds
+                continue
+            elif kind == "MIN_VALUE":
+                failing = rules[bisect_right(ts, v):]
+            else:
+                failing = rules[:bisect_left(ts, v)]
+            for key, slot in failing:
+                rejected.setdefault(key, (slot, v))
+        return ThresholdProbe(rejected)
+
+
+class ThresholdProbe:
+    """The policies one application's values reject outright."""
+
+    def __init__(self, rejected: Dict[int, Rejection]):
+        self._rejected = rejected
+
+    def rejection(self, key: int) -> Rejection | None:
+        """(slot, value) of an indexed rule policy `key` fails, or None."""
+        return self._rejected.get(key)
+
+    def __len__(self) -> int:
+        return len(self._rejected)
+
+
+_shared: Tuple[Tuple, ThresholdIndex] | None = None
+
+
+def shared_index(entries: List[Tuple[int, CompiledPolicy]]) -> ThresholdIndex:
+    """
+    Index over the given (policy id, plan) pairs, rebuilt only when the set
+    of plans changes. Plans come from plan_cache, so identity changes
+    whenever a policy is recompiled.
+    """
+    global _shared
+    sig = tuple((k, id(plan)) for k, plan in entries)
+    cached = _shared
+    if cached is not None and cached[0] == sig:
+        return cached[1]
+    index = ThresholdIndex(entries)
+    _shared = (sig, index)
+    return index
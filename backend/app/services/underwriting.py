@@ -1,141 +1,259 @@
 # app/services/underwriting.py
-from sqlalchemy.orm import Session
-from typing import List, Dict, Any
-from datetime import date
+from datetime import datetime
+
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Dict, Any, Iterable, Tuple
 
 from app.models.borrower import Borrower
 from app.models.guarantor import Guarantor
 from app.models.business_credit import BusinessCredit
 from app.models.loan_request import LoanRequest
-from app.models.lender_policy import LenderPolicy, LenderProgram, Lender
 from app.models.match_result import MatchRun, MatchResult
 
-from app.schemas.lender_policy import PolicyJson
-from app.services.policy_engine import (
-    ApplicationProfile,
-    evaluate_policy,
-)
+from app.services.policy_engine import ApplicationProfile
+from app.services.field_paths import PROFILE_FIELDS, PackedProfile, ProfileLayout
+from app.services.derived_features import DerivedFeatures, FeatureInputs
+from app.services.policy_plan import CompiledPolicy, evaluate_plan, rejected_summary, summarize_plan
+from app.services.threshold_index import ThresholdProbe
+from app.services.program_index import out_of_range_evaluation
+from app.services.catalog import ActivePolicy, ActivePolicySet, policy_catalog
+from app.services.explain import compact_rule_results, summary_rule_results, verbose_rule_results
+from app.services.result_cache import result_cache
+from app.services.analytics import record_results
+from app.services.result_payload import payload_row, render_rows, save_payloads
+from app.schemas.underwriting import RuleResult
 
 
-def build_application_profile(
-    db: Session,
-    loan_request_id: int,
-) -> ApplicationProfile:
-    lr: LoanRequest = db.query(LoanRequest).filter(LoanRequest.id == loan_request_id).one()
-    borrower: Borrower = lr.borrower
-    guarantors: List[Guarantor] = borrower.guarantors
-    bc: BusinessCredit | None = (
-        db.query(BusinessCredit)
-        .filter(BusinessCredit.borrower_id == borrower.id)
-        .one_or_none()
+ApplicationModels = Tuple[LoanRequest, Borrower, List[Guarantor], BusinessCredit | None]
+
+
+def application_models(db: Session, lrs: List[LoanRequest]) -> List[ApplicationModels]:
+    """
+    Guarantors and business credit for loan requests whose borrower is
+    already loaded, keyed by borrower id: two queries however many
+    loan requests there are.
+    """
+    borrower_ids = {lr.borrower_id for lr in lrs}
+    if not borrower_ids:
+        return []
+
+    guarantors: Dict[int, List[Guarantor]] = {}
+    for g in db.query(Guarantor).filter(Guarantor.borrower_id.in_(borrower_ids)).order_by(Guarantor.id):
+        guarantors.setdefault(g.borrower_id, []).append(g)
+
+    credit: Dict[int, BusinessCredit] = {}
+    for bc in db.query(BusinessCredit).filter(BusinessCredit.borrower_id.in_(borrower_ids)).order_by(BusinessCredit.id):
+        credit.setdefault(bc.borrower_id, bc)
+
+    return [
+        (lr, lr.borrower, guarantors.get(lr.borrower_id, []), credit.get(lr.borrower_id))
+        for lr in lrs
+    ]
+
+
+def load_application_batch(db: Session, loan_request_ids: Iterable[int]) -> Dict[int, ApplicationModels]:
+    """loan_request_id -> models, in three queries; missing ids are left out."""
+    ids = set(loan_request_ids)
+    if not ids:
+        return {}
+    lrs: List[LoanRequest] = (
+        db.query(LoanRequest)
+        .options(joinedload(LoanRequest.borrower))
+        .filter(LoanRequest.id.in_(ids))
+        .all()
     )
+    return {models[0].id: models for models in application_models(db, lrs)}
+
+
+def load_application_models(db: Session, loan_request_id: int) -> ApplicationModels:
+    models = load_application_batch(db, [loan_request_id]).get(loan_request_id)
+    if models is None:
+        raise NoResultFound(f"Loan request {loan_request_id} not found")
+    return models
 
-    # Basic dicts
-    b_dict: Dict[str, Any] = {
-        "business_name": borrower.business_name,
-        "industry": borrower.industry,
-        "state": borrower.state,
-        "years_in_business": borrower.years_in_business,
-        "annual_revenue": borrower.annual_revenue,
-    }
+
+def profile_from_models(
+    lr: LoanRequest,
+    borrower: Borrower,
+    guarantors: List[Guarantor],
+    bc: BusinessCredit | None,
+) -> ApplicationProfile:
+    # Basic dicts, fields as listed in field_paths.PROFILE_FIELDS
+    b_dict: Dict[str, Any] = {k: getattr(borrower, k) for k in PROFILE_FIELDS["borrower"]}
 
     g_dicts: List[Dict[str, Any]] = [
-        {
-            "name": g.name,
-            "fico_score": g.fico_score,
-            "bankruptcy_flag": g.bankruptcy_flag,
-            "delinquency_flag": g.delinquency_flag,
-        }
+        {k: getattr(g, k) for k in PROFILE_FIELDS["guarantors"]}
         for g in guarantors
     ]
 
     bc_dict: Dict[str, Any] | None = None
     if bc:
-        bc_dict = {
-            "paynet_score": bc.paynet_score,
-            "tradelines_count": bc.tradelines_count,
-            "serious_delinquency_count": bc.serious_delinquency_count,
-        }
-
-    lr_dict: Dict[str, Any] = {
-        "amount": lr.amount,
-        "term_months": lr.term_months,
-        "equipment_type": lr.equipment_type,
-        "equipment_cost": lr.equipment_cost,
-        "equipment_year": lr.equipment_year,
-        "equipment_condition": lr.equipment_condition,
-        "created_at": lr.created_at.isoformat(),
-    }
-
-    current_year = date.today().year
-    equipment_age = None
-    if lr.equipment_year:
-        equipment_age = current_year - lr.equipment_year
-
-    primary_fico = g_dicts[0]["fico_score"] if g_dicts and g_dicts[0]["fico_score"] else None
-    foir = None
-
-    derived = {
-        "equipment_age": equipment_age,
-        "primary_fico": primary_fico,
-        "foir": foir,
-    }
+        bc_dict = {k: getattr(bc, k) for k in PROFILE_FIELDS["business_credit"]}
+
+    lr_dict: Dict[str, Any] = {k: getattr(lr, k) for k in PROFILE_FIELDS["loan_request"]}
+    lr_dict["created_at"] = lr.created_at.isoformat()
 
     return ApplicationProfile(
         borrower=b_dict,
         guarantors=g_dicts,
         business_credit=bc_dict,
         loan_request=lr_dict,
-        derived=derived,
+        # computed from the dicts above on first read
+        derived=DerivedFeatures(FeatureInputs(lr_dict, b_dict, g_dicts, bc_dict)),
     )
 
 
-def run_underwriting(db: Session, loan_request_id: int) -> MatchRun:
-    # Create match run
-    match_run = MatchRun(loan_request_id=loan_request_id, status="RUNNING")
-    db.add(match_run)
-    db.commit()
-    db.refresh(match_run)
+def pack_application(
+    layout: ProfileLayout,
+    lr: LoanRequest,
+    borrower: Borrower,
+    guarantors: List[Guarantor],
+    bc: BusinessCredit | None,
+) -> PackedProfile:
+    """
+    Only the fields `layout` references, read straight off the rows;
+    only the derived features it references are computed.
+    """
+    return layout.pack_models(
+        lr, borrower, guarantors, bc,
+        lambda: DerivedFeatures.from_models(lr, borrower, guarantors, bc),
+    )
 
-    app_profile = build_application_profile(db, loan_request_id)
 
-    # Fetch active policies
-    policies: List[LenderPolicy] = (
-        db.query(LenderPolicy)
-        .join(LenderProgram)
-        .join(Lender)
-        .filter(Lender.active == True)
-        .filter(LenderPolicy.is_active == True)
-        .all()
-    )
+def evaluate_application(
+    policy_set: ActivePolicySet,
+    match_run_id: int,
+    lr: LoanRequest,
+    borrower: Borrower,
+    guarantors: List[Guarantor],
+    bc: BusinessCredit | None,
+    explain: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    MatchResult column values, one row per active policy in policy set
+    order, for save_results(). Large policy sets are spread over a process
+    pool when one is configured (see services.parallel_eval). An
+    application indistinguishable from one already evaluated against the
+    same policy set generation gets a copy of those rows instead.
+    """
+    # imported here, parallel_eval imports this module
+    from app.services import parallel_eval
 
-    for p in policies:
-        pj = PolicyJson(**p.policy_json)
-        lender_id = p.program.lender_id
-        lender_program_id = p.lender_program_id
+    app_profile = pack_application(policy_set.layout, lr, borrower, guarantors, bc)
 
-        eval_result = evaluate_policy(
-            policy_json=pj,
-            lender_id=lender_id,
-            lender_program_id=lender_program_id,
-            app=app_profile,
+    key = result_cache.key(policy_set.generation, explain, lr.amount, lr.term_months, app_profile)
+    cached = result_cache.get(key, match_run_id)
+    if cached is not None:
+        return cached
+
+    # programs whose amount/term range excludes the request skip the rules
+    excluded = policy_set.programs.excluded(lr.amount, lr.term_months)
+
+    if parallel_eval.use_pool(policy_set):
+        rows = parallel_eval.evaluate_parallel(policy_set, match_run_id, app_profile, excluded, explain)
+    else:
+        probe = policy_set.thresholds.probe(app_profile, policy_set.layout)
+        rows = evaluate_policies(
+            policy_set.policies, policy_set.plans, match_run_id, app_profile, probe, excluded, explain
         )
+    result_cache.put(key, rows)
+    return rows
+
+
+def evaluate_policies(
+    policies: List[ActivePolicy],
+    plans: List[CompiledPolicy],
+    match_run_id: int,
+    app_profile: PackedProfile,
+    probe: ThresholdProbe,
+    excluded: Dict[int, List[RuleResult]],
+    explain: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    With explain=False programs `probe` finds rejected by a threshold are
+    settled without running their rules, the others are screened with
+    short-circuit evaluation, and rule_results records the policy version
+    and the failed rules' slots and actual values; otherwise it records
+    the policy version, failed-rule bitmap and every actual value. Detail
+    is rebuilt on read from those alone (see services.explain).
+    """
+    results: List[Dict[str, Any]] = []
+    for p, plan in zip(policies, plans):
+        lender_id = p.lender_id
+        lender_program_id = p.lender_program_id
+
+        if not explain and lender_program_id not in excluded:
+            # a failed threshold the index already found settles the program
+            rejected = probe.rejection(p.id)
+            summary = rejected_summary(plan, *rejected) if rejected else summarize_plan(plan, app_profile)
+            results.append(dict(
+                match_run_id=match_run_id,
+                lender_id=lender_id,
+                lender_program_id=lender_program_id,
+                eligible=summary.eligible,
+                fit_score=summary.fit_score,
+                reasons=list(summary.reasons),
+                rule_results=summary_rule_results(p, plan, summary),
+            ))
+            continue
 
-        mr = MatchResult(
-            match_run_id=match_run.id,
+        if lender_program_id in excluded:
+            eval_result = out_of_range_evaluation(
+                lender_id, lender_program_id, excluded[lender_program_id]
+            )
+            # range failures aren't rules of the policy, kept verbose
+            rule_results = verbose_rule_results(eval_result.hard_rule_results, eval_result.soft_rule_results)
+        else:
+            eval_result = evaluate_plan(
+                plan=plan,
+                lender_id=lender_id,
+                lender_program_id=lender_program_id,
+                app=app_profile,
+            )
+            rule_results = compact_rule_results(p, plan, eval_result)
+
+        results.append(dict(
+            match_run_id=match_run_id,
             lender_id=lender_id,
             lender_program_id=lender_program_id,
             eligible=eval_result.eligible,
             fit_score=eval_result.fit_score,
             reasons=[r for r in eval_result.reasons],
-            rule_results={
-                "hard": [r.dict() for r in eval_result.hard_rule_results],
-                "soft": [r.dict() for r in eval_result.soft_rule_results],
-            },
-        )
-        db.add(mr)
+            rule_results=rule_results,
+        ))
+    return results
+
+
+def save_results(db: Session, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert MatchResult rows with a single executemany, skipping the
+    per-object unit of work. Core insert rather than ORM bulk insert: the
+    latter splits rows into separate statements by which values are None.
+    """
+    if rows:
+        db.execute(MatchResult.__table__.insert(), rows)
+
+
+def save_payload(db: Session, match_run_id: int, rows: List[Dict[str, Any]], policy_set: ActivePolicySet) -> None:
+    """Serialized response body of a completing run, in the same transaction."""
+    save_payloads(db, [payload_row(match_run_id, render_rows(rows, policy_set.plans))])
+
+
+def execute_match_run(db: Session, match_run: MatchRun) -> MatchRun:
+    """
+    Evaluate a RUNNING match run against every active policy and mark it
+    COMPLETE; results and status are written in one commit.
+    """
+    models = load_application_models(db, match_run.loan_request_id)
+    policy_set = policy_catalog.get(db)
+
+    rows = evaluate_application(policy_set, match_run.id, *models, explain=match_run.explain)
+    save_results(db, rows)
+    save_payload(db, match_run.id, rows, policy_set)
+    record_results(db, rows, policy_set.plans)
 
     match_run.status = "COMPLETE"
+    match_run.completed_at = datetime.utcnow()
     db.commit()
-    db.refresh(match_run)
     return match_run
@@ -0,0 +1,185 @@
+# app/worker.py
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.models.match_result import MatchRun, MatchResult
+from app.services.underwriting import execute_match_run
+
+# The match_runs table is the queue: POST /underwriting/run/{id} inserts a
+# PENDING row and a pool of these processes claims and executes them.
+WORKERS = int(os.getenv("UNDERWRITING_WORKERS", "2"))
+POLL_SECONDS = float(os.getenv("UNDERWRITING_POLL_SECONDS", "1.0"))
+# a RUNNING run whose heartbeat is older than this belongs to a dead worker;
+# the executing worker refreshes it every HEARTBEAT_SECONDS
+RUN_TIMEOUT_SECONDS = int(os.getenv("UNDERWRITING_RUN_TIMEOUT", "300"))
+HEARTBEAT_SECONDS = float(os.getenv("UNDERWRITING_HEARTBEAT_SECONDS", "30"))
+MAX_ATTEMPTS = int(os.getenv("UNDERWRITING_MAX_ATTEMPTS", "3"))
+ERROR_MAX_LENGTH = 500
+
+logger = logging.getLogger(__name__)
+
+
+def claim_next(db: Session) -> MatchRun | None:
+    """
+    Move the oldest PENDING run to RUNNING and return it. The conditional
+    UPDATE makes the claim safe between workers; on Postgres the SELECT
+    also skips rows another worker has locked.
+    """
+    while True:
+        run_id = (
+            db.query(MatchRun.id)
+            .filter(MatchRun.status == "PENDING")
+            .order_by(MatchRun.id)
+            .with_for_update(skip_locked=True)
+            .limit(1)
+            .scalar()
+        )
+        if run_id is None:
+            db.rollback()
+            return None
+
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(MatchRun)
+            .where(MatchRun.id == run_id, MatchRun.status == "PENDING")
+            .values(status="RUNNING", attempts=MatchRun.attempts + 1, started_at=now, heartbeat_at=now)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return db.query(MatchRun).filter(MatchRun.id == run_id).one()
+
+
+def requeue_stale(db: Session) -> int:
+    """
+    Return runs abandoned by a dead worker (no heartbeat for
+    RUN_TIMEOUT_SECONDS) to the queue, or fail them after MAX_ATTEMPTS.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=RUN_TIMEOUT_SECONDS)
+    stale = (MatchRun.status == "RUNNING", func.coalesce(MatchRun.heartbeat_at, MatchRun.started_at) < cutoff)
+
+    failed = db.execute(
+        update(MatchRun)
+        .where(*stale, MatchRun.attempts >= MAX_ATTEMPTS)
+        .values(status="FAILED", error=f"Gave up after {MAX_ATTEMPTS} attempts")
+    ).rowcount
+    requeued = db.execute(
+        update(MatchRun).where(*stale).values(status="PENDING")
+    ).rowcount
+    db.commit()
+    if failed or requeued:
+        logger.warning("Requeued %d and failed %d stale match run(s)", requeued, failed)
+    return failed + requeued
+
+
+def beat(run_id: int) -> None:
+    """Refresh a RUNNING run's heartbeat, in a session of its own."""
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(MatchRun)
+            .where(MatchRun.id == run_id, MatchRun.status == "RUNNING")
+            .values(heartbeat_at=datetime.utcnow())
+        )
+        db.commit()
+    except Exception:
+        # a missed beat only matters after RUN_TIMEOUT_SECONDS of them
+        logger.warning("Heartbeat of match run %s failed", run_id, exc_info=True)
+    finally:
+        db.close()
+
+
+@contextmanager
+def heartbeat(run_id: int, every: float = HEARTBEAT_SECONDS) -> Iterator[None]:
+    """Keep beating for `run_id` from a thread while the block runs."""
+    stop = threading.Event()
+
+    def loop() -> None:
+        while not stop.wait(every):
+            beat(run_id)
+
+    thread = threading.Thread(target=loop, name=f"heartbeat-{run_id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def execute_claimed(db: Session, match_run: MatchRun) -> None:
+    run_id = match_run.id
+    try:
+        with heartbeat(run_id):
+            execute_match_run(db, match_run)
+    except Exception as e:
+        db.rollback()
+        # the traceback goes to the log; the run (and the API) gets the message
+        logger.exception("Match run %s failed", run_id)
+        error = f"{type(e).__name__}: {e}"[:ERROR_MAX_LENGTH]
+        # drop anything a partial attempt managed to write
+        db.query(MatchResult).filter(MatchResult.match_run_id == run_id).delete(synchronize_session=False)
+        db.execute(
+            update(MatchRun).where(MatchRun.id == run_id).values(status="FAILED", error=error)
+        )
+        db.commit()
+
+
+def work(poll_seconds: float = POLL_SECONDS, once: bool = False) -> None:
+    """Claim and execute runs until the queue is empty (once=True) or forever."""
+    db = SessionLocal()
+    try:
+        requeue_stale(db)
+        while True:
+            match_run = claim_next(db)
+            if match_run is None:
+                if once:
+                    return
+                time.sleep(poll_seconds)
+                requeue_stale(db)
+                continue
+            execute_claimed(db, match_run)
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    logger.info("Starting %d underwriting worker(s)", WORKERS)
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=work, name=f"underwriting-{i}") for i in range(WORKERS)]
+    for p in procs:
+        p.start()
+    try:
+        while True:
+            # restart any worker that died
+            for i, p in enumerate(procs):
+                if not p.is_alive():
+                    logger.warning("Worker %s exited (%s), restarting", p.name, p.exitcode)
+                    procs[i] = ctx.Process(target=work, name=p.name)
+                    procs[i].start()
+            time.sleep(5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+
+
+# ----------------------------------------------------
+# RUN DIRECTLY: python -m app.worker
+# ----------------------------------------------------
+if __name__ == "__main__":
+    main()
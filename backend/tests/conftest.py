@@ -0,0 +1,30 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# app.db binds its engines at import time: point them at a throwaway
+# SQLite file before anything imports the app
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The API over a fresh database, seeded with the bundled lenders."""
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def db(client):
+    from app.db import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
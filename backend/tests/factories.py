@@ -0,0 +1,103 @@
+# tests/factories.py
+import random
+from typing import Any, Dict, List
+
+from app.services.policy_engine import ApplicationProfile
+
+FIELDS = ["borrower.a", "borrower.b", "borrower.c"]
+
+APPLICATION = {
+    "borrower": {
+        "business_name": "Acme", "industry": "trucking", "state": "TX",
+        "years_in_business": 6, "annual_revenue": 900000,
+    },
+    "guarantors": [{"name": "Jo", "fico_score": 710}],
+    "loan_request": {
+        "amount": 60000, "term_months": 48, "equipment_type": "truck",
+        "equipment_cost": 70000, "equipment_year": 2020, "equipment_condition": "used",
+    },
+}
+
+
+def _rule(rule_id, kind, field, params, severity="HARD"):
+    return {"id": rule_id, "type": kind, "field": field, "params": params, "severity": severity, "message": rule_id}
+
+
+# ALL / ANY groups and a scored soft rule, over FIELDS
+POLICY = {
+    "hard_rules": {
+        "logic": "ALL",
+        "rules": [
+            _rule("a_min", "MIN_VALUE", "borrower.a", {"min": 3}),
+            _rule("b_max", "MAX_VALUE", "borrower.b", {"max": 7}),
+        ],
+        "groups": [{
+            "logic": "ANY",
+            "rules": [
+                _rule("c_min", "MIN_VALUE", "borrower.c", {"min": 5}),
+                _rule("a_range", "RANGE", "borrower.a", {"min": 6, "max": 9}),
+            ],
+        }],
+    },
+    "soft_rules": {"logic": "ALL", "rules": [_rule("c_max", "MAX_VALUE", "borrower.c", {"max": 4}, "SOFT")]},
+    "scoring_config": {"base_score": 100, "min_accept_score": 70, "deductions": [{"ruleId": "c_max", "points": 40}]},
+}
+
+
+class PolicyFactory:
+    """Random policies over FIELDS: nested ALL / ANY groups, HARD and SOFT rules."""
+
+    def __init__(self, seed: int):
+        self.rnd = random.Random(seed)
+        self.n = 0
+
+    def rule(self, severity: str | None = None) -> Dict[str, Any]:
+        rnd = self.rnd
+        self.n += 1
+        kind = rnd.choice(["MIN_VALUE", "MAX_VALUE", "RANGE"])
+        if kind == "MIN_VALUE":
+            params = {"min": rnd.randint(0, 9)}
+        elif kind == "MAX_VALUE":
+            params = {"max": rnd.randint(0, 9)}
+        else:
+            params = {"min": rnd.randint(0, 4), "max": rnd.randint(5, 9)}
+        return {
+            "id": f"r{self.n}",
+            "type": kind,
+            "field": rnd.choice(FIELDS),
+            "params": params,
+            "severity": severity or rnd.choice(["HARD", "HARD", "SOFT"]),
+            "message": f"rule {self.n} failed",
+        }
+
+    def group(self, depth: int = 0) -> Dict[str, Any]:
+        rnd = self.rnd
+        return {
+            "logic": rnd.choice(["ALL", "ANY"]),
+            "rules": [self.rule() for _ in range(rnd.randint(0, 3))],
+            "groups": [self.group(depth + 1) for _ in range(rnd.randint(0, 2))] if depth < 3 else [],
+        }
+
+    def policy(self) -> Dict[str, Any]:
+        soft = [self.rule("SOFT") for _ in range(2)]
+        return {
+            "hard_rules": self.group(),
+            "soft_rules": {"logic": "ALL", "rules": soft},
+            "scoring_config": {
+                "base_score": 100,
+                "min_accept_score": 70,
+                "deductions": [{"ruleId": soft[0]["id"], "points": 40}],
+            },
+        }
+
+    def values(self, n: int, nan: bool = False) -> List[Dict[str, Any]]:
+        """Borrower values for FIELDS; None (missing) and optionally NaN mixed in."""
+        missing = [None, float("nan")] if nan else [None]
+        return [
+            {f.split(".")[1]: self.rnd.choice(missing + [self.rnd.randint(0, 9)] * 3) for f in FIELDS}
+            for _ in range(n)
+        ]
+
+
+def profile(borrower: Dict[str, Any]) -> ApplicationProfile:
+    return ApplicationProfile(borrower, [], None, {}, {})
@@ -0,0 +1,102 @@
+# tests/test_aggregates.py
+import copy
+from collections import Counter
+
+from sqlalchemy import Integer, cast, func
+
+from app.models.analytics import ProgramDailyStats, RuleDailyFailures
+from app.models.match_result import MatchResult, MatchRun
+from app.services.analytics import rebuild
+from app.worker import work
+from tests.factories import APPLICATION
+
+# The aggregates are kept incrementally by every writer of match_results;
+# rebuilding them from scratch must land on the same rows.
+
+
+def _applications():
+    big = copy.deepcopy(APPLICATION)
+    big["loan_request"]["amount"] = 5_000_000
+    low_fico = copy.deepcopy(APPLICATION)
+    low_fico["guarantors"] = [{"name": "Sam", "fico_score": 550}]
+    return [APPLICATION, big, low_fico]
+
+
+def _snapshot(db):
+    db.expire_all()
+    programs = sorted(
+        (s.day, s.lender_program_id, s.evaluated, s.eligible, round(s.score_total, 6), s.scored, s.explained)
+        for s in db.query(ProgramDailyStats)
+    )
+    rules = sorted((f.day, f.lender_program_id, f.rule_id, f.failures) for f in db.query(RuleDailyFailures))
+    return programs, rules
+
+
+def _run_all(client):
+    ids = []
+    for application in _applications():
+        loan_request_id = client.post("/applications/", json=application).json()["id"]
+        ids.append(loan_request_id)
+        for explain in (True, False):
+            client.post(f"/underwriting/run/{loan_request_id}", params={"explain": explain})
+            work(once=True)
+    assert client.post("/underwriting/batch", json={"loan_request_ids": ids}).status_code == 200
+    return ids
+
+
+def test_rebuild_matches_incremental_aggregates(client, db):
+    _run_all(client)
+    live = _snapshot(db)
+    assert live[0] and live[1]
+
+    rebuild(db)
+    assert _snapshot(db) == live
+
+
+def test_rule_rates_ignore_summary_rows(client, db):
+    _run_all(client)
+    for row in client.get("/analytics/rules", params={"limit": 500}).json():
+        assert 0 < row["failure_rate"] <= 1
+
+
+def test_rematch_keeps_aggregates_consistent(client, db):
+    _run_all(client)
+    policy = client.get("/policies/").json()[0]
+    policy_json = policy["policy_json"]
+    policy_json["hard_rules"]["rules"][0]["params"] = {"min": 720}
+
+    response = client.put(
+        f"/policies/{policy['id']}",
+        params={"rematch": True},
+        json={**{k: policy[k] for k in ("lender_program_id", "is_active")}, "version": 1, "policy_json": policy_json},
+    )
+    assert response.status_code == 200
+    job = client.get(f"/policies/rematches/{response.headers['X-Rematch-Id']}").json()
+    assert job["status"] == "COMPLETE"
+
+    live = _snapshot(db)
+    rebuild(db)
+    assert _snapshot(db) == live
+
+
+
+def test_approvals_count_every_stored_result(client, db):
+    _run_all(client)
+    stored = (
+        db.query(MatchResult.lender_id, MatchResult.lender_program_id, func.count(), func.sum(cast(MatchResult.eligible, Integer)))
+        .join(MatchRun, MatchRun.id == MatchResult.match_run_id)
+        .filter(MatchRun.status == "COMPLETE")
+        .group_by(MatchResult.lender_id, MatchResult.lender_program_id)
+        .all()
+    )
+    programs = client.get("/analytics/programs").json()
+    assert sorted((p["lender_program_id"], p["evaluated"], p["eligible"]) for p in programs) == sorted(
+        (program_id, n, eligible) for _, program_id, n, eligible in stored
+    )
+    for p in programs:
+        assert p["approval_rate"] == p["eligible"] / p["evaluated"]
+
+    per_lender = Counter()
+    for lender_id, _, n, _ in stored:
+        per_lender[lender_id] += n
+    assert {r["lender_id"]: r["evaluated"] for r in client.get("/analytics/lenders").json()} == dict(per_lender)
@@ -0,0 +1,67 @@
+# tests/test_batch_engine.py
+import math
+
+import numpy as np
+import pytest
+
+from app.schemas.lender_policy import PolicyJson
+from app.services.batch_engine import ApplicationBlock, evaluate_policy_batch
+from app.services.policy_engine import evaluate_policy
+from app.services.policy_plan import compile_policy, evaluate_plan
+from tests.factories import FIELDS, PolicyFactory, profile
+
+
+def _block(values):
+    return ApplicationBlock.from_columns({f: [v[f.split(".")[1]] for v in values] for f in FIELDS})
+
+
+@pytest.mark.parametrize("nan", [False, True], ids=["missing", "missing+nan"])
+def test_batch_matches_scalar_engine(nan):
+    factory = PolicyFactory(30 if nan else 31)
+    for _ in range(150):
+        policy_json = factory.policy()
+        pj = PolicyJson(**policy_json)
+        plan = compile_policy(policy_json)
+        values = factory.values(30, nan=nan)
+
+        batch = evaluate_policy_batch(plan, _block(values))
+        from_profiles = evaluate_policy_batch(plan, ApplicationBlock.from_profiles([profile(v) for v in values], FIELDS))
+        assert (batch.passed == from_profiles.passed).all()
+
+        scores = batch.scores()
+        for j, v in enumerate(values):
+            scalar = evaluate_policy(pj, 1, 1, profile(v))
+            assert (bool(batch.eligible[j]), scores[j]) == (scalar.eligible, scalar.fit_score)
+            if not batch.hard_fail[j]:
+                # rule by rule where the scalar engine evaluated everything
+                results = evaluate_plan(plan, 1, 1, profile(v))
+                outcomes = [r.passed for r in results.hard_rule_results + results.soft_rule_results]
+                assert list(batch.passed[:, j]) == outcomes
+
+
+def _rule(kind, params):
+    return {"id": kind, "type": kind, "field": "borrower.a", "params": params, "severity": "HARD", "message": kind}
+
+
+@pytest.mark.parametrize(
+    "kind, params, nan_passes",
+    [
+        ("MIN_VALUE", {"min": 3}, True),
+        ("MAX_VALUE", {"max": 3}, True),
+        ("RANGE", {"min": 1, "max": 5}, False),
+    ],
+)
+def test_nan_is_a_value_and_none_is_missing(kind, params, nan_passes):
+    # NaN compares like any float (no ordering holds), as in the scalar
+    # comparators; None is a missing value and fails every threshold
+    plan = compile_policy({"hard_rules": {"rules": [_rule(kind, params)]}, "scoring_config": {}})
+    values = [float("nan"), None, 3.0]
+    for block in (
+        ApplicationBlock.from_columns({"borrower.a": values}),
+        ApplicationBlock.from_columns({"borrower.a": np.array([math.nan, math.nan, 3.0])}),
+    ):
+        batch = evaluate_policy_batch(plan, block)
+        assert bool(batch.passed[0, 0]) is nan_passes
+        assert bool(batch.passed[0, 2]) is True
+    assert not evaluate_policy_batch(plan, ApplicationBlock.from_columns({"borrower.a": values})).passed[0, 1]
+    assert plan.rules[0].check(float("nan")) is nan_passes
@@ -0,0 +1,35 @@
+# tests/test_batch_underwriting.py
+import json
+
+from tests.factories import APPLICATION
+
+UNKNOWN_ID = 987654
+
+
+def _stream(client, body):
+    response = client.post("/underwriting/batch", json=body)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_streams_a_line_per_application(client):
+    ids = [client.post("/applications/", json=APPLICATION).json()["id"] for _ in range(3)]
+    lines = _stream(client, {"loan_request_ids": [ids[0], UNKNOWN_ID, ids[1], ids[0], ids[2]], "chunk_size": 2})
+
+    # request order, duplicates dropped, across chunk boundaries
+    assert [line["loan_request_id"] for line in lines] == [ids[0], UNKNOWN_ID, ids[1], ids[2]]
+    assert lines[1] == {"loan_request_id": UNKNOWN_ID, "match_run_id": None, "status": "FAILED", "error": "Loan request not found"}
+
+    for line in lines[:1] + lines[2:]:
+        assert line["status"] == "COMPLETE"
+        run = client.get(f"/underwriting/runs/{line['match_run_id']}").json()
+        assert run["status"] == "COMPLETE"
+        assert run["loan_request_id"] == line["loan_request_id"]
+        stored = sorted((r["lender_program_id"], r["eligible"], r["fit_score"]) for r in run["results"])
+        assert sorted((r["lender_program_id"], r["eligible"], r["fit_score"]) for r in line["results"]) == stored
+
+
+def test_batch_needs_ids_or_a_range(client):
+    assert client.post("/underwriting/batch", json={}).status_code == 400
+    assert client.post("/underwriting/batch", json={"loan_request_ids": [1], "chunk_size": 0}).status_code == 400
@@ -0,0 +1,25 @@
+# tests/test_db_metrics.py
+from app.db_metrics import query_metrics
+
+
+def test_routes_are_recorded_under_their_mounted_path(client):
+    client.post("/metrics/db/reset")
+    assert client.get("/policies/programs").status_code == 200
+    assert client.get("/analytics/programs").status_code == 200
+    assert client.get("/analytics/programs").status_code == 200
+    client.get("/underwriting/runs/1")
+    client.get("/underwriting/runs/2")
+    client.get("/policies/")
+
+    routes = query_metrics.snapshot()
+    assert routes["GET /policies/programs"]["requests"] == 1
+    assert routes["GET /analytics/programs"]["requests"] == 2
+    assert routes["GET /underwriting/runs/{match_run_id}"]["requests"] == 2
+    assert routes["GET /policies/"]["requests"] == 1
+    assert "GET /programs" not in routes
+
+
+def test_responses_carry_query_stats(client):
+    response = client.get("/policies/programs")
+    assert int(response.headers["X-DB-Queries"]) >= 1
+    assert float(response.headers["X-DB-Time-Ms"]) >= 0
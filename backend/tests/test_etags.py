@@ -0,0 +1,70 @@
+# tests/test_etags.py
+import pytest
+from sqlalchemy import delete
+
+from app.services.result_payload import etag_matches, payloads
+from app.worker import work
+from tests.factories import APPLICATION
+
+ETAG = '"5f2c"'
+
+
+@pytest.mark.parametrize("header,matches", [
+    ('"5f2c"', True),
+    ('W/"5f2c"', True),
+    ('"a1", "5f2c"', True),
+    ('"a1",W/"5f2c" ,"b2"', True),
+    ("*", True),
+    ('"a1", *', True),
+    ('"a1"', False),
+    ('"5f2"', False),
+    ('"5f2c-gzip"', False),
+    ("5f2c", False),
+    ("", False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, ETAG) is matches
+
+
+def _completed_run(client):
+    loan_request_id = client.post("/applications/", json=APPLICATION).json()["id"]
+    run_id = client.post(f"/underwriting/run/{loan_request_id}").json()["id"]
+    work(once=True)
+    return run_id
+
+
+def _assert_conditional(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get(url, headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+    changed = client.get(url, headers={"If-None-Match": '"other"'})
+    assert changed.status_code == 200
+    assert changed.json() == first.json()
+    return first
+
+
+def test_by_run_answers_304_from_the_stored_etag(client):
+    _assert_conditional(client, f"/matches/by-run/{_completed_run(client)}")
+
+
+def test_by_run_answers_304_for_runs_without_a_stored_payload(client, db):
+    run_id = _completed_run(client)
+    stored = client.get(f"/matches/by-run/{run_id}")
+    db.execute(delete(payloads).where(payloads.c.match_run_id == run_id))
+    db.commit()
+
+    # rendered on every read, with the same body and so the same tag
+    rendered = _assert_conditional(client, f"/matches/by-run/{run_id}")
+    assert rendered.headers["ETag"] == stored.headers["ETag"]
+    assert rendered.json() == stored.json()
+
+
+def test_unknown_run_is_404(client):
+    assert client.get("/matches/by-run/987654", headers={"If-None-Match": "*"}).status_code == 404
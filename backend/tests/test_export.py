@@ -0,0 +1,90 @@
+# tests/test_export.py
+import csv
+import gzip
+import io
+from datetime import datetime
+
+import orjson
+import pytest
+
+from app.models.loan_request import LoanRequest
+from app.models.match_result import MatchRun
+from app.services.export import DATASETS
+from app.worker import work
+from tests.factories import APPLICATION
+
+# runs completed on a day no other test writes to, one at each end of it
+DAY = "2020-03-04"
+TIMES = [datetime(2020, 3, 4, 0, 0), datetime(2020, 3, 4, 23, 59, 59), datetime(2020, 3, 5, 0, 0)]
+
+
+@pytest.fixture(scope="module")
+def dated(client):
+    from app.db import SessionLocal
+
+    ids = []
+    db = SessionLocal()
+    try:
+        for at in TIMES:
+            loan_request_id = client.post("/applications/", json=APPLICATION).json()["id"]
+            run_id = client.post(f"/underwriting/run/{loan_request_id}", params={"explain": False}).json()["id"]
+            work(once=True)
+            db.get(LoanRequest, loan_request_id).created_at = at.date()
+            db.get(MatchRun, run_id).completed_at = at
+            ids.append((loan_request_id, run_id))
+        db.commit()
+    finally:
+        db.close()
+    return ids
+
+
+def _export(client, dataset, fmt="ndjson", **params):
+    response = client.get(f"/export/{dataset}", params={"format": fmt, **params})
+    assert response.status_code == 200
+    body = response.content
+    if params.get("gzip"):
+        assert response.headers["content-type"] == "application/gzip"
+        body = gzip.decompress(body)
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(body.decode()))
+        assert reader.fieldnames == DATASETS[dataset]
+        return list(reader)
+    return [orjson.loads(line) for line in body.splitlines()]
+
+
+def test_date_range_covers_whole_days(client, dated):
+    on_day = _export(client, "results", date_from=DAY, date_to=DAY)
+    assert {r["match_run_id"] for r in on_day} == {run_id for _, run_id in dated[:2]}
+    assert [r["id"] for r in on_day] == sorted(r["id"] for r in on_day)
+
+    applications = _export(client, "applications", date_from=DAY, date_to=DAY)
+    assert [a["id"] for a in applications] == [loan_request_id for loan_request_id, _ in dated[:2]]
+
+
+@pytest.mark.parametrize("dataset", ["applications", "results"])
+def test_csv_and_gzip_round_trip(client, dated, dataset):
+    params = {"date_from": DAY, "date_to": "2020-03-05"}
+    rows = _export(client, dataset, **params)
+    assert rows and set(rows[0]) == set(DATASETS[dataset])
+
+    assert _export(client, dataset, gzip=True, **params) == rows
+    for fmt_rows in (_export(client, dataset, "csv", **params), _export(client, dataset, "csv", gzip=True, **params)):
+        assert len(fmt_rows) == len(rows)
+        for row, line in zip(fmt_rows, rows):
+            assert row["id"] == str(line["id"])
+            if dataset == "results":
+                assert row["eligible"] == str(line["eligible"])
+                assert orjson.loads(row["reasons"]) == line["reasons"]
+                assert orjson.loads(row["failed_rules"]) == line["failed_rules"]
+                assert row["completed_at"] == line["completed_at"]
+            else:
+                assert row["created_at"] == line["created_at"]
+                assert float(row["amount"]) == line["amount"]
+
+
+@pytest.mark.parametrize("dataset", ["applications", "results"])
+def test_cursor_resumes_after_the_last_id(client, dated, dataset):
+    params = {"date_from": DAY, "date_to": "2020-03-05", "yield_per": 2}
+    rows = _export(client, dataset, **params)
+    for i in range(len(rows)):
+        assert _export(client, dataset, cursor=rows[i]["id"], **params) == rows[i + 1:]
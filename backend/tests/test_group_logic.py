@@ -0,0 +1,65 @@
+# tests/test_group_logic.py
+import pytest
+
+from app.schemas.lender_policy import PolicyJson
+from app.services.policy_engine import evaluate_policy
+from app.services.policy_plan import compile_policy, evaluate_plan, screen_plan, summarize_plan
+from tests.factories import PolicyFactory, profile
+
+# ALL / ANY groups: the scalar engine (policy_engine) is the reference,
+# the compiled plan and its short-circuit screen must reach the same
+# outcome on every application.
+
+
+@pytest.mark.parametrize("nan", [False, True], ids=["missing", "missing+nan"])
+def test_scalar_compiled_screen_agree(nan):
+    factory = PolicyFactory(11 if nan else 10)
+    for _ in range(150):
+        policy_json = factory.policy()
+        pj = PolicyJson(**policy_json)
+        plan = compile_policy(policy_json)
+        for v in factory.values(30, nan=nan):
+            app = profile(v)
+            scalar = evaluate_policy(pj, 1, 1, app)
+            compiled = evaluate_plan(plan, 1, 1, app)
+            screened = screen_plan(plan, 1, 1, app)
+            summary = summarize_plan(plan, app)
+
+            expected = (scalar.eligible, scalar.fit_score)
+            assert (compiled.eligible, compiled.fit_score) == expected
+            assert (screened.eligible, screened.fit_score) == expected
+            assert (summary.eligible, summary.fit_score) == expected
+            assert compiled.reasons == scalar.reasons
+
+
+def _rule(rule_id, minimum, severity="HARD"):
+    return {"id": rule_id, "type": "MIN_VALUE", "field": "borrower.a", "params": {"min": minimum}, "severity": severity, "message": rule_id}
+
+
+def _policy(hard_rules):
+    return {"hard_rules": hard_rules, "scoring_config": {"base_score": 100, "min_accept_score": 70}}
+
+
+def test_soft_rule_does_not_satisfy_an_any_group():
+    policy_json = _policy({"logic": "ANY", "rules": [_rule("hard", 5), _rule("soft", 1, "SOFT")]})
+    plan = compile_policy(policy_json)
+    app = profile({"a": 3})
+
+    assert not evaluate_policy(PolicyJson(**policy_json), 1, 1, app).eligible
+    assert not evaluate_plan(plan, 1, 1, app).eligible
+    assert not screen_plan(plan, 1, 1, app).eligible
+
+
+def test_failures_inside_a_satisfied_any_group_are_not_reasons():
+    policy_json = _policy({
+        "logic": "ALL",
+        "rules": [_rule("top", 5)],
+        "groups": [{"logic": "ANY", "rules": [_rule("either", 9), _rule("or", 1)]}],
+    })
+    app = profile({"a": 3})
+
+    scalar = evaluate_policy(PolicyJson(**policy_json), 1, 1, app)
+    compiled = evaluate_plan(compile_policy(policy_json), 1, 1, app)
+    for evaluation in (scalar, compiled):
+        assert not evaluation.eligible
+        assert evaluation.reasons == ["top"]
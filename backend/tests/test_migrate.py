@@ -0,0 +1,152 @@
+# tests/test_migrate.py
+from sqlalchemy import JSON, Boolean, Column, Date, Float, ForeignKey, Integer, MetaData, String, Table, create_engine, inspect, select
+
+from app.migrate import upgrade
+from app.models.analytics import ProgramDailyStats, RuleDailyFailures
+from app.models.lender_policy import LenderPolicyVersion
+from app.models.match_result import MatchRun
+
+# the tables as the first release created them, before any upgrade
+baseline = MetaData()
+Table(
+    "lenders", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String, nullable=False, unique=True),
+    Column("active", Boolean, default=True),
+)
+Table(
+    "lender_programs", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("lender_id", Integer, ForeignKey("lenders.id"), nullable=False),
+    Column("name", String, nullable=False),
+    Column("min_amount", Integer, nullable=False),
+    Column("max_amount", Integer, nullable=False),
+    Column("min_term_months", Integer, nullable=False),
+    Column("max_term_months", Integer, nullable=False),
+)
+Table(
+    "lender_policies", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("lender_program_id", Integer, ForeignKey("lender_programs.id"), nullable=False),
+    Column("version", Integer, nullable=False, default=1),
+    Column("is_active", Boolean, default=True),
+    Column("policy_json", JSON, nullable=False),
+)
+Table(
+    "borrowers", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("business_name", String, nullable=False),
+    Column("industry", String, nullable=False),
+    Column("state", String, nullable=False),
+    Column("years_in_business", Float, nullable=False),
+    Column("annual_revenue", Float, nullable=False),
+    Column("paynet_score", Integer, nullable=True),
+    Column("medical_license_flag", Boolean, default=False),
+)
+Table(
+    "loan_requests", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("borrower_id", Integer, ForeignKey("borrowers.id"), nullable=False),
+    Column("amount", Float, nullable=False),
+    Column("term_months", Integer, nullable=False),
+    Column("equipment_type", String, nullable=False),
+    Column("equipment_cost", Float, nullable=False),
+    Column("equipment_year", Integer, nullable=True),
+    Column("equipment_vendor", String, nullable=True),
+    Column("equipment_condition", String, nullable=True),
+    Column("created_at", Date, nullable=False),
+)
+Table(
+    "match_runs", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("loan_request_id", Integer, ForeignKey("loan_requests.id"), nullable=False),
+    Column("status", String, nullable=False, default="PENDING"),
+)
+Table(
+    "match_results", baseline,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("match_run_id", Integer, ForeignKey("match_runs.id"), nullable=False),
+    Column("lender_id", Integer, ForeignKey("lenders.id"), nullable=False),
+    Column("lender_program_id", Integer, ForeignKey("lender_programs.id"), nullable=False),
+    Column("eligible", Boolean, nullable=False),
+    Column("fit_score", Float, nullable=True),
+    Column("reasons", JSON, nullable=False),
+    Column("rule_results", JSON, nullable=False),
+)
+
+POLICY = {
+    "hard_rules": {"logic": "ALL", "rules": [{
+        "id": "fico_650", "type": "MIN_VALUE", "field": "guarantors[0].fico_score",
+        "params": {"min": 650}, "severity": "HARD", "message": "FICO must be 650+",
+    }]},
+    "soft_rules": None,
+    "scoring_config": {"base_score": 100, "min_accept_score": 70, "deductions": []},
+}
+
+
+def _failed(rule_id, actual):
+    return {
+        "rule_id": rule_id, "passed": False, "severity": "HARD", "message": rule_id,
+        "field": "guarantors[0].fico_score", "expected": None, "actual": actual,
+    }
+
+
+def _baseline_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    baseline.create_all(engine)
+    t = baseline.tables
+    with engine.begin() as conn:
+        conn.execute(t["lenders"].insert(), [{"id": 1, "name": "Apex", "active": True}])
+        conn.execute(t["lender_programs"].insert(), [{
+            "id": 1, "lender_id": 1, "name": "A", "min_amount": 0, "max_amount": 10**6,
+            "min_term_months": 1, "max_term_months": 120,
+        }])
+        conn.execute(t["lender_policies"].insert(), [
+            {"id": 1, "lender_program_id": 1, "version": 3, "is_active": True, "policy_json": POLICY},
+        ])
+        conn.execute(t["match_runs"].insert(), [
+            {"id": 1, "loan_request_id": 1, "status": "COMPLETE"},
+            {"id": 2, "loan_request_id": 1, "status": "COMPLETE"},
+        ])
+        conn.execute(t["match_results"].insert(), [
+            {"id": 1, "match_run_id": 1, "lender_id": 1, "lender_program_id": 1, "eligible": False, "fit_score": None,
+             "reasons": ["FICO must be 650+"], "rule_results": {"hard": [_failed("fico_650", 600)], "soft": []}},
+            {"id": 2, "match_run_id": 2, "lender_id": 1, "lender_program_id": 1, "eligible": True, "fit_score": 100.0,
+             "reasons": [], "rule_results": {"hard": [], "soft": []}},
+        ])
+    return engine
+
+
+def test_upgrade_brings_a_baseline_database_up_to_the_models(tmp_path):
+    engine = _baseline_engine(tmp_path)
+    done = upgrade(engine)
+
+    insp = inspect(engine)
+    run_columns = {c["name"] for c in insp.get_columns("match_runs")}
+    assert {"explain", "attempts", "started_at", "heartbeat_at", "error", "created_at", "completed_at"} <= run_columns
+    run_indexes = {ix["name"] for ix in insp.get_indexes("match_runs")}
+    assert {ix.name for ix in MatchRun.__table__.indexes} <= run_indexes
+    assert "CREATE INDEX ix_match_runs_status_id" in done
+    assert "archived 1 policy version(s)" in done
+    assert "analytics rebuilt from 2 result(s)" in done
+
+    with engine.connect() as conn:
+        # existing rows get the values new rows would
+        runs = conn.execute(select(MatchRun.explain, MatchRun.attempts, MatchRun.created_at)).all()
+        assert [(r.explain, r.attempts) for r in runs] == [(True, 0), (True, 0)]
+        assert all(r.created_at is not None for r in runs)
+
+        versions = conn.execute(
+            select(LenderPolicyVersion.policy_id, LenderPolicyVersion.version, LenderPolicyVersion.policy_json)
+        ).all()
+        assert [tuple(v) for v in versions] == [(1, 3, POLICY)]
+
+        stats = conn.execute(
+            select(ProgramDailyStats.lender_program_id, ProgramDailyStats.evaluated, ProgramDailyStats.eligible)
+        ).all()
+        assert [tuple(s) for s in stats] == [(1, 2, 1)]
+        failures = conn.execute(select(RuleDailyFailures.rule_id, RuleDailyFailures.failures)).all()
+        assert [tuple(f) for f in failures] == [("fico_650", 1)]
+
+    # every step checks the live schema first
+    assert upgrade(engine) == []
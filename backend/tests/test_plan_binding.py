@@ -0,0 +1,30 @@
+# tests/test_plan_binding.py
+import random
+
+from app.services.field_paths import ProfileLayout
+from app.services.policy_plan import bind_plan, compile_policy, evaluate_plan, screen_plan, summarize_plan
+from tests.factories import FIELDS, POLICY, PolicyFactory, profile
+
+
+def test_rebinding_to_shifted_layouts_screens_correctly():
+    # each rebind frees the previous bound plan, so CPython hands its
+    # groups' ids to the new ones; the screening order must not follow ids
+    plan = compile_policy(POLICY)
+    apps = [profile(v) for v in PolicyFactory(20).values(40)]
+    expected = [evaluate_plan(plan, 1, 1, app) for app in apps]
+
+    rnd = random.Random(20)
+    bound = None
+    for i in range(200):
+        bound = None
+        fields = [f"borrower.pad{i}_{k}" for k in range(rnd.randint(0, 6))] + FIELDS
+        rnd.shuffle(fields)
+        layout = ProfileLayout(fields)
+        bound = bind_plan(plan, layout)
+
+        for app, full in zip(apps, expected):
+            packed = layout.pack(app)
+            summary = summarize_plan(bound, packed)
+            screened = screen_plan(bound, 1, 1, packed)
+            assert (summary.eligible, summary.fit_score) == (full.eligible, full.fit_score)
+            assert (screened.eligible, screened.fit_score) == (full.eligible, full.fit_score)
@@ -0,0 +1,50 @@
+# tests/test_policy_versions.py
+from app.models.match_result import MatchResult
+from app.services.explain import ResultExplainer
+from app.worker import work
+from tests.factories import APPLICATION
+
+# compact and summary rows name the policy version they were evaluated
+# with; reads expand them against that archived version
+
+
+def _run(client, explain):
+    loan_request_id = client.post("/applications/", json=APPLICATION).json()["id"]
+    run_id = client.post(f"/underwriting/run/{loan_request_id}", params={"explain": explain}).json()["id"]
+    work(once=True)
+    return run_id
+
+
+def test_summary_runs_read_back_in_the_verbose_shape(client):
+    verbose = client.get(f"/underwriting/runs/{_run(client, True)}").json()["results"]
+    summary = client.get(f"/underwriting/runs/{_run(client, False)}").json()["results"]
+    verbose = {r["lender_program_id"]: r for r in verbose}
+
+    assert len(summary) == len(verbose)
+    for r in summary:
+        full = verbose[r["lender_program_id"]]
+        assert (r["eligible"], r["fit_score"]) == (full["eligible"], full["fit_score"])
+        # screening stops at the first decisive failure: only the rules it
+        # evaluated, each as the verbose row has it
+        assert set(r["reasons"]) <= set(full["reasons"])
+        for part in ("hard", "soft"):
+            assert all(rr in full["rule_results"][part] for rr in r["rule_results"][part])
+
+
+def test_same_version_update_keeps_stored_results(client, db):
+    run_id = _run(client, False)
+    before = client.get(f"/matches/by-run/{run_id}").json()
+
+    policy = client.get("/policies/").json()[0]
+    policy_json = policy["policy_json"]
+    policy_json["hard_rules"]["rules"][0]["params"] = {"min": 1}
+    updated = client.put(
+        f"/policies/{policy['id']}",
+        json={"lender_program_id": policy["lender_program_id"], "version": 1, "is_active": True, "policy_json": policy_json},
+    ).json()
+    assert updated["version"] == policy["version"] + 1
+
+    # explained from the archived version, not the updated policy
+    results = db.query(MatchResult).filter(MatchResult.match_run_id == run_id).order_by(MatchResult.id).all()
+    explainer = ResultExplainer(db)
+    assert [explainer.explain(r).dict() for r in results] == before
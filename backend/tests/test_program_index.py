@@ -0,0 +1,49 @@
+# tests/test_program_index.py
+from types import SimpleNamespace
+
+from app.services.catalog import policy_catalog
+from app.services.program_index import ProgramIndex
+
+
+def _program(pid, min_amount, max_amount, min_term, max_term):
+    return SimpleNamespace(
+        id=pid, min_amount=min_amount, max_amount=max_amount, min_term_months=min_term, max_term_months=max_term
+    )
+
+
+def test_excluded_programs_and_reasons():
+    index = ProgramIndex([
+        _program(1, 10_000, 100_000, 12, 60),
+        _program(2, 50_000, 500_000, 24, 84),
+    ])
+
+    # range ends are inclusive
+    assert list(index.excluded(10_000, 60)) == [2]
+    assert index.excluded(50_000, 60) == {}
+
+    excluded = index.excluded(600_000, 6)
+    assert sorted(excluded) == [1, 2]
+    assert [r.rule_id for r in excluded[1]] == ["program_amount_range", "program_term_range"]
+    assert all(not r.passed and r.severity == "HARD" for r in excluded[2])
+
+    # an unknown amount or term excludes nothing on that dimension
+    assert sorted(index.excluded(None, 6)) == [1, 2]
+    assert index.excluded(None, None) == {}
+
+
+def test_catalog_index_follows_program_changes(client, db):
+    before = policy_catalog.get(db)
+    lender = client.post("/policies/lenders", json={"name": "Range Test Lender"}).json()
+    program = client.post("/policies/programs", json={
+        "lender_id": lender["id"], "name": "Tiny", "min_amount": 1, "max_amount": 2,
+        "min_term_months": 1, "max_term_months": 2,
+    }).json()
+    client.post("/policies/", json={
+        "lender_program_id": program["id"], "version": 1, "is_active": True,
+        "policy_json": {"hard_rules": {"rules": []}, "scoring_config": {}},
+    })
+
+    after = policy_catalog.get(db)
+    assert after.generation > before.generation
+    assert program["id"] in after.programs.excluded(60_000, 48)
+    assert program["id"] not in after.programs.excluded(2, 2)
@@ -0,0 +1,56 @@
+# tests/test_rematch.py
+from app.models.match_result import MatchResult, MatchRun
+from app.worker import work
+from tests.factories import APPLICATION
+
+
+def _latest(db, loan_request_id, program_id):
+    db.expire_all()
+    return (
+        db.query(MatchResult)
+        .join(MatchRun, MatchRun.id == MatchResult.match_run_id)
+        .filter(MatchRun.loan_request_id == loan_request_id, MatchResult.lender_program_id == program_id)
+        .order_by(MatchResult.id.desc())
+        .first()
+    )
+
+
+def _update(client, policy, rematch=False, **params):
+    policy_json = policy["policy_json"]
+    for rule in policy_json["hard_rules"]["rules"]:
+        rule["params"] = params.get(rule["id"], rule["params"])
+    response = client.put(
+        f"/policies/{policy['id']}",
+        params={"rematch": rematch},
+        json={"lender_program_id": policy["lender_program_id"], "version": 1, "is_active": True, "policy_json": policy_json},
+    )
+    assert response.status_code == 200
+    return response
+
+
+def test_rematch_diffs_against_the_stored_version(client, db):
+    # results stored under v1; v2 (not rematched) tightens FICO, v3 only
+    # touches time in business. The v3 rematch must still catch the FICO
+    # change for rows evaluated under v1.
+    policy = next(p for p in client.get("/policies/").json() if p["policy_json"]["hard_rules"]["rules"][0]["id"] == "fico_640")
+    fico, tib = (r["id"] for r in policy["policy_json"]["hard_rules"]["rules"])
+    program_id = policy["lender_program_id"]
+
+    loan_request_id = client.post("/applications/", json=APPLICATION).json()["id"]
+    client.post(f"/underwriting/run/{loan_request_id}")
+    work(once=True)
+    assert _latest(db, loan_request_id, program_id).eligible
+
+    _update(client, policy, **{fico: {"min": 720}})
+    policy = next(p for p in client.get("/policies/").json() if p["id"] == policy["id"])
+    response = _update(client, policy, rematch=True, **{tib: {"min": 1}})
+    job = client.get(f"/policies/rematches/{response.headers['X-Rematch-Id']}").json()
+    assert job["status"] == "COMPLETE"
+    rematched = _latest(db, loan_request_id, program_id)
+
+    client.post(f"/underwriting/run/{loan_request_id}")
+    work(once=True)
+    fresh = _latest(db, loan_request_id, program_id)
+    assert fresh.id != rematched.id
+    assert not fresh.eligible
+    assert (rematched.eligible, rematched.fit_score) == (fresh.eligible, fresh.fit_score)
@@ -0,0 +1,90 @@
+# tests/test_result_cache.py
+import copy
+
+from app.services.catalog import policy_catalog
+from app.services.field_paths import PackedProfile
+from app.services.result_cache import ResultCache, result_cache
+from app.worker import work
+from tests.factories import APPLICATION
+
+
+def _key(generation=1, values=(1, "x")):
+    return ResultCache.key(generation, True, 50_000, 36, PackedProfile(values))
+
+
+def _rows(run_id=1):
+    return [{"match_run_id": run_id, "eligible": True, "reasons": ["ok"], "rule_results": {"hard": [], "soft": []}}]
+
+
+def test_hit_copies_rows_for_the_new_run():
+    cache = ResultCache(maxsize=4)
+    rows = _rows()
+    assert cache.get(_key(), 2) is None
+    cache.put(_key(), rows)
+    rows[0]["reasons"].append("changed after put")
+
+    hit = cache.get(_key(), 2)
+    assert hit == [{**_rows(2)[0]}]
+    hit[0]["reasons"].append("changed after get")
+    assert cache.get(_key(), 3)[0]["reasons"] == ["ok"]
+    assert cache.stats() == {"size": 1, "maxsize": 4, "hits": 2, "misses": 1}
+
+
+def test_new_generation_misses():
+    cache = ResultCache(maxsize=4)
+    cache.put(_key(generation=1), _rows())
+    assert cache.get(_key(generation=2), 2) is None
+    assert cache.get(_key(generation=1), 2) is not None
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResultCache(maxsize=2)
+    a, b, c = (_key(values=(v,)) for v in "abc")
+    cache.put(a, _rows())
+    cache.put(b, _rows())
+    cache.get(a, 2)
+    cache.put(c, _rows())
+    assert len(cache) == 2
+    assert cache.get(b, 2) is None
+    assert cache.get(a, 2) is not None and cache.get(c, 2) is not None
+
+
+def test_unhashable_profiles_and_size_zero_are_not_cached():
+    assert _key(values=({"nested": 1},)) is None
+    cache = ResultCache(maxsize=0)
+    cache.put(_key(), _rows())
+    assert cache.get(_key(), 2) is None and len(cache) == 0
+
+
+def _run(client, application):
+    loan_request_id = client.post("/applications/", json=application).json()["id"]
+    run_id = client.post(f"/underwriting/run/{loan_request_id}", params={"explain": False}).json()["id"]
+    work(once=True)
+    return sorted((r["lender_program_id"], r["eligible"], r["fit_score"]) for r in client.get(f"/underwriting/runs/{run_id}").json()["results"])
+
+
+def test_policy_update_invalidates_cached_results(client, db):
+    application = copy.deepcopy(APPLICATION)
+    application["loan_request"]["amount"] = 61_234
+    first = _run(client, application)
+    hits = result_cache.hits
+    assert _run(client, application) == first
+    assert result_cache.hits == hits + 1
+
+    generation = policy_catalog.get(db).generation
+    policy = next(p for p in client.get("/policies/").json() if p["policy_json"]["hard_rules"]["rules"][0]["id"] == "fico_670")
+    policy["policy_json"]["hard_rules"]["rules"][0]["params"] = {"min": 800}
+    response = client.put(
+        f"/policies/{policy['id']}",
+        json={"lender_program_id": policy["lender_program_id"], "version": 1, "is_active": True, "policy_json": policy["policy_json"]},
+    )
+    assert response.status_code == 200
+    assert policy_catalog.get(db).generation != generation
+
+    hits = result_cache.hits
+    after = _run(client, application)
+    assert result_cache.hits == hits
+    program_id = policy["lender_program_id"]
+    assert [r for r in first if r[0] == program_id][0][1] is True
+    assert [r for r in after if r[0] == program_id][0][1] is False
+    assert [r for r in after if r[0] != program_id] == [r for r in first if r[0] != program_id]
@@ -0,0 +1,87 @@
+# tests/test_result_forms.py
+import pytest
+
+from app.services.explain import expand_row
+from app.services.policy_plan import (
+    compact_results,
+    compile_policy,
+    evaluate_plan,
+    expand_results,
+    expand_summary,
+    policy_digest,
+    screen_plan,
+    summarize_plan,
+)
+from tests.factories import PolicyFactory, profile
+
+
+def _cases(seed: int, policies: int = 40, apps: int = 20):
+    factory = PolicyFactory(seed)
+    for _ in range(policies):
+        policy_json = factory.policy()
+        plan = compile_policy(policy_json)
+        for values in factory.values(apps):
+            yield policy_json, plan, profile(values)
+
+
+def _dump(results):
+    return [r.dict() for r in results]
+
+
+def test_compact_results_round_trip():
+    for _, plan, app in _cases(seed=1):
+        evaluation = evaluate_plan(plan, 1, 1, app)
+        bitmap, actual = compact_results(evaluation.hard_rule_results, evaluation.soft_rule_results)
+
+        hard, soft = expand_results(plan, bitmap, actual)
+        assert _dump(hard) == _dump(evaluation.hard_rule_results)
+        assert _dump(soft) == _dump(evaluation.soft_rule_results)
+
+
+def test_expand_results_refuses_another_shape():
+    plan = compile_policy(PolicyFactory(2).policy())
+    assert expand_results(plan, "0", [None] * (len(plan.rules) + 1)) is None
+
+
+def test_summary_round_trip():
+    for _, plan, app in _cases(seed=3):
+        summary = summarize_plan(plan, app)
+        screened = screen_plan(plan, 1, 1, app)
+
+        hard, soft = expand_summary(plan, list(summary.failed), list(summary.actual))
+        assert _dump(hard) == _dump(screened.hard_rule_results)
+        assert _dump(soft) == _dump(screened.soft_rule_results)
+        assert list(summary.reasons) == screened.reasons
+
+
+def test_expand_summary_refuses_unknown_slot():
+    plan = compile_policy(PolicyFactory(4).policy())
+    assert expand_summary(plan, [len(plan.rules)], [1]) is None
+
+
+def test_policy_digest_follows_the_rules():
+    policy_json = PolicyFactory(5).policy()
+    reordered = dict(reversed(list(policy_json.items())))
+    assert policy_digest(reordered) == policy_digest(policy_json) == compile_policy(policy_json).digest
+
+    changed = PolicyFactory(5).policy()
+    changed["scoring_config"]["min_accept_score"] += 1
+    assert policy_digest(changed) != policy_digest(policy_json)
+
+
+@pytest.mark.parametrize("stored_form", ["compact", "summary"])
+def test_expand_row_checks_the_digest(stored_form):
+    _, plan, app = next(_cases(seed=6, policies=1, apps=1))
+    if stored_form == "compact":
+        evaluation = evaluate_plan(plan, 1, 1, app)
+        bitmap, actual = compact_results(evaluation.hard_rule_results, evaluation.soft_rule_results)
+        row = {"policy_id": 1, "version": 1, "bitmap": bitmap, "actual": actual}
+    else:
+        summary = summarize_plan(plan, app)
+        row = {"policy_id": 1, "version": 1, "failed": list(summary.failed), "actual": list(summary.actual)}
+
+    assert expand_row(plan, {**row, "digest": plan.digest}) is not None
+    # rows written before digests were stored
+    assert expand_row(plan, row) is not None
+    assert expand_row(plan, {**row, "digest": "0" * 16}) is None
+    assert expand_row(None, row) is None
@@ -0,0 +1,54 @@
+# tests/test_simulation.py
+import copy
+
+import pytest
+
+from app.services import simulation
+from app.services.batch_engine import ApplicationBlock, evaluate_policy_batch
+from app.services.policy_engine import ApplicationProfile
+from app.services.policy_plan import compile_policy
+from tests.factories import FIELDS, POLICY
+
+LOAN = {"amount": 50_000, "term_months": 36}
+BOUNDS = (10_000, 100_000, 12, 60)
+
+
+def _app(a, b, c, loan=LOAN):
+    return ApplicationProfile({"a": a, "b": b, "c": c}, [], None, dict(loan), {})
+
+
+def test_counted_rules_follow_any_groups():
+    plan = compile_policy(POLICY)
+    # b_max fails the hard tree; c_min fails inside an ANY group that held
+    # (a_range passes), so it isn't behind the decline
+    apps = [_app(7, 9, 1), _app(7, 1, 1), _app(7, 1, 5)]
+    ev = evaluate_policy_batch(plan, ApplicationBlock.from_profiles(apps, FIELDS))
+
+    assert simulation._counted_rules(plan, ev, 0) == {"b_max"}
+    assert simulation._counted_rules(plan, ev, 1) == set()
+    assert simulation._counted_rules(plan, ev, 2) == {"c_max"}
+
+
+def test_simulate_chunk_counts_changed_rules():
+    candidate = copy.deepcopy(POLICY)
+    candidate["hard_rules"]["rules"][1]["params"] = {"max": 9}
+    simulation._init_worker(POLICY, candidate, BOUNDS)
+
+    apps = [_app(7, 9, 1), _app(7, 9, 2), _app(2, 9, 1), _app(7, 1, 1), _app(7, 9, 1, {"amount": 1, "term_months": 36})]
+    totals = simulation._simulate_chunk(apps).dict()
+
+    assert totals["examined"] == 5
+    assert totals["baseline_score_histogram"]["out_of_range"] == 1
+    assert (totals["baseline_approved"], totals["candidate_approved"]) == (1, 3)
+    assert (totals["newly_approved"], totals["newly_declined"]) == (2, 0)
+    assert totals["top_changed_rules"] == [{"rule_id": "b_max", "count": 2}]
+
+
+@pytest.mark.parametrize("field,value", [("chunk_size", 0), ("chunk_size", 10_001), ("workers", 0), ("workers", 33)])
+def test_simulate_rejects_out_of_bounds_settings(client, field, value):
+    policy = client.get("/policies/").json()[0]
+    response = client.post(
+        "/policies/simulate",
+        json={"lender_program_id": policy["lender_program_id"], "policy_json": policy["policy_json"], field: value},
+    )
+    assert response.status_code == 422
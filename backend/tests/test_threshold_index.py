@@ -0,0 +1,50 @@
+# tests/test_threshold_index.py
+from app.services.policy_plan import compile_policy, evaluate_plan, rejected_summary
+from app.services.threshold_index import ThresholdIndex
+from tests.factories import PolicyFactory, profile
+
+
+def test_threshold_rejections_are_real():
+    factory = PolicyFactory(12)
+    plans = [compile_policy(factory.policy()) for _ in range(150)]
+    index = ThresholdIndex(enumerate(plans))
+
+    rejected = 0
+    for v in factory.values(60, nan=True):
+        app = profile(v)
+        probe = index.probe(app)
+        for key, plan in enumerate(plans):
+            rejection = probe.rejection(key)
+            if rejection is None:
+                continue
+            rejected += 1
+            summary = rejected_summary(plan, *rejection)
+            assert not summary.eligible
+            assert not evaluate_plan(plan, 1, 1, app).eligible
+            # the reported failure is one evaluate_plan reports too
+            slot, actual = rejection
+            assert not plan.rules[slot].check(actual)
+    assert rejected
+
+
+def _min_rule(rule_id, minimum):
+    return {"id": rule_id, "type": "MIN_VALUE", "field": "borrower.a", "params": {"min": minimum}, "severity": "HARD", "message": rule_id}
+
+
+def test_only_decisive_rules_are_indexed():
+    decisive = compile_policy({"hard_rules": {"rules": [_min_rule("top", 5)]}, "scoring_config": {}})
+    in_any = compile_policy({
+        "hard_rules": {"logic": "ANY", "rules": [_min_rule("either", 5), _min_rule("or", 1)]},
+        "scoring_config": {},
+    })
+    index = ThresholdIndex([(1, decisive), (2, in_any)])
+
+    probe = index.probe(profile({"a": 3}))
+    assert probe.rejection(1) == (0, 3)
+    # failing one side of an ANY group settles nothing
+    assert probe.rejection(2) is None
+    assert evaluate_plan(in_any, 1, 1, profile({"a": 3})).eligible
+
+    # a missing value fails every threshold, NaN is left to the rule
+    assert index.probe(profile({"a": None})).rejection(1) == (0, None)
+    assert index.probe(profile({"a": float("nan")})).rejection(1) is None
@@ -0,0 +1,67 @@
+# tests/test_worker.py
+import logging
+import time
+from datetime import datetime, timedelta
+
+from app import worker
+from app.models.match_result import MatchRun
+from tests.factories import APPLICATION
+
+
+def _running(client, db, started_minutes_ago, beat_minutes_ago=None, attempts=1):
+    loan_request_id = client.post("/applications/", json=APPLICATION).json()["id"]
+    now = datetime.utcnow()
+    run = MatchRun(
+        loan_request_id=loan_request_id,
+        status="RUNNING",
+        attempts=attempts,
+        started_at=now - timedelta(minutes=started_minutes_ago),
+        heartbeat_at=None if beat_minutes_ago is None else now - timedelta(minutes=beat_minutes_ago),
+    )
+    db.add(run)
+    db.commit()
+    return run
+
+
+def _status(db, run):
+    db.expire_all()
+    return db.get(MatchRun, run.id).status
+
+
+def test_requeue_stale_follows_the_heartbeat(client, db, monkeypatch):
+    monkeypatch.setattr(worker, "RUN_TIMEOUT_SECONDS", 60)
+    alive = _running(client, db, started_minutes_ago=30, beat_minutes_ago=0)
+    dead = _running(client, db, started_minutes_ago=30, beat_minutes_ago=5)
+    never_beat = _running(client, db, started_minutes_ago=30)
+    exhausted = _running(client, db, started_minutes_ago=30, beat_minutes_ago=5, attempts=worker.MAX_ATTEMPTS)
+
+    worker.requeue_stale(db)
+    assert _status(db, alive) == "RUNNING"
+    assert _status(db, dead) == "PENDING"
+    assert _status(db, never_beat) == "PENDING"
+    assert _status(db, exhausted) == "FAILED"
+
+
+def test_heartbeat_refreshes_while_running(client, db):
+    run = _running(client, db, started_minutes_ago=30, beat_minutes_ago=30)
+    with worker.heartbeat(run.id, every=0.01):
+        time.sleep(0.2)
+    db.expire_all()
+    assert datetime.utcnow() - db.get(MatchRun, run.id).heartbeat_at < timedelta(minutes=1)
+
+    db.get(MatchRun, run.id).status = "FAILED"
+    db.commit()
+
+
+def test_failed_run_is_logged(client, db, monkeypatch, caplog):
+    def boom(db, match_run):
+        raise RuntimeError("no policies")
+
+    monkeypatch.setattr(worker, "execute_match_run", boom)
+    run = _running(client, db, started_minutes_ago=0, beat_minutes_ago=0)
+    with caplog.at_level(logging.ERROR, logger="app.worker"):
+        worker.execute_claimed(db, run)
+
+    assert _status(db, run) == "FAILED"
+    assert db.get(MatchRun, run.id).error == "RuntimeError: no policies"
+    assert f"Match run {run.id} failed" in caplog.text
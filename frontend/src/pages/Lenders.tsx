@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import axios from "axios";
 import type { FormEvent } from "react";
+import { fetchAll } from "../utils/fetchAll";
 
 interface Lender {
   id: number;
@@ -24,8 +25,7 @@ export default function LendersPage() {
   async function fetchLenders() {
     try {
       setError(null);
-      const res = await axios.get<Lender[]>(`${API}/policies/lenders`);
-      setLenders(res.data);
+      setLenders(await fetchAll<Lender>(`${API}/policies/lenders`));
     } catch (err: any) {
       setError(err.response?.data?.detail || "Failed to load lenders");
     }
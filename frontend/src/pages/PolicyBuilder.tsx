@@ -2,6 +2,7 @@ import { useEffect, useState } from "react";
 import axios from "axios";
 import type { FormEvent } from "react";
 import { generateRandomPolicy } from "../utils/randomPolicy";
+import { fetchAll } from "../utils/fetchAll";
 
 const API = "http://localhost:8000";
 
@@ -74,8 +75,8 @@ export default function PolicyBuilder() {
 
   // Load lenders + programs
   useEffect(() => {
-    axios.get(`${API}/policies/lenders`).then((res) => setLenders(res.data));
-    axios.get(`${API}/policies/programs`).then((res) => setPrograms(res.data));
+    fetchAll<Lender>(`${API}/policies/lenders`).then(setLenders);
+    fetchAll<Program>(`${API}/policies/programs`).then(setPrograms);
   }, []);
 
   function autoGenerateRuleId() {
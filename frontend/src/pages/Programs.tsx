@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import axios from "axios";
 import type { FormEvent } from "react";
+import { fetchAll } from "../utils/fetchAll";
 
 interface Lender {
   id: number;
@@ -55,11 +56,8 @@ export default function ProgramsPage() {
 
   async function loadData() {
     try {
-      const lenderRes = await axios.get(`${API}/policies/lenders`);
-      setLenders(lenderRes.data);
-
-      const programsRes = await axios.get(`${API}/policies/programs`);
-      setPrograms(programsRes.data);
+      setLenders(await fetchAll<Lender>(`${API}/policies/lenders`));
+      setPrograms(await fetchAll<Program>(`${API}/policies/programs`));
     } catch (err: any) {
       setError("Failed to load data");
     }
@@ -20,6 +20,7 @@ interface MatchRun {
   id: number;
   loan_request_id: number;
   status: string;
+  error?: string | null;
   results: MatchResult[];
 }
 
@@ -29,10 +30,22 @@ export default function ResultsPage() {
   const [error, setError] = useState("");
 
   useEffect(() => {
-    axios
-      .get(`${API}/underwriting/runs/${matchRunId}`)
-      .then((res) => setData(res.data))
-      .catch(() => setError("Failed to load match results"));
+    let timer: number | undefined;
+
+    // runs are executed by a worker; poll until they finish
+    const load = () =>
+      axios
+        .get(`${API}/underwriting/runs/${matchRunId}`)
+        .then((res) => {
+          setData(res.data);
+          if (res.data.status === "PENDING" || res.data.status === "RUNNING") {
+            timer = window.setTimeout(load, 1000);
+          }
+        })
+        .catch(() => setError("Failed to load match results"));
+
+    load();
+    return () => window.clearTimeout(timer);
   }, [matchRunId]);
 
   if (error)
@@ -45,6 +58,9 @@ export default function ResultsPage() {
     <div style={{ padding: "2rem" }}>
       <h1>Match Results for Run #{data.id}</h1>
       <p>Status: {data.status}</p>
+      {data.error && (
+        <pre style={{ color: "red", whiteSpace: "pre-wrap" }}>{data.error}</pre>
+      )}
 
       <h2 style={{ marginTop: "2rem" }}>Lender Evaluations</h2>
 
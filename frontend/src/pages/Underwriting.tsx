@@ -20,17 +20,25 @@ interface UnderwritingResponse {
 
 export default function UnderwritingRunner() {
   const [applications, setApplications] = useState<LoanRequest[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [selectedApp, setSelectedApp] = useState("");
   const [result, setResult] = useState<UnderwritingResponse | null>(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState("");
 
-  // Load all loan requests
-  useEffect(() => {
+  // Load loan requests, newest first, one page at a time
+  function loadApplications(cursor: string | null = null) {
     axios
-      .get(`${API}/applications`)
-      .then((res) => setApplications(res.data))
+      .get(`${API}/applications`, { params: { cursor: cursor ?? undefined, count: "none" } })
+      .then((res) => {
+        setApplications((prev) => (cursor ? [...prev, ...res.data] : res.data));
+        setNextCursor(res.headers["x-next-cursor"] ?? null);
+      })
       .catch(() => setError("Failed to load applications"));
+  }
+
+  useEffect(() => {
+    loadApplications();
   }, []);
 
   async function runUnderwriting() {
@@ -77,6 +85,14 @@ export default function UnderwritingRunner() {
             </option>
           ))}
         </select>
+        {nextCursor && (
+          <button
+            onClick={() => loadApplications(nextCursor)}
+            style={{ marginTop: "0.5rem", padding: "0.3rem 0.8rem" }}
+          >
+            Load older applications
+          </button>
+        )}
       </div>
 
       <button
@@ -0,0 +1,16 @@
+import axios from "axios";
+
+// List endpoints return one page at a time; follow X-Next-Cursor until the
+// last page so nothing past the first `limit` rows is dropped.
+export async function fetchAll<T>(url: string, params: Record<string, unknown> = {}): Promise<T[]> {
+  const rows: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const res = await axios.get<T[]>(url, {
+      params: { ...params, limit: 1000, count: "none", ...(cursor ? { cursor } : {}) }
+    });
+    rows.push(...res.data);
+    cursor = res.headers["x-next-cursor"];
+  } while (cursor);
+  return rows;
+}